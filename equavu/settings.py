@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 import pymysql
@@ -17,6 +19,9 @@ import pymysql
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Whether the test suite is running (pytest or `manage.py test`)
+TESTING = 'pytest' in sys.modules or sys.argv[1:2] == ['test']
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -60,10 +65,52 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Token bucket rates for the public endpoints (see equavu_hr_app/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'registration': '30/hour',  # per client IP
+        'email_check': '60/min',  # per client IP
+        'candidate_status': '120/min',  # per client IP
+        'candidate_status_id': '60/min',  # per candidate ID
+        'status_events': '30/min',  # event streams opened per client IP
+        'status_events_id': '30/min',  # event streams opened per candidate ID
+    },
+    # Number of reverse proxies in front of the app (nginx in docker-compose). The client IP used by the
+    # throttles is taken from X-Forwarded-For only this many hops deep; with 0 it is REMOTE_ADDR.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
 }
 
+# Maximum number of requests per endpoint handled at once, counted across all workers
+# when REDIS_URL is set and per worker process otherwise; the excess is rejected with
+# 503 and Retry-After before touching the database.
+LOAD_SHEDDING_LIMITS = {
+    'registration': 8,
+    'candidate_status': 32,
+}
+LOAD_SHEDDING_RETRY_AFTER = 2  # seconds
+# A slot of the shared limit is freed after this long even if its worker never released it
+LOAD_SHEDDING_LEASE_SECONDS = 60
+
+# Cache used for throttling state. Set REDIS_URL to share it between workers;
+# the local-memory cache is per process.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 MIDDLEWARE = [
+    'equavu_hr_app.middleware.TracingMiddleware',  # Request root span, sampled trace export
     'django.middleware.security.SecurityMiddleware',
+    'equavu_hr_app.middleware.CompressionMiddleware',  # Brotli/gzip of API responses
+    'equavu_hr_app.middleware.ReplicaRoutingMiddleware',  # Read replica routing with read-your-writes
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -115,6 +162,25 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated hosts sharing the primary's credentials.
+# Safe requests read from a healthy replica, everything else uses the primary.
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+if TESTING and not DATABASE_REPLICAS:
+    # Tests route reads through a replica connection mirroring the test database
+    DATABASES['replica_1'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append('replica_1')
+DATABASE_ROUTERS = ['equavu_hr_app.db_router.PrimaryReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = 5  # Replicas further behind are skipped
+REPLICA_HEALTH_CHECK_INTERVAL = 10  # Seconds between replica lag checks
+REPLICA_PIN_SECONDS = 10  # How long a client reads from the primary after a write
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -169,18 +235,93 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Maximum upload file size - 5MB as per requirements
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB in bytes
 
+# In-memory Bloom filter used to answer duplicate-email checks without a database query
+EMAIL_BLOOM_FILTER_ENABLED = True
+EMAIL_BLOOM_FILTER_CAPACITY = 100000  # Expected number of registered emails
+EMAIL_BLOOM_FILTER_ERROR_RATE = 0.01  # False positives are confirmed against the unique email index
+EMAIL_BLOOM_FILTER_TTL = 300  # Seconds before the filter is rebuilt from the database
+
+# Bulk candidate import: rows inserted per transaction and parallel resume uploads
+BULK_IMPORT_BATCH_SIZE = 200
+BULK_IMPORT_UPLOAD_WORKERS = 8
+BULK_IMPORT_MAX_ERRORS = 1000  # Rejected rows kept in a job's error report; error_count counts them all
+BULK_IMPORT_STALE_SECONDS = 900  # A running job without a checkpoint for this long may be resumed
+
+# Multi-resume ZIP downloads: maximum candidates per archive and concurrent storage reads
+RESUME_ARCHIVE_MAX_CANDIDATES = 1000
+RESUME_ARCHIVE_PREFETCH = 4
+
+# Response compression (CompressionMiddleware). Brotli quality 5 keeps the CPU cost
+# close to gzip level 6 while producing smaller JSON.
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_GZIP_LEVEL = 6
+
+# Row count / latest update of filtered admin lists, cached per filter and invalidated
+# on writes; the timeout bounds staleness when the cache is not shared (no REDIS_URL).
+CANDIDATE_LIST_SUMMARY_CACHE_SECONDS = 60
+
+# Hiring funnel analytics (update_funnel_analytics). Status changes younger than the
+# settle time are left for the next run, so late commits are not skipped.
+FUNNEL_SETTLE_SECONDS = 60
+FUNNEL_BATCH_SIZE = 5000
+
+# Micro-benchmark suite (run_benchmarks): committed baseline and the slowdown that fails a run
+BENCHMARK_BASELINE_PATH = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+BENCHMARK_REGRESSION_THRESHOLD = 0.25
+
+# Idempotency-Key support of registration and status updates: how long responses are
+# replayed, how long a retry waits for the request holding its key, and after how long
+# an unfinished request's key is considered abandoned.
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_WAIT_SECONDS = 10
+IDEMPOTENCY_LOCK_SECONDS = 120
+
+# Delta sync feed of the admin candidate list
+SYNC_PAGE_SIZE = 500
+SYNC_TOKEN_OVERLAP_SECONDS = 10  # Covers replica lag, long transactions and clock skew
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Server-Sent Events for candidate status changes. With a Redis URL, events reach
+# streams served by any process; otherwise only those of the publishing process.
+STATUS_EVENTS_REDIS_URL = os.environ.get('REDIS_URL')
+STATUS_EVENTS_HEARTBEAT_SECONDS = 15
+STATUS_EVENTS_RETRY_MS = 5000  # Client reconnection delay
+STATUS_EVENTS_MAX_STREAMS_PER_CANDIDATE = 5  # Open streams of one candidate per process
+
+# Status changes of rejected/accepted candidates older than this are moved to the
+# compressed archive by `manage.py archive_status_history`
+STATUS_HISTORY_ARCHIVE_AFTER_DAYS = 365
+
+# Candidates without activity (registration or status change) for this long are deleted together
+# with their resumes by `manage.py purge_expired_candidates`
+CANDIDATE_RETENTION_DAYS = 730
+
 # Logging configuration
 log_dir = os.path.join(BASE_DIR, 'logs')
 log_file = os.path.join(log_dir, 'equavo_hr.log')
 os.makedirs(log_dir, exist_ok=True)
 if not os.path.exists(log_file):
     open(log_file, 'a').close()
+
+# Request tracing (equavu_hr_app.tracing): the fraction of requests whose spans are
+# recorded, and the file sampled traces are appended to as OTLP/JSON lines. Off unless
+# enabled by the environment (e.g. TRACING_SAMPLE_RATE=0.01 in deployment).
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', '0'))
+TRACING_EXPORT_PATH = os.environ.get('TRACING_EXPORT_PATH', os.path.join(log_dir, 'traces.jsonl'))
+TRACING_SERVICE_NAME = 'equavu-hr-backend'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'trace_context': {
+            '()': 'equavu_hr_app.tracing.TraceContextFilter',
+        },
+    },
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
+            'format': '{levelname} {asctime} {module} trace={trace_id} span={span_id} {message}',
             'style': '{',
         },
         'simple': {
@@ -194,15 +335,17 @@ LOGGING = {
             'class': 'logging.FileHandler',
             'filename': log_file,
             'formatter': 'verbose',
+            'filters': ['trace_context'],
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
+            'filters': ['trace_context'],
         },
     },
     'loggers': {
-        'equavo_hr_app': {
+        'equavu_hr_app': {
             'handlers': ['file', 'console'],
             'level': 'INFO',
             'propagate': True,
@@ -227,6 +370,24 @@ EMAIL_HOST_USER = 'equavuapp@gmail.com'
 EMAIL_HOST_PASSWORD = 'uexo mwpd kpxk wzwt'  # Use environment variable or secure storage for production
 EMAIL_USE_TLS = True
 EMAIL_USE_SSL = False
+EMAIL_TIMEOUT = 10  # Seconds before a blocked SMTP connection or command fails
+# Candidate emails that fail are queued and retried after this many seconds, doubled per attempt
+EMAIL_RETRY_SECONDS = 60
+# Queued emails are given up (kept as dead letters) after this many failed attempts
+EMAIL_MAX_ATTEMPTS = 10
+# Emails are claimed before sending and sent outside any transaction; a claim not settled
+# within this many seconds (its sender died) is sent again by the next sweep
+EMAIL_SEND_LEASE_SECONDS = 900
+
+# Status update emails are held for this long after a candidate's first change, and all
+# changes made meanwhile are sent as one message (0 sends each change right away).
+STATUS_NOTIFICATION_WINDOW_SECONDS = 300
+
+# In-memory resume storage for tests and benchmarks (takes precedence over USE_S3). On by default
+# for test runs, so they never touch the S3 bucket; USE_MEMORY_STORAGE=false tests local or S3
+# storage as configured. The latency is added to every storage operation to simulate a remote backend.
+USE_MEMORY_STORAGE = os.environ.get('USE_MEMORY_STORAGE', str(TESTING)).lower() == 'true'
+MEMORY_STORAGE_LATENCY_SECONDS = float(os.environ.get('MEMORY_STORAGE_LATENCY_SECONDS', '0'))
 
 # NOTE: THE FOLLOWING S3 CONFIGURATION IS FOR DEMONSTRATION PURPOSES ONLY.
 USE_S3 = True  # Set to True to use S3, False for local storage
@@ -243,4 +404,35 @@ AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',
 }
 MEDIA_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/media/"
+
+# Local directories of S3 storage; test runs use throwaway ones instead of the deployment's
+STORAGE_WORK_DIR = os.path.join(tempfile.gettempdir(), 'equavu-test') if TESTING else BASE_DIR
+# Files of API bulk imports while their background import runs
+BULK_IMPORT_STAGING_DIR = os.path.join(STORAGE_WORK_DIR, 'imports')
+
+# Write-behind uploads: resumes are written to a local spool directory and uploaded to S3 by
+# background threads. Uploads left by a crash are finished by `manage.py upload_spooled_resumes`.
+S3_WRITE_BEHIND = True
+S3_SPOOL_DIR = os.path.join(STORAGE_WORK_DIR, 'spool')
+S3_UPLOAD_WORKERS = 2
+S3_UPLOAD_RETRY_SECONDS = 5  # First retry delay, doubled per failure up to 5 minutes
+S3_UPLOAD_DRAIN_SECONDS = 30  # How long an exiting process waits for queued uploads
+S3_UPLOAD_RECOVER_AFTER_SECONDS = 600  # Age of spooled files upload_spooled_resumes treats as abandoned
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # Also the part size of multipart uploads
+S3_MULTIPART_CONCURRENCY = 4
+# Timeouts and attempts (retries included) of each S3 request
+S3_CONNECT_TIMEOUT_SECONDS = 3
+S3_READ_TIMEOUT_SECONDS = 10
+S3_MAX_ATTEMPTS = 2
+
+# After `failure_threshold` consecutive failures of S3 or the mail server, calls to it fail fast
+# for `reset_seconds` before one is let through to probe whether it recovered.
+CIRCUIT_BREAKERS = {
+    's3': {'failure_threshold': 5, 'reset_seconds': 30},
+    'smtp': {'failure_threshold': 3, 'reset_seconds': 60},
+}
+
+# Local LRU disk cache of resumes read from S3, bounded by total size (0 disables it)
+S3_READ_CACHE_DIR = os.path.join(STORAGE_WORK_DIR, 'cache', 'resumes')
+S3_READ_CACHE_MAX_BYTES = 1024 * 1024 * 1024
 DEFAULT_FILE_STORAGE = 'equavo_hr_app.storage.S3Storage' if USE_S3 else 'django.core.files.storage.FileSystemStorage'
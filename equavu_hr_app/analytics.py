@@ -0,0 +1,216 @@
+"""
+Hiring funnel analytics: conversion between statuses and time spent in each
+status, per department.
+Each StatusChange is a transition of its candidate from the status it was in
+(entered at the time of its previous change) to the new one. Transitions are
+counted into FunnelTransition rows, so reading the funnel never touches the
+status history. `update_funnel()` adds the changes made since the last run;
+`rebuild_funnel()` recomputes everything, including archived history.
+Changes younger than FUNNEL_SETTLE_SECONDS are left for the next run, so a
+change committed late with an earlier timestamp is not skipped.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from itertools import groupby
+from operator import itemgetter
+import heapq
+
+from .models import (
+    ApplicationStatus,
+    Department,
+    FunnelCandidateState,
+    FunnelTransition,
+    FunnelWatermark,
+    StatusChange,
+    StatusChangeArchive,
+    bulk_upsert
+)
+
+
+def _settled_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'FUNNEL_SETTLE_SECONDS', 60))
+
+
+def _locked_watermark():
+    """The watermark row, locked until the end of the transaction."""
+    FunnelWatermark.objects.get_or_create(pk=1)
+    return FunnelWatermark.objects.select_for_update().get(pk=1)
+
+
+def _add_transitions(totals):
+    """Add {(department, from_status, to_status): [count, seconds]} to the snapshot."""
+    existing = set(FunnelTransition.objects.values_list('department', 'from_status', 'to_status'))
+    new = []
+    for key, (count, seconds) in totals.items():
+        department, from_status, to_status = key
+        if key in existing:
+            FunnelTransition.objects.filter(
+                department=department, from_status=from_status, to_status=to_status
+            ).update(count=F('count') + count, total_seconds=F('total_seconds') + seconds)
+        else:
+            new.append(FunnelTransition(department=department, from_status=from_status, to_status=to_status,
+                                        count=count, total_seconds=seconds))
+    FunnelTransition.objects.bulk_create(new)
+
+
+def _save_states(states):
+    bulk_upsert(FunnelCandidateState, states, unique_fields=['candidate_id'],
+                update_fields=['status', 'entered_at'], batch_size=1000)
+
+
+def update_funnel(batch_size=None):
+    """
+    Add the status changes made since the last run to the funnel.
+    Each batch is committed with the watermark, so an interrupted run resumes
+    where it stopped. Returns the number of changes processed.
+    """
+    batch_size = batch_size or getattr(settings, 'FUNNEL_BATCH_SIZE', 5000)
+    settled_before = _settled_before()
+    processed = 0
+    while True:
+        with transaction.atomic():
+            watermark = _locked_watermark()
+            changes = StatusChange.objects.filter(created_at__lt=settled_before)
+            if watermark.last_created_at is not None:
+                changes = changes.filter(
+                    Q(created_at__gt=watermark.last_created_at)
+                    | Q(created_at=watermark.last_created_at, id__gt=watermark.last_change_id)
+                )
+            changes = list(changes.order_by('created_at', 'id').values_list(
+                'id', 'candidate_id', 'candidate__department', 'new_status', 'created_at'
+            )[:batch_size])
+            if not changes:
+                return processed
+
+            states = FunnelCandidateState.objects.in_bulk({change[1] for change in changes})
+            totals = defaultdict(lambda: [0, 0.0])
+            for change_id, candidate_id, department, new_status, created_at in changes:
+                state = states.get(candidate_id)
+                if state is None:
+                    totals[(department, '', new_status)][0] += 1
+                    states[candidate_id] = state = FunnelCandidateState(candidate_id=candidate_id)
+                else:
+                    total = totals[(department, state.status, new_status)]
+                    total[0] += 1
+                    total[1] += (created_at - state.entered_at).total_seconds()
+                state.status, state.entered_at = new_status, created_at
+
+            _add_transitions(totals)
+            _save_states(list(states.values()))
+            watermark.last_change_id, watermark.last_created_at = changes[-1][0], changes[-1][4]
+            watermark.save()
+        processed += len(changes)
+
+
+def _status_history(settled_before, chunk_size):
+    """
+    Yield (candidate ID, department, [(status, created_at, change ID)]) per candidate,
+    oldest change first, merging archived changes (change ID None) with live ones.
+    """
+    archived = (
+        (archive.candidate_id, archive.candidate.department, change['new_status'],
+         parse_datetime(change['created_at']), None)
+        for archive in StatusChangeArchive.objects
+        .select_related('candidate').only('candidate_id', 'candidate__department', 'payload')
+        .order_by('candidate_id').iterator(chunk_size=100)
+        for change in archive.changes()
+    )
+    live = (StatusChange.objects
+            .filter(created_at__lt=settled_before)
+            .order_by('candidate_id', 'created_at', 'id')
+            .values_list('candidate_id', 'candidate__department', 'new_status', 'created_at', 'id')
+            .iterator(chunk_size=chunk_size))
+    # Both streams are ordered by candidate; archived changes are always the older ones.
+    merged = heapq.merge(archived, live, key=itemgetter(0))
+    for candidate_id, rows in groupby(merged, key=itemgetter(0)):
+        rows = list(rows)
+        events = sorted(((status, created_at, change_id) for _, _, status, created_at, change_id in rows),
+                        key=itemgetter(1))
+        yield candidate_id, rows[0][1], events
+
+
+def rebuild_funnel(chunk_size=10000):
+    """
+    Recompute the whole funnel from the live and archived status history.
+    Returns the number of status changes processed.
+    """
+    settled_before = _settled_before()
+    processed = 0
+    with transaction.atomic():
+        watermark = _locked_watermark()
+        FunnelTransition.objects.all().delete()
+        FunnelCandidateState.objects.all().delete()
+
+        totals = defaultdict(lambda: [0, 0.0])
+        states, last = [], None
+        for candidate_id, department, events in _status_history(settled_before, chunk_size):
+            previous = None
+            for status, created_at, change_id in events:
+                total = totals[(department, previous[0] if previous else '', status)]
+                total[0] += 1
+                if previous:
+                    total[1] += (created_at - previous[1]).total_seconds()
+                previous = (status, created_at)
+                if change_id is not None and (last is None or (created_at, change_id) > last):
+                    last = (created_at, change_id)
+            processed += len(events)
+            states.append(FunnelCandidateState(candidate_id=candidate_id, status=previous[0], entered_at=previous[1]))
+            if len(states) >= chunk_size:
+                _save_states(states)
+                states = []
+        _save_states(states)
+        _add_transitions(totals)
+
+        watermark.last_created_at, watermark.last_change_id = last if last else (None, None)
+        watermark.rebuilt_at = timezone.now()
+        watermark.save()
+    return processed
+
+
+def funnel_report(departments=None):
+    """
+    Funnel metrics per department from the snapshot: per status the candidates
+    that entered it, left it and are still in it, with the average days spent
+    before leaving, and the conversion rate of every transition between statuses.
+    """
+    transitions = FunnelTransition.objects.all()
+    if departments:
+        transitions = transitions.filter(department__in=departments)
+
+    report = {}
+    for department in departments or Department.values:
+        report[department] = {
+            'stages': {status: {'entered': 0, 'exited': 0, 'current': 0, 'avg_days_in_stage': None}
+                       for status in ApplicationStatus.values},
+            'conversions': [],
+        }
+    seconds = defaultdict(float)
+    rows = list(transitions.order_by('department', 'from_status', 'to_status'))
+    for row in rows:
+        stages = report[row.department]['stages']
+        stages[row.to_status]['entered'] += row.count
+        if row.from_status:
+            stages[row.from_status]['exited'] += row.count
+            seconds[(row.department, row.from_status)] += row.total_seconds
+
+    for row in rows:
+        if not row.from_status:
+            continue
+        entered = report[row.department]['stages'][row.from_status]['entered']
+        report[row.department]['conversions'].append({
+            'from_status': row.from_status,
+            'to_status': row.to_status,
+            'count': row.count,
+            'rate': round(row.count / entered, 4) if entered else None,
+        })
+    for department, data in report.items():
+        for status, stage in data['stages'].items():
+            stage['current'] = stage['entered'] - stage['exited']
+            if stage['exited']:
+                stage['avg_days_in_stage'] = round(seconds[(department, status)] / stage['exited'] / 86400, 2)
+    return report
@@ -0,0 +1,161 @@
+"""
+Micro-benchmarks of the hot paths of the app: serializing candidates for the
+admin list and detail endpoints, validating registrations, naming resume
+uploads and dispatching status updates.
+Each benchmark is warmed up, then timed with timeit in repeated rounds of
+enough calls to last at least MIN_ROUND_SECONDS; the fastest round is the
+result, which is the least disturbed by other load on the machine. Results
+are compared against a committed baseline (run_benchmarks).
+"""
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory
+from django.utils import timezone
+import json
+import platform
+import statistics
+import timeit
+import uuid
+
+import django
+
+from .models import ApplicationStatus, Candidate, Department, StatusChange, resume_upload_path
+from .serializers import CandidateCreateSerializer, CandidateDetailSerializer, CandidateListSerializer
+from .views import StatusUpdateView
+
+SIZES = (10, 100, 1000)
+# Number of status changes per candidate for the detail serializer
+DEPTHS = (1, 5, 25)
+MIN_ROUND_SECONDS = 0.05
+
+
+def measure(func, warmup=3, repeat=7):
+    """
+    Time `func` and return {'min', 'median'} seconds per call.
+    Garbage collection is disabled while timing (timeit's default).
+    """
+    for _ in range(warmup):
+        func()
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < MIN_ROUND_SECONDS:
+        number *= 2
+        elapsed = timer.timeit(number)
+    rounds = [total / number for total in timer.repeat(repeat, number)]
+    return {'min': min(rounds), 'median': statistics.median(rounds)}
+
+
+def seed_candidates(count, depth, tag):
+    """Insert `count` candidates with `depth` status changes each; returns them with the changes prefetched."""
+    now = timezone.now()
+    candidates = [
+        Candidate(
+            id=uuid.uuid4(),
+            full_name=f"Benchmark {tag} {i}",
+            email=f"benchmark-{tag}-{i}@example.invalid",
+            date_of_birth=date(1990, 1, 1),
+            years_of_experience=i % 20,
+            department=Department.values[i % len(Department.values)],
+            resume='resumes/benchmark.pdf',
+            current_status=ApplicationStatus.values[depth % len(ApplicationStatus.values)],
+        )
+        for i in range(count)
+    ]
+    Candidate.objects.bulk_create(candidates, batch_size=500)
+    StatusChange.objects.bulk_create([
+        StatusChange(candidate=candidate, previous_status=ApplicationStatus.values[j % 5],
+                     new_status=ApplicationStatus.values[(j + 1) % 5], feedback="Benchmark feedback.",
+                     admin_user="Admin", created_at=now - timedelta(hours=j))
+        for candidate in candidates for j in range(depth)
+    ], batch_size=1000)
+    return list(Candidate.objects.filter(email__startswith=f"benchmark-{tag}-")
+                .order_by('created_at', 'id').prefetch_related('status_changes'))
+
+
+def build_benchmarks(sizes=SIZES, depths=DEPTHS):
+    """
+    Seed the data the benchmarks need and return [(name, func)].
+    Call it inside a transaction that is rolled back afterwards.
+    """
+    benchmarks = []
+    largest = max(sizes)
+    by_depth = {depth: seed_candidates(largest, depth, f"d{depth}") for depth in depths}
+
+    for size in sizes:
+        candidates = by_depth[depths[0]][:size]
+        benchmarks.append((f"list_serializer[{size}]",
+                           lambda candidates=candidates: CandidateListSerializer(candidates, many=True).data))
+    for size in sizes:
+        for depth in depths:
+            candidates = by_depth[depth][:size]
+            benchmarks.append((f"detail_serializer[{size}x{depth}]",
+                               lambda candidates=candidates: CandidateDetailSerializer(candidates, many=True).data))
+
+    def validate_registration():
+        serializer = CandidateCreateSerializer(data={
+            'full_name': "Benchmark Applicant",
+            'email': "applicant@example.invalid",
+            'date_of_birth': "1990-01-01",
+            'years_of_experience': 5,
+            'department': Department.IT,
+            'resume': SimpleUploadedFile("resume.pdf", b"%PDF-1.4 benchmark", content_type="application/pdf"),
+        })
+        assert serializer.is_valid(), serializer.errors
+    benchmarks.append(("create_serializer_validation", validate_registration))
+
+    hashed = Candidate(full_name="Benchmark", resume_sha256='ab' * 32)
+    legacy = Candidate(full_name="Benchmark")
+    benchmarks.append(("resume_upload_path[content_addressed]", lambda: resume_upload_path(hashed, "resume.PDF")))
+    benchmarks.append(("resume_upload_path[legacy]", lambda: resume_upload_path(legacy, "resume.pdf")))
+
+    host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+    factory = RequestFactory(SERVER_NAME=host)
+    view = StatusUpdateView.as_view()
+    candidate = by_depth[depths[0]][0]
+    path = f'/api/admin/candidates/{candidate.id}/status/'
+
+    def dispatch_invalid():
+        # Authentication, permissions, parsing, lookup and validation, without the write
+        request = factory.put(path, {'status': 'UNKNOWN'}, content_type='application/json', headers={'X-ADMIN': '1'})
+        assert view(request, pk=candidate.id).status_code == 400
+
+    def dispatch_update():
+        request = factory.put(path, {'status': ApplicationStatus.UNDER_REVIEW, 'feedback': "Benchmark"},
+                              content_type='application/json', headers={'X-ADMIN': '1'})
+        assert view(request, pk=candidate.id).status_code == 200
+    benchmarks.append(("status_update_view[invalid]", dispatch_invalid))
+    benchmarks.append(("status_update_view[update]", dispatch_update))
+    return benchmarks
+
+
+def environment():
+    """Where the results were measured; baselines are only comparable on similar machines."""
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'machine': platform.machine(),
+        'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+    }
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def write_baseline(path, results, threshold):
+    with open(path, 'w') as fh:
+        json.dump({'threshold': threshold, 'environment': environment(), 'results': results}, fh, indent=2,
+                  sort_keys=True)
+        fh.write('\n')
+
+
+def find_regressions(results, baseline, threshold):
+    """Return [(name, baseline seconds, current seconds)] for results slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous and result['min'] > previous['min'] * (1 + threshold):
+            regressions.append((name, previous['min'], result['min']))
+    return regressions
@@ -0,0 +1,328 @@
+"""
+Bulk import of candidates from a CSV or NDJSON file plus a ZIP archive of resumes.
+Rows are read one batch at a time, validated with the registration rules,
+and inserted with bulk_create together with their initial StatusChange.
+Resumes are uploaded to storage in parallel before each batch is committed.
+Progress is checkpointed on a CandidateImportJob, so an interrupted import
+can be resumed without importing rows twice. Imports uploaded through the API
+are staged on local disk and run in a background thread, whose job is polled.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+import zipfile
+
+from .email_registry import email_registry
+from .list_summary import candidates_changed
+from .models import Candidate, StatusChange, ResumeBlob, CandidateImportJob, ApplicationStatus, ImportStatus
+from .serializers import BulkCandidateRowSerializer
+from .storage import content_addressed_name
+from .upload_handlers import RESUME_SIGNATURES, SIGNATURE_LENGTH
+
+logger = logging.getLogger(__name__)
+
+ROW_FIELDS = ['full_name', 'email', 'date_of_birth', 'years_of_experience', 'department', 'resume']
+INITIAL_FEEDBACK = "Application imported successfully."
+
+
+def detect_format(filename):
+    """Guess the rows format from the file name: NDJSON for .ndjson/.jsonl, CSV otherwise."""
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def iter_rows(rows_file, fmt):
+    """
+    Yield (row_number, row) from a CSV or NDJSON file, decoding it line by line.
+    Malformed NDJSON lines are yielded as None so they can be reported.
+    """
+    lines = codecs.iterdecode(File(rows_file), 'utf-8-sig')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, row
+        return
+
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+class CandidateImporter:
+    """
+    Imports candidate rows and their resumes into a CandidateImportJob.
+    Pass an existing job to resume it after its last checkpoint.
+    """
+
+    def __init__(self, rows_file, resumes_file, fmt=None, job=None, batch_size=None, workers=None):
+        self.rows_file = rows_file
+        self.archive = zipfile.ZipFile(resumes_file)
+        self.format = fmt or detect_format(getattr(rows_file, 'name', '') or '')
+        self.batch_size = batch_size or getattr(settings, 'BULK_IMPORT_BATCH_SIZE', 200)
+        self.workers = workers or getattr(settings, 'BULK_IMPORT_UPLOAD_WORKERS', 8)
+        self.max_errors = getattr(settings, 'BULK_IMPORT_MAX_ERRORS', 1000)
+        self.storage = Candidate._meta.get_field('resume').storage
+        self.job = job or CandidateImportJob.objects.create(source_name=getattr(rows_file, 'name', '') or 'import')
+        self.seen_emails = set()
+
+    def run(self):
+        """Import all remaining rows and return the job."""
+        job = self.job
+        job.status = ImportStatus.RUNNING
+        job.save(update_fields=['status', 'updated_at'])
+        try:
+            batch = []
+            for number, row in iter_rows(self.rows_file, self.format):
+                if number <= job.rows_processed:
+                    continue
+                batch.append((number, row))
+                if len(batch) >= self.batch_size:
+                    self._import_batch(batch)
+                    batch = []
+            if batch:
+                self._import_batch(batch)
+        except Exception as e:
+            logger.error(f"Bulk import {job.id} failed after row {job.rows_processed}: {str(e)}")
+            job.status = ImportStatus.FAILED
+            job.save(update_fields=['status', 'updated_at'])
+            raise
+
+        job.status = ImportStatus.COMPLETED
+        job.save(update_fields=['status', 'updated_at'])
+        logger.info(f"Bulk import {job.id} completed: {job.imported_count} imported, {job.error_count} rejected")
+        return job
+
+    def _load_resume(self, filename):
+        """
+        Check a resume in the archive, decompressing it chunk by chunk to hash
+        it without keeping its content. The size recorded in the archive is
+        only declared by its author, so the limit is enforced on the
+        decompressed bytes, and the first bytes must match the signature of the
+        extension, as for uploaded resumes. The returned UploadedFile has no
+        content: _store_resumes reads its `member` again to upload it.
+        """
+        try:
+            info = self.archive.getinfo(filename)
+        except KeyError:
+            return None, ["Resume file not found in the archive."]
+        too_large = [f"File size exceeds the limit of {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB."]
+        if info.file_size > settings.MAX_UPLOAD_SIZE:
+            return None, too_large
+
+        head, digest, size = b'', hashlib.sha256(), 0
+        try:
+            with self.archive.open(info) as member:
+                for chunk in iter(lambda: member.read(64 * 1024), b''):
+                    size += len(chunk)
+                    if size > settings.MAX_UPLOAD_SIZE:
+                        return None, too_large
+                    if len(head) < SIGNATURE_LENGTH:
+                        head += chunk[:SIGNATURE_LENGTH]
+                    digest.update(chunk)
+        except (zipfile.BadZipFile, EOFError):
+            return None, ["Resume file is corrupt in the archive."]
+
+        signature = RESUME_SIGNATURES.get(os.path.splitext(filename)[1][1:].lower())
+        if signature is not None and not head.startswith(signature):
+            return None, ["The file content does not match its extension."]
+        resume = UploadedFile(name=filename.rsplit('/', 1)[-1], size=size)
+        resume.sha256 = digest.hexdigest()
+        resume.member = info
+        return resume, None
+
+    def _validate(self, batch):
+        """Return (valid rows, errors) for a batch; valid rows carry their validated data."""
+        valid, errors = [], []
+        for number, row in batch:
+            if row is None:
+                errors.append({'row': number, 'email': None, 'errors': {'non_field_errors': ["Malformed row."]}})
+                continue
+            data = {field: row.get(field) for field in ROW_FIELDS}
+            resume, resume_errors = self._load_resume(str(data['resume'] or ''))
+            data['resume'] = resume
+            serializer = BulkCandidateRowSerializer(data=data)
+            if not serializer.is_valid() or resume_errors:
+                row_errors = dict(serializer.errors)
+                if resume_errors:
+                    row_errors['resume'] = resume_errors
+                errors.append({'row': number, 'email': row.get('email'), 'errors': row_errors})
+                continue
+            valid.append((number, serializer.validated_data))
+
+        # One query for the whole batch instead of a uniqueness check per row
+        emails = [data['email'] for _, data in valid]
+        taken = set(Candidate.objects.filter(email__in=emails).values_list('email', flat=True))
+        unique = []
+        for number, data in valid:
+            if data['email'] in taken or data['email'] in self.seen_emails:
+                errors.append({'row': number, 'email': data['email'],
+                               'errors': {'email': ["candidate with this email already exists."]}})
+                continue
+            self.seen_emails.add(data['email'])
+            unique.append((number, data))
+        return unique, errors
+
+    def _store_resumes(self, rows):
+        """
+        Upload the batch's resumes in parallel, once per distinct content, and
+        return the blobs by digest. Runs in the batch's transaction: the blob
+        rows are locked (new ones created without references) before the
+        uploads, so a concurrent release cannot delete a file being reused.
+        """
+        blobs = {}
+        for _, data in rows:
+            resume = data['resume']
+            if resume.sha256 not in blobs:
+                blobs[resume.sha256] = {
+                    'name': content_addressed_name(resume.sha256, resume.name.split('.')[-1]),
+                    'size': resume.size,
+                    'member': resume.member,
+                    'count': 0
+                }
+            blobs[resume.sha256]['count'] += 1
+
+        missing = {}
+        # Locked in key order, like ResumeBlob.release_many, so that they cannot deadlock
+        for digest in sorted(blobs):
+            blob = blobs[digest]
+            stored, created = ResumeBlob.lock(digest, blob['name'], blob['size'])
+            if created:
+                missing[digest] = blob
+            else:
+                blob['name'] = stored.name
+
+        def upload(blob):
+            # Decompressed from the archive while uploading, so no batch is held in memory
+            with self.archive.open(blob['member']) as member:
+                content = File(member, blob['name'])
+                content.size = blob['size']
+                blob['name'] = self.storage.save(blob['name'], content)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(upload, missing.values()))
+        for digest, blob in missing.items():
+            ResumeBlob.objects.filter(sha256=digest).update(name=blob['name'])
+        return blobs
+
+    def _insert(self, rows, blobs):
+        """Insert candidates, their initial status changes and blob references."""
+        candidates = []
+        for _, data in rows:
+            resume = data['resume']
+            candidates.append(Candidate(
+                id=uuid.uuid4(),
+                full_name=data['full_name'],
+                email=data['email'],
+                date_of_birth=data['date_of_birth'],
+                years_of_experience=data['years_of_experience'],
+                department=data['department'],
+                resume=blobs[resume.sha256]['name'],
+                resume_sha256=resume.sha256,
+                current_status=ApplicationStatus.SUBMITTED
+            ))
+        Candidate.objects.bulk_create(candidates)
+        StatusChange.objects.bulk_create([
+            StatusChange(candidate=candidate, previous_status=None,
+                         new_status=ApplicationStatus.SUBMITTED, feedback=INITIAL_FEEDBACK)
+            for candidate in candidates
+        ])
+        for digest, blob in blobs.items():
+            ResumeBlob.acquire(digest, blob['name'], blob['size'], count=blob['count'])
+        return candidates
+
+    def _checkpoint(self, batch, imported, errors):
+        job = self.job
+        job.rows_processed = batch[-1][0]
+        job.imported_count += len(imported)
+        job.error_count += len(errors)
+        update_fields = ['rows_processed', 'imported_count', 'error_count', 'updated_at']
+        # The report keeps the first BULK_IMPORT_MAX_ERRORS rejected rows, and is only
+        # written by checkpoints that add to it; error_count keeps counting past it.
+        room = self.max_errors - len(job.errors)
+        if errors and room > 0:
+            job.errors = job.errors + sorted(errors, key=lambda error: error['row'])[:room]
+            update_fields.append('errors')
+        job.save(update_fields=update_fields)
+
+    def _import_batch(self, batch):
+        rows, errors = self._validate(batch)
+        blobs = {}
+
+        try:
+            # The checkpoint is committed together with the batch, so a resumed import never repeats rows.
+            with transaction.atomic():
+                blobs = self._store_resumes(rows) if rows else {}
+                imported = self._insert(rows, blobs) if rows else []
+                self._checkpoint(batch, imported, errors)
+        except IntegrityError:
+            # A concurrent registration took one of the emails: import the rows one by one to find it.
+            imported = []
+            with transaction.atomic():
+                for number, data in rows:
+                    blob = {**blobs[data['resume'].sha256], 'count': 1}
+                    try:
+                        with transaction.atomic():
+                            imported += self._insert([(number, data)], {data['resume'].sha256: blob})
+                    except IntegrityError:
+                        errors.append({'row': number, 'email': data['email'],
+                                       'errors': {'email': ["candidate with this email already exists."]}})
+                self._checkpoint(batch, imported, errors)
+
+        if imported:
+            candidates_changed()
+        for candidate in imported:
+            email_registry.add(candidate.email)
+
+
+def start_import(job, rows_file, resumes_file, fmt):
+    """
+    Stage the uploaded files of an import in BULK_IMPORT_STAGING_DIR and run the
+    job in a background thread once the current transaction commits. The client
+    polls the job for its progress; the staged files are removed when it ends.
+    """
+    os.makedirs(settings.BULK_IMPORT_STAGING_DIR, exist_ok=True)
+    paths = []
+    for kind, upload in (('rows', rows_file), ('resumes', resumes_file)):
+        path = os.path.join(settings.BULK_IMPORT_STAGING_DIR, f"{job.id}.{kind}")
+        with open(path, 'wb') as staged:
+            for chunk in upload.chunks():
+                staged.write(chunk)
+        paths.append(path)
+
+    thread = threading.Thread(target=_run_staged_import, args=(job.id, *paths, fmt),
+                              name=f"import-{job.id}", daemon=True)
+    transaction.on_commit(thread.start)
+    return thread
+
+
+def _run_staged_import(job_id, rows_path, resumes_path, fmt):
+    try:
+        job = CandidateImportJob.objects.get(id=job_id)
+        with open(rows_path, 'rb') as rows, open(resumes_path, 'rb') as resumes:
+            CandidateImporter(rows, resumes, fmt=fmt, job=job).run()
+    except Exception as e:
+        logger.error(f"Bulk import {job_id} failed: {str(e)}")
+        CandidateImportJob.objects.filter(id=job_id).update(status=ImportStatus.FAILED, updated_at=timezone.now())
+    finally:
+        for path in (rows_path, resumes_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        connection.close()
@@ -0,0 +1,155 @@
+"""
+Circuit breakers isolating the app from a degraded S3 or mail server.
+A breaker counts consecutive failed calls to its dependency; after
+`failure_threshold` of them it opens and calls fail fast with
+DependencyUnavailable instead of waiting for timeouts. After `reset_seconds`
+one call is let through as a probe (half-open): if it succeeds the breaker
+closes, otherwise it opens again. Thresholds are read from
+settings.CIRCUIT_BREAKERS on every use, and the state of each breaker is kept
+per process.
+"""
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class DependencyUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'A service the request depends on is unavailable. Please retry later.'
+    default_code = 'dependency_unavailable'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = wait
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker of one dependency."""
+
+    def __init__(self, name, clock=time.monotonic):
+        self.name = name
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Close the breaker and clear its counters."""
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probing = False
+            self.counters = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def failure_threshold(self):
+        return getattr(settings, 'CIRCUIT_BREAKERS', {}).get(self.name, {}).get('failure_threshold', 5)
+
+    @property
+    def reset_seconds(self):
+        return getattr(settings, 'CIRCUIT_BREAKERS', {}).get(self.name, {}).get('reset_seconds', 30)
+
+    def retry_after(self):
+        """Seconds until the breaker lets a probe through (0 when closed)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0
+            return max(0.0, self.opened_at + self.reset_seconds - self.clock())
+
+    def allow(self):
+        """
+        Whether a call may be made now. In half-open state only one probe is
+        allowed at a time; its outcome must be reported with record_success()
+        or record_failure().
+        """
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit breaker {self.name} half-open, probing")
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                self.counters['calls'] += 1
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit breaker {self.name} closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.counters['failures'] += 1
+            self.consecutive_failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED
+                                           and self.consecutive_failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self.counters['opened'] += 1
+                logger.warning(f"Circuit breaker {self.name} opened after {self.consecutive_failures} failures")
+
+    def call(self, func, *args, is_failure=None, **kwargs):
+        """
+        Call `func` through the breaker. Exceptions for which `is_failure`
+        returns False (e.g. a missing file) are raised without counting as
+        failures of the dependency.
+        """
+        if not self.allow():
+            raise DependencyUnavailable(wait=max(1, round(self.retry_after())))
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Interrupted without an outcome: let the next call probe instead
+            with self._lock:
+                self._probing = False
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_seconds': self.reset_seconds,
+                **self.counters,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Return the process-wide circuit breaker of a dependency."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_stats():
+    """{name: stats} of the configured breakers and any others used in this process."""
+    with _breakers_lock:
+        names = set(getattr(settings, 'CIRCUIT_BREAKERS', {})) | set(_breakers)
+    return {name: get_breaker(name).stats() for name in sorted(names)}
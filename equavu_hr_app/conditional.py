@@ -0,0 +1,68 @@
+"""
+Conditional GET for the admin API.
+Views compute a strong ETag from a cheap query (aggregates, version columns)
+before loading and serializing anything, so a client revalidating an
+unchanged resource gets a 304 for the price of that query.
+"""
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+import hashlib
+import re
+
+# Suffix CompressionMiddleware appends to the ETag of an encoded representation
+ENCODING_SUFFIX_RE = re.compile(r'-(gzip|br)"$')
+
+
+def make_etag(*parts, prefix=None):
+    """Strong ETag hashing `parts`, optionally starting with a readable prefix."""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{prefix}-{digest}"' if prefix is not None else f'"{digest}"'
+
+
+def encoded_etag(etag, encoding):
+    """ETag of `etag`'s representation compressed with `encoding`."""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(request, etag):
+    """Whether If-None-Match matches `etag` in any of its encodings (weak comparison)."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    for tag in parse_etags(header):
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if ENCODING_SUFFIX_RE.sub('"', tag) == etag:
+            return True
+    return False
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET with 304 Not Modified when If-None-Match matches `get_etag()`,
+    before the view loads or serializes anything. Views return None from
+    `get_etag()` to skip the check (e.g. when the object does not exist).
+    Responses are marked private and no-cache, so browsers keep them but
+    revalidate on every use.
+    """
+
+    def get_etag(self, request):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is not None and etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        else:
+            response = super().get(request, *args, **kwargs)
+            if etag is None or response.status_code != status.HTTP_200_OK:
+                return response
+            response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
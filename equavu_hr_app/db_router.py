@@ -0,0 +1,97 @@
+"""
+Database router sending safe reads to read replicas and everything else to the primary.
+Replica reads are only enabled by ReplicaRoutingMiddleware for GET/HEAD/OPTIONS
+requests of clients that are not pinned to the primary after a recent write,
+so they always see their own changes. Replicas lagging behind the primary
+(or failing their health check) are skipped.
+"""
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Whether reads of the current request may be served by a replica.
+replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def replica_lag(alias):
+    """
+    Return how many seconds the replica is behind the primary, or None if unknown.
+    Only MySQL reports replication lag; other backends are assumed to be in sync.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return 0
+    with connection.cursor() as cursor:
+        for query, column in (('SHOW REPLICA STATUS', 'Seconds_Behind_Source'),
+                              ('SHOW SLAVE STATUS', 'Seconds_Behind_Master')):
+            try:
+                cursor.execute(query)
+            except Exception:
+                continue
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            columns = [col[0] for col in cursor.description]
+            return row[columns.index(column)]
+    return None
+
+
+def is_replica_healthy(alias):
+    """Whether the replica is reachable and within REPLICA_MAX_LAG_SECONDS, cached per process."""
+    interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 10)
+    now = time.monotonic()
+    cached = _health.get(alias)
+    if cached is not None and now - cached[1] < interval:
+        return cached[0]
+
+    with _health_lock:
+        cached = _health.get(alias)
+        if cached is not None and now - cached[1] < interval:
+            return cached[0]
+        try:
+            lag = replica_lag(alias)
+            healthy = lag is not None and lag <= getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+        except Exception as e:
+            logger.warning(f"Replica {alias} health check failed: {str(e)}")
+            healthy = False
+        if not healthy:
+            logger.warning(f"Replica {alias} is unhealthy or lagging, reading from the primary")
+        _health[alias] = (healthy, now)
+        return healthy
+
+
+def in_primary_transaction():
+    """Reads inside a transaction on the primary must see its uncommitted writes."""
+    return transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block
+
+
+class PrimaryReplicaRouter:
+    """
+    Routes writes to the primary ('default') and, when allowed for the current
+    request, reads to a randomly chosen healthy replica from settings.DATABASE_REPLICAS.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_reads_allowed.get() or in_primary_transaction():
+            return DEFAULT_DB_ALIAS
+        replicas = [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if is_replica_healthy(alias)]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
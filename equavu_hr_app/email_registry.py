@@ -0,0 +1,101 @@
+"""
+Fast lookup of already registered candidate emails.
+Duplicate registrations are rejected before the resume upload is read, so the
+check has to be cheap. A process-local Bloom filter answers "definitely not
+registered" without a query; possible matches are confirmed against the unique
+email index. The filter is only an optimization: it may be stale across worker
+processes, so the unique constraint remains the source of truth.
+"""
+from django.conf import settings
+import hashlib
+import math
+import threading
+import time
+
+from .models import Candidate
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter over strings.
+    Membership answers are either "definitely absent" or "possibly present".
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: derive every probe position from one 128-bit digest.
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class EmailRegistry:
+    """
+    Answers whether an email is already registered, consulting the Bloom filter first.
+    The filter is (re)built from the database on first use and after it expires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built_at = 0.0
+
+    @staticmethod
+    def _normalize(email):
+        return email.strip().lower()
+
+    def _get_filter(self):
+        if not getattr(settings, 'EMAIL_BLOOM_FILTER_ENABLED', True):
+            return None
+        ttl = getattr(settings, 'EMAIL_BLOOM_FILTER_TTL', 300)
+        if self._filter is not None and time.monotonic() - self._built_at < ttl:
+            return self._filter
+        with self._lock:
+            if self._filter is None or time.monotonic() - self._built_at >= ttl:
+                self._filter = self._build()
+                self._built_at = time.monotonic()
+        return self._filter
+
+    def _build(self):
+        count = Candidate.objects.count()
+        bloom = BloomFilter(
+            capacity=max(count * 2, getattr(settings, 'EMAIL_BLOOM_FILTER_CAPACITY', 100000)),
+            error_rate=getattr(settings, 'EMAIL_BLOOM_FILTER_ERROR_RATE', 0.01)
+        )
+        for email in Candidate.objects.values_list('email', flat=True).iterator(chunk_size=5000):
+            bloom.add(self._normalize(email))
+        return bloom
+
+    def is_registered(self, email):
+        """Whether a candidate with this email exists."""
+        bloom = self._get_filter()
+        if bloom is not None and self._normalize(email) not in bloom:
+            return False
+        return Candidate.objects.filter(email=email).exists()
+
+    def add(self, email):
+        """Record a newly registered email in the filter, if it has been built."""
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(self._normalize(email))
+
+    def reset(self):
+        """Drop the filter so it is rebuilt on next use."""
+        with self._lock:
+            self._filter = None
+
+
+email_registry = EmailRegistry()
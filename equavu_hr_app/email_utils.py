@@ -1,15 +1,290 @@
-from django.core.mail import send_mail
+"""
+Candidate emails.
+Status update emails are not sent right away: each status change is merged
+into the candidate's PendingStatusNotification, which is sent once
+STATUS_NOTIFICATION_WINDOW_SECONDS have passed since the first change it holds.
+Several changes in quick succession thus become one message with the latest
+status and all their feedback. Due notifications are sent by a timer in the
+process that queued them and by the send_status_notifications command, which
+also picks up those of a process that stopped meanwhile.
+All sends go through the 'smtp' circuit breaker. Other candidate emails that
+cannot be sent because the mail server fails, or its breaker is open, are
+stored as QueuedEmail and retried with backoff by the same timer and command.
+Emails the server rejects permanently (5xx replies to the recipients or the
+message) are not retried and do not count as failures of the mail server.
+"""
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+import logging
+import smtplib
+import threading
+
+from .circuit_breaker import DependencyUnavailable, get_breaker
+from .models import ApplicationStatus, PendingStatusNotification, QueuedEmail
+from .tracing import SPAN_KIND_CLIENT, SPAN_KIND_INTERNAL, start_span, start_trace
+
+logger = logging.getLogger(__name__)
+
+# Longest delay between retries of a queued email
+MAX_RETRY_SECONDS = 3600
+
+
+def is_permanent_failure(exc):
+    """
+    Whether the mail server rejected the email itself with a 5xx reply, so
+    sending it again cannot succeed. Rejections of the sender or the login
+    affect every email and are failures of the server's setup instead.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPDataError) and exc.smtp_code >= 500
+
+
+def is_smtp_failure(exc):
+    """Whether an exception means the mail server is failing, rather than e.g. a rejected recipient."""
+    return (isinstance(exc, (smtplib.SMTPException, OSError))
+            and not isinstance(exc, smtplib.SMTPRecipientsRefused)
+            and not is_permanent_failure(exc))
 
 
 def send_candidate_email(subject, message, recipient_email):
     """
     Utility to send an email to a candidate.
+    If the mail server fails or its circuit breaker is open, the email is
+    queued for a retry instead. Returns whether it was sent now.
     """
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [recipient_email],
-        fail_silently=False,
+    try:
+        with start_span('email.send', kind=SPAN_KIND_CLIENT, attributes={'email.backend': settings.EMAIL_BACKEND}):
+            get_breaker('smtp').call(
+                send_mail,
+                subject,
+                message,
+                settings.DEFAULT_FROM_EMAIL,
+                [recipient_email],
+                fail_silently=False,
+                is_failure=is_smtp_failure
+            )
+        return True
+    except Exception as e:
+        if not isinstance(e, DependencyUnavailable) and not is_smtp_failure(e):
+            raise
+        logger.warning(f"Email '{subject}' queued for a retry: {str(e)}")
+        queue_email(subject, message, recipient_email)
+        return False
+
+
+def _retry_delay(attempts):
+    return min(getattr(settings, 'EMAIL_RETRY_SECONDS', 60) * 2 ** attempts, MAX_RETRY_SECONDS)
+
+
+def queue_email(subject, message, recipient_email):
+    """Store an email to be sent by the next retry, once the mail server may be back."""
+    delay = max(_retry_delay(0), get_breaker('smtp').retry_after())
+    QueuedEmail.objects.create(subject=subject, message=message, recipient=recipient_email,
+                               send_after=timezone.now() + timedelta(seconds=delay))
+    transaction.on_commit(lambda: _schedule_send(delay))
+
+
+def status_notification_message(notification):
+    """Return the (subject, message) of a pending status notification."""
+    candidate = notification.candidate
+    status_display = ApplicationStatus(notification.status).label
+    subject = f"Application Status Update: {status_display}"
+    if notification.change_count == 1:
+        feedback = notification.feedback[0] if notification.feedback else ''
+        message = (f"Dear {candidate.full_name},\n\n"
+                   f"Your application #{candidate.id} status has been updated to: {status_display}.\n\n"
+                   f"Feedback: {feedback}\n\nBest regards,\nHR Team")
+    else:
+        feedback = ''.join(f"- {entry}\n" for entry in notification.feedback) or "-\n"
+        message = (f"Dear {candidate.full_name},\n\n"
+                   f"Your application #{candidate.id} status has been updated {notification.change_count} times. "
+                   f"Its current status is: {status_display}.\n\n"
+                   f"Feedback:\n{feedback}\nBest regards,\nHR Team")
+    return subject, message
+
+
+def queue_status_notification(candidate, new_status, feedback=''):
+    """
+    Queue the status update email for a change made in the current transaction,
+    merging it into the candidate's pending notification if there is one.
+    """
+    window = getattr(settings, 'STATUS_NOTIFICATION_WINDOW_SECONDS', 300)
+    pending = PendingStatusNotification.objects.select_for_update().filter(candidate=candidate).first()
+    if pending is not None:
+        pending.status = new_status
+        pending.change_count += 1
+        if feedback:
+            pending.feedback.append(feedback)
+        pending.save(update_fields=['status', 'change_count', 'feedback'])
+        return
+
+    PendingStatusNotification.objects.create(
+        candidate=candidate,
+        status=new_status,
+        feedback=[feedback] if feedback else [],
+        send_after=timezone.now() + timedelta(seconds=window)
     )
+    if window > 0:
+        transaction.on_commit(lambda: _schedule_send(window))
+    else:
+        transaction.on_commit(send_due_status_notifications)
+
+
+def _schedule_send(delay):
+    def send():
+        try:
+            with start_trace('send_status_notifications', kind=SPAN_KIND_INTERNAL):
+                send_due_status_notifications()
+                send_queued_emails()
+        except Exception as e:
+            logger.error(f"Error sending status notifications: {str(e)}")
+        finally:
+            connection.close()
+
+    timer = threading.Timer(delay, send)
+    timer.daemon = True
+    timer.start()
+
+
+def _claim_due(queryset, batch_size, now):
+    """
+    Claim up to batch_size due rows of the queryset for this sender: their
+    send_after is moved past EMAIL_SEND_LEASE_SECONDS and committed at once,
+    so the emails are sent without holding row locks and concurrent senders
+    skip them. Rows of a sender that died are sent again once the lease ends.
+    """
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_SEND_LEASE_SECONDS', 900))
+    with transaction.atomic():
+        # Rows locked by a concurrent sender are skipped rather than sent twice
+        due = list(queryset
+                   .select_for_update(skip_locked=True, of=('self',))
+                   .filter(send_after__lte=now)
+                   .order_by('send_after')[:batch_size])
+        queryset.model.objects.filter(pk__in=[row.pk for row in due]).update(send_after=now + lease)
+    return due
+
+
+def send_due_status_notifications(batch_size=50):
+    """
+    Send the pending status notifications whose window has passed, over one
+    SMTP connection per batch. A notification that fails is retried after
+    another window. Changes merged into a notification while it was being
+    sent stay pending for the next window. Returns the number of emails sent.
+    """
+    window = timedelta(seconds=getattr(settings, 'STATUS_NOTIFICATION_WINDOW_SECONDS', 300))
+    retry = max(window, timedelta(seconds=60))
+    sent = 0
+    while True:
+        now = timezone.now()
+        due = _claim_due(PendingStatusNotification.objects.select_related('candidate'), batch_size, now)
+        if not due:
+            return sent
+
+        delivered, failed, rejected = _send_batch([
+            (notification.pk, EmailMessage(*status_notification_message(notification),
+                                           settings.DEFAULT_FROM_EMAIL, [notification.candidate.email]))
+            for notification in due
+        ])
+        # A rejected notification is dropped like a sent one; the candidate's next change queues a new one
+        done = set(delivered) | set(rejected)
+        with transaction.atomic():
+            current = PendingStatusNotification.objects.select_for_update().in_bulk(
+                [notification.pk for notification in due if notification.pk in done])
+            for notification in due:
+                pending = current.get(notification.pk)
+                if pending is None:
+                    continue
+                if pending.change_count == notification.change_count:
+                    pending.delete()
+                    continue
+                # Keep only the changes queued after the email was built
+                pending.change_count -= notification.change_count
+                pending.feedback = pending.feedback[len(notification.feedback):]
+                pending.send_after = timezone.now() + window
+                pending.save(update_fields=['change_count', 'feedback', 'send_after'])
+                transaction.on_commit(lambda: _schedule_send(window.total_seconds()))
+            PendingStatusNotification.objects.filter(pk__in=list(failed)).update(send_after=now + retry)
+        sent += len(delivered)
+        if failed:
+            return sent
+
+
+def send_queued_emails(batch_size=50):
+    """
+    Send the queued emails that are due, over one SMTP connection per batch.
+    An email that fails again is retried after EMAIL_RETRY_SECONDS, doubled
+    per attempt up to an hour. Emails rejected permanently or failing for the
+    EMAIL_MAX_ATTEMPTS time become dead letters. Returns the number of emails sent.
+    """
+    max_attempts = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 10)
+    sent = 0
+    while True:
+        now = timezone.now()
+        due = _claim_due(QueuedEmail.objects.filter(failed_at__isnull=True), batch_size, now)
+        if not due:
+            return sent
+
+        delivered, failed, rejected = _send_batch([
+            (queued.pk, EmailMessage(queued.subject, queued.message, settings.DEFAULT_FROM_EMAIL,
+                                     [queued.recipient]))
+            for queued in due
+        ])
+        QueuedEmail.objects.filter(pk__in=delivered).delete()
+        for queued in due:
+            if queued.pk not in failed and queued.pk not in rejected:
+                continue
+            queued.attempts += 1
+            queued.last_error = rejected.get(queued.pk) or failed[queued.pk]
+            if queued.pk in rejected or queued.attempts >= max_attempts:
+                queued.failed_at = now
+                logger.error(f"Gave up on email '{queued.subject}' to {queued.recipient} after "
+                             f"{queued.attempts} attempts: {queued.last_error}")
+            else:
+                queued.send_after = now + timedelta(seconds=_retry_delay(queued.attempts))
+            queued.save(update_fields=['attempts', 'last_error', 'failed_at', 'send_after'])
+        sent += len(delivered)
+        if failed:
+            return sent
+
+
+def _send_batch(emails):
+    """
+    Send [(key, EmailMessage)] over one SMTP connection through the circuit
+    breaker; returns (delivered keys, {failed key: error}, {rejected key: error}).
+    Failed emails may be sent later; rejected ones were refused permanently.
+    Once the breaker opens, the rest of the batch fails without being attempted.
+    """
+    breaker = get_breaker('smtp')
+    keys = [key for key, _ in emails]
+    delivered, failed, rejected = [], {}, {}
+    with start_span('email.send_batch', kind=SPAN_KIND_CLIENT, attributes={
+        'email.backend': settings.EMAIL_BACKEND, 'email.count': len(emails)
+    }):
+        smtp = get_connection()
+        try:
+            breaker.call(smtp.open, is_failure=is_smtp_failure)
+        except Exception as e:
+            logger.error(f"Error connecting to the mail server: {str(e)}")
+            return [], dict.fromkeys(keys, str(e)), {}
+        try:
+            for index, (key, email) in enumerate(emails):
+                email.connection = smtp
+                try:
+                    breaker.call(email.send, is_failure=is_smtp_failure)
+                    delivered.append(key)
+                except DependencyUnavailable as e:
+                    failed.update(dict.fromkeys(keys[index:], str(e)))
+                    break
+                except Exception as e:
+                    logger.error(f"Error sending email '{email.subject}': {str(e)}")
+                    if is_permanent_failure(e):
+                        rejected[key] = str(e)
+                    else:
+                        failed[key] = str(e)
+        finally:
+            smtp.close()
+    return delivered, failed, rejected
@@ -0,0 +1,147 @@
+"""
+Publish/subscribe of candidate status changes for the Server-Sent Events endpoint.
+Status updates publish an event per candidate; every open event stream of that
+candidate receives it. The in-process broker only reaches streams served by the
+same process (enough for tests and single-process deployments). With
+STATUS_EVENTS_REDIS_URL set, events are published through Redis and one listener
+per process fans them out to its local streams.
+"""
+from collections import defaultdict
+from django.conf import settings
+import asyncio
+import json
+import logging
+import redis
+import redis.asyncio
+import threading
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'candidate-status:'
+
+
+class Subscription:
+    """A bounded queue of events for one event stream, fed from any thread."""
+
+    def __init__(self, candidate_id, loop, maxsize=100):
+        self.candidate_id = str(candidate_id)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self._put_nowait, event)
+
+    def _put_nowait(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client misses the event; it resyncs from Last-Event-ID when it reconnects.
+            logger.warning(f"Dropped status event for a slow subscriber of candidate {self.candidate_id}")
+
+    async def get(self, timeout):
+        """Wait for the next event; raises asyncio.TimeoutError after `timeout` seconds."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InProcessBroker:
+    """Delivers published events to the subscribers in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, candidate_id):
+        """Subscribe the running event loop to a candidate's events."""
+        subscription = Subscription(candidate_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[subscription.candidate_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.candidate_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.candidate_id]
+
+    def subscriber_count(self, candidate_id):
+        with self._lock:
+            return len(self._subscribers.get(str(candidate_id), ()))
+
+    def publish(self, candidate_id, event):
+        """Publish an event to every stream of the candidate. Safe to call from sync code."""
+        self._deliver(str(candidate_id), event)
+
+    def _deliver(self, candidate_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(candidate_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes events through Redis so streams in every process receive them."""
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._listeners = {}
+
+    def publish(self, candidate_id, event):
+        self._client.publish(f"{CHANNEL_PREFIX}{candidate_id}", json.dumps(event))
+
+    def subscribe(self, candidate_id):
+        subscription = super().subscribe(candidate_id)
+        loop = subscription.loop
+        listener = self._listeners.get(loop)
+        if listener is None or listener.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        return subscription
+
+    async def _listen(self):
+        """Forward every candidate's events from Redis to this process's subscribers."""
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    candidate_id = message['channel'].decode()[len(CHANNEL_PREFIX):]
+                    self._deliver(candidate_id, json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Status event listener lost its Redis connection: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide status event broker configured in settings."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, 'STATUS_EVENTS_REDIS_URL', None)
+                _broker = RedisBroker(url) if url else InProcessBroker()
+    return _broker
+
+
+def format_sse(data, event=None, event_id=None):
+    """Format one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,166 @@
+"""
+Idempotency-Key support for unsafe endpoints, so clients on flaky networks can
+retry a registration or status update without repeating its effects.
+The first request with a key claims it by inserting an IdempotencyKey row
+together with a fingerprint of the request; the response is stored on that row
+and replayed to every retry within IDEMPOTENCY_KEY_TTL_SECONDS, without running
+the view again. A retry arriving while the first request is still in progress
+waits for its response (up to IDEMPOTENCY_WAIT_SECONDS). Reusing a key for a
+different request is rejected with 422.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+import hashlib
+import json
+import time
+
+from .models import IdempotencyKey
+from .storage import content_hash
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.05
+# Response headers replayed along with the stored body
+REPLAYED_HEADERS = ('ETag', 'Location')
+
+
+class InvalidIdempotencyKey(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = f'The Idempotency-Key header must be 1 to {MAX_KEY_LENGTH} printable ASCII characters.'
+    default_code = 'invalid_idempotency_key'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotentRequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed. Please retry later.'
+    default_code = 'idempotent_request_in_progress'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = wait
+
+
+def request_fingerprint(request, headers=()):
+    """SHA-256 of the method, path, the given headers and the parsed body, uploaded files included."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([request.method, request.path, [request.headers.get(h) for h in headers]]).encode())
+    data = request.data
+    if hasattr(data, 'lists'):
+        for name, values in sorted(data.lists(), key=lambda item: item[0]):
+            for value in values:
+                if hasattr(value, 'chunks'):
+                    # Upload handlers may already have hashed the file while receiving it.
+                    value = [value.name, getattr(value, 'sha256', None) or content_hash(value)]
+                digest.update(json.dumps([name, value], default=str).encode())
+    else:
+        digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _claim(scope, key, fingerprint):
+    """
+    Return (record, claimed): the row created for this request, or the existing
+    one of an earlier request with the key. Expired rows and claims abandoned for
+    longer than IDEMPOTENCY_LOCK_SECONDS (e.g. by a process that died) are replaced.
+    """
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+                )
+            return record, True
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is None:
+            continue
+        stale_before = now - timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 120))
+        if record.expires_at <= now or (record.status_code is None and record.created_at < stale_before):
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            continue
+        return record, False
+
+
+def _release(record):
+    IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code, headers=record.response_headers)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+class IdempotencyKeyMixin:
+    """
+    View mixin answering retries of a request with the same Idempotency-Key
+    header from its stored response. Handlers opt in by running through
+    `idempotent()`; requests without the header are handled as before.
+    Exceptions (including validation errors the view raises) and responses
+    with a 5xx status release the key so the request can be retried; any
+    other response is stored.
+    """
+    idempotency_scope = None
+    # Request headers that change the meaning of the request, e.g. If-Match
+    idempotency_fingerprint_headers = ()
+
+    def idempotent(self, request, handler, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH or not key.isascii() or not key.isprintable():
+            raise InvalidIdempotencyKey()
+
+        fingerprint = request_fingerprint(request, self.idempotency_fingerprint_headers)
+        wait = getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 10)
+        deadline = time.monotonic() + wait
+        while True:
+            record, claimed = _claim(self.idempotency_scope, key, fingerprint)
+            if claimed:
+                return self._run(record, request, handler, *args, **kwargs)
+            if record.fingerprint != fingerprint:
+                raise IdempotencyKeyReused()
+            # Wait for the request holding the key; if it fails and releases the key, claim it again.
+            while record is not None and record.status_code is None:
+                if time.monotonic() >= deadline:
+                    raise IdempotentRequestInProgress(wait=max(1, round(wait)))
+                time.sleep(POLL_INTERVAL_SECONDS)
+                record = IdempotencyKey.objects.filter(pk=record.pk).first()
+            if record is not None:
+                return _replay(record)
+
+    def _run(self, record, request, handler, *args, **kwargs):
+        try:
+            response = handler(request, *args, **kwargs)
+        except BaseException:
+            _release(record)
+            raise
+        if response.status_code >= 500:
+            _release(record)
+            return response
+        record.status_code = response.status_code
+        record.response_body = response.data
+        record.response_headers = {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)}
+        record.save(update_fields=['status_code', 'response_body', 'response_headers'])
+        return response
+
+
+def prune_idempotency_keys():
+    """Delete expired idempotency keys; returns how many were deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
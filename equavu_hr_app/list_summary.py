@@ -0,0 +1,67 @@
+"""
+Cached summaries (row count and latest update) of filtered candidate lists.
+The admin list needs both for every page: the count for pagination and the
+latest update for its ETag. They are cached per filter under a generation
+number that every candidate write bumps, so with a shared cache (Redis) a
+summary is never stale. The per-process fallback cache would miss the writes
+of other processes, so without Redis every summary is queried: one aggregate
+over the filter's index, still cheaper than loading and serializing a page.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+import hashlib
+import time
+
+GENERATION_KEY = 'candidate_list_generation'
+
+
+def list_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock, so an evicted generation never reuses old summaries
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def candidates_changed():
+    """Invalidate all cached list summaries; call after candidates are created, changed or deleted."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def summaries_shared():
+    """Whether summaries are cached in Redis, shared by all workers and invalidated by each write at once."""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], RedisCache)
+
+
+def candidate_list_summary(queryset):
+    """Return {'count', 'last_updated'} of the candidates in `queryset`."""
+    if not summaries_shared():
+        return queryset.aggregate(last_updated=Max('updated_at'), count=Count('id'))
+    query_key = hashlib.sha1(str(queryset.order_by().query).encode()).hexdigest()
+    key = f'candidate_list_summary:{list_generation()}:{query_key}'
+    summary = cache.get(key)
+    if summary is None:
+        summary = queryset.aggregate(last_updated=Max('updated_at'), count=Count('id'))
+        cache.set(key, summary, getattr(settings, 'CANDIDATE_LIST_SUMMARY_CACHE_SECONDS', 60))
+    return summary
+
+
+class CandidateListPaginator(Paginator):
+    """Paginator taking the row count from the cached list summary."""
+
+    @cached_property
+    def count(self):
+        return candidate_list_summary(self.object_list)['count']
+
+
+class CandidateListPagination(PageNumberPagination):
+    django_paginator_class = CandidateListPaginator
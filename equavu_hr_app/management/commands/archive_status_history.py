@@ -0,0 +1,79 @@
+"""
+Management command to move old status history of closed candidates into the
+compressed StatusChangeArchive table.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from equavu_hr_app.models import Candidate, StatusChange, StatusChangeArchive, ApplicationStatus
+from equavu_hr_app.serializers import StatusChangeSerializer
+
+CLOSED_STATUSES = [ApplicationStatus.REJECTED, ApplicationStatus.ACCEPTED]
+
+
+class Command(BaseCommand):
+    help = ("Archive status changes of rejected and accepted candidates that are older than "
+            "STATUS_HISTORY_ARCHIVE_AFTER_DAYS into compressed archive rows.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=getattr(settings, 'STATUS_HISTORY_ARCHIVE_AFTER_DAYS', 365),
+                            help="Archive status changes created more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help="Number of candidates archived per transaction.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only count the status changes that would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        old_changes = StatusChange.objects.filter(
+            candidate__current_status__in=CLOSED_STATUSES,
+            created_at__lt=cutoff
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"[dry-run] {old_changes.count()} status changes would be archived.")
+            return
+
+        archived = candidates = 0
+        last_id = None
+        # Keyset pagination over candidates keeps every transaction short.
+        while True:
+            batch = old_changes.order_by('candidate_id').values_list('candidate_id', flat=True).distinct()
+            if last_id is not None:
+                batch = batch.filter(candidate_id__gt=last_id)
+            candidate_ids = list(batch[:options['batch_size']])
+            if not candidate_ids:
+                break
+            last_id = candidate_ids[-1]
+
+            with transaction.atomic():
+                for candidate_id in candidate_ids:
+                    archived += self._archive_candidate(candidate_id, cutoff)
+            candidates += len(candidate_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} status changes of {candidates} closed candidates."
+        ))
+
+    def _archive_candidate(self, candidate_id, cutoff):
+        changes = list(StatusChange.objects.select_for_update().filter(
+            candidate_id=candidate_id,
+            created_at__lt=cutoff
+        ).order_by('-created_at'))
+        if not changes:
+            return 0
+
+        StatusChangeArchive.objects.create(
+            candidate=Candidate(id=candidate_id),
+            change_count=len(changes),
+            first_created_at=changes[-1].created_at,
+            last_created_at=changes[0].created_at,
+            payload=StatusChangeArchive.compress(StatusChangeSerializer(changes, many=True).data)
+        )
+        StatusChange.objects.filter(id__in=[change.id for change in changes]).delete()
+        return len(changes)
@@ -0,0 +1,115 @@
+"""
+Management command to benchmark the hiring funnel engine on synthetic data.
+Seeds candidates with a status history of the requested size, times a full
+rebuild and an incremental update of newly added changes, and rolls all of
+it back (unless --keep).
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+import random
+import time
+import uuid
+
+from equavu_hr_app.analytics import rebuild_funnel, update_funnel
+from equavu_hr_app.models import ApplicationStatus, Candidate, Department, StatusChange
+
+PIPELINE = [ApplicationStatus.SUBMITTED, ApplicationStatus.UNDER_REVIEW, ApplicationStatus.INTERVIEW_SCHEDULED]
+OUTCOMES = [ApplicationStatus.ACCEPTED, ApplicationStatus.REJECTED]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark full rebuild and incremental update of the hiring funnel on synthetic status history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help="Number of StatusChange rows to seed.")
+        parser.add_argument('--new-rows', type=int, default=10_000,
+                            help="Status changes added after the rebuild, for the incremental update.")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per bulk insert.")
+        parser.add_argument('--keep', action='store_true',
+                            help="Keep the seeded data instead of rolling it back.")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(0)
+        try:
+            with transaction.atomic():
+                self.run(options)
+                if not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            self.stdout.write("Seeded data rolled back.")
+
+    def run(self, options):
+        now = timezone.now()
+        start = time.monotonic()
+        candidates = self.seed(options['rows'], now - timedelta(days=365), now - timedelta(days=1),
+                               options['batch_size'])
+        self.report("seed", options['rows'], start)
+
+        start = time.monotonic()
+        processed = rebuild_funnel()
+        self.report("full rebuild", processed, start)
+
+        # New changes for existing candidates, old enough to be settled
+        changes = [
+            StatusChange(candidate_id=self.random.choice(candidates), new_status=self.random.choice(OUTCOMES),
+                         created_at=now - timedelta(minutes=10))
+            for _ in range(options['new_rows'])
+        ]
+        StatusChange.objects.bulk_create(changes, batch_size=options['batch_size'])
+        start = time.monotonic()
+        processed = update_funnel()
+        self.report("incremental update", processed, start)
+
+        start = time.monotonic()
+        processed = update_funnel()
+        self.report("incremental update (no new changes)", processed, start)
+
+    def seed(self, rows, first, last, batch_size):
+        """Insert candidates with histories totalling `rows` status changes; returns their IDs."""
+        span = (last - first).total_seconds()
+        candidate_ids, candidates, changes, seeded = [], [], [], 0
+        while seeded < rows:
+            candidate_id = uuid.uuid4()
+            statuses = PIPELINE[:self.random.randint(1, len(PIPELINE))]
+            if len(statuses) == len(PIPELINE) and self.random.random() < 0.5:
+                statuses = statuses + [self.random.choice(OUTCOMES)]
+            statuses = statuses[:rows - seeded]
+            created_at = first + timedelta(seconds=self.random.uniform(0, span * 0.8))
+            candidates.append(Candidate(
+                id=candidate_id,
+                full_name=f"Benchmark {seeded}",
+                email=f"benchmark-{candidate_id}@example.invalid",
+                date_of_birth=date(1990, 1, 1),
+                years_of_experience=self.random.randint(0, 20),
+                department=self.random.choice(Department.values),
+                resume='resumes/benchmark.pdf',
+                current_status=statuses[-1],
+            ))
+            for status in statuses:
+                changes.append(StatusChange(candidate_id=candidate_id, new_status=status, created_at=created_at))
+                created_at += timedelta(seconds=self.random.uniform(3600, 14 * 86400))
+            candidate_ids.append(candidate_id)
+            seeded += len(statuses)
+            if len(changes) >= batch_size:
+                self.flush(candidates, changes, batch_size)
+                candidates, changes = [], []
+        self.flush(candidates, changes, batch_size)
+        return candidate_ids
+
+    @staticmethod
+    def flush(candidates, changes, batch_size):
+        Candidate.objects.bulk_create(candidates, batch_size=batch_size)
+        StatusChange.objects.bulk_create(changes, batch_size=batch_size)
+
+    def report(self, step, rows, start):
+        elapsed = time.monotonic() - start
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"{step:<38} {rows:>9} rows {elapsed:>8.2f}s {rate:>10.0f} rows/s")
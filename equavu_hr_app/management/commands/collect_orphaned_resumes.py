@@ -0,0 +1,89 @@
+"""
+Management command to find resume files that no candidate references and
+delete or quarantine them.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from equavu_hr_app.models import Candidate, ResumeBlob
+from equavu_hr_app.storage import content_address_digest, is_content_addressed
+
+
+class Command(BaseCommand):
+    help = ("Delete or quarantine resume files left behind by failed registrations and deleted candidates. "
+            "The storage listing is streamed and checked against the database in batches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='resumes/',
+                            help="Storage prefix to scan.")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Number of listed files checked against the database per query.")
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help="Ignore files modified more recently, e.g. uploads of in-flight registrations.")
+        parser.add_argument('--quarantine', metavar='PREFIX',
+                            help="Move orphans under this prefix instead of deleting them.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report orphaned files.")
+
+    def handle(self, *args, **options):
+        self.storage = Candidate._meta.get_field('resume').storage
+        self.options = options
+        self.scanned = self.recent = self.orphans = self.orphan_bytes = 0
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+
+        batch = []
+        for name, size, modified_time in self.storage.iter_files(options['prefix']):
+            self.scanned += 1
+            if modified_time > cutoff:
+                self.recent += 1
+                continue
+            batch.append((name, size))
+            if len(batch) >= options['batch_size']:
+                self._process_batch(batch)
+                batch = []
+        if batch:
+            self._process_batch(batch)
+
+        action = "Found" if options['dry_run'] else ("Quarantined" if options['quarantine'] else "Deleted")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {self.scanned} files ({self.recent} too recent). "
+            f"{action} {self.orphans} orphaned resumes ({self.orphan_bytes} bytes)."
+        ))
+
+    def _process_batch(self, batch):
+        names = [name for name, _ in batch]
+        # One query per batch for the candidates, one for blobs still holding references.
+        referenced = set(Candidate.objects.filter(resume__in=names).values_list('resume', flat=True))
+        referenced.update(ResumeBlob.objects.filter(name__in=names, ref_count__gt=0).values_list('name', flat=True))
+
+        for name, size in batch:
+            if name in referenced:
+                continue
+            self.orphans += 1
+            self.orphan_bytes += size
+            if self.options['dry_run']:
+                self.stdout.write(f"Orphaned: {name}")
+                continue
+
+            if not is_content_addressed(name):
+                self._remove(name)
+                continue
+            # Content-addressed files are removed under the blob's lock, after checking that
+            # no upload of the same content has referenced it again since the query above.
+            digest = content_address_digest(name)
+            with transaction.atomic():
+                if not ResumeBlob.unused_names({digest: name}):
+                    self.orphans -= 1
+                    self.orphan_bytes -= size
+                    continue
+                self._remove(name)
+                ResumeBlob.objects.filter(sha256=digest, ref_count=0).delete()
+
+    def _remove(self, name):
+        if self.options['quarantine']:
+            self.storage.move(name, f"{self.options['quarantine'].rstrip('/')}/{name}")
+        else:
+            self.storage.delete(name)
@@ -0,0 +1,65 @@
+"""
+Management command to move resumes stored before content addressing onto
+content-addressed blobs, removing duplicate copies along the way.
+"""
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from equavu_hr_app.models import Candidate, ResumeBlob
+from equavu_hr_app.storage import content_hash, content_addressed_name
+
+
+class Command(BaseCommand):
+    help = "Rehash legacy resume files and deduplicate them into content-addressed blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of candidates fetched from the database per batch.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would change without touching storage or the database.")
+
+    def handle(self, *args, **options):
+        storage = Candidate._meta.get_field('resume').storage
+        dry_run = options['dry_run']
+        migrated = deduplicated = missing = 0
+
+        candidates = (Candidate.objects
+                      .filter(resume_sha256='')
+                      .exclude(resume='')
+                      .only('id', 'resume')
+                      .iterator(chunk_size=options['batch_size']))
+
+        for candidate in candidates:
+            old_name = candidate.resume.name
+            if not storage.exists(old_name):
+                missing += 1
+                self.stderr.write(f"Missing resume file for candidate {candidate.id}: {old_name}")
+                continue
+
+            with storage.open(old_name, 'rb') as fh:
+                digest = content_hash(fh)
+                blob = ResumeBlob.objects.filter(sha256=digest).first()
+                if blob is not None:
+                    deduplicated += 1
+                if dry_run:
+                    migrated += 1
+                    continue
+                if blob is None:
+                    ext = old_name.split('.')[-1]
+                    new_name = storage.save(content_addressed_name(digest, ext), File(fh, name=old_name))
+                    size = storage.size(new_name)
+                else:
+                    new_name, size = blob.name, blob.size
+
+            with transaction.atomic():
+                Candidate.objects.filter(id=candidate.id).update(resume=new_name, resume_sha256=digest)
+                ResumeBlob.acquire(digest, new_name, size)
+            if new_name != old_name and not Candidate.objects.filter(resume=old_name).exists():
+                storage.delete(old_name)
+            migrated += 1
+
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Rehashed {migrated} resumes ({deduplicated} duplicates of existing blobs, {missing} missing)."
+        ))
@@ -0,0 +1,53 @@
+"""
+Management command to bulk import candidates from a CSV/NDJSON file and a ZIP archive of resumes.
+"""
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from equavu_hr_app.bulk_import import CandidateImporter
+from equavu_hr_app.models import CandidateImportJob
+
+
+class Command(BaseCommand):
+    help = ("Import candidates from a CSV or NDJSON file (columns: full_name, email, date_of_birth, "
+            "years_of_experience, department, resume) and a ZIP archive containing the resume files.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('rows', help="CSV or NDJSON file with one candidate per row.")
+        parser.add_argument('resumes', help="ZIP archive with the resume files named in the rows.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help="Rows format; guessed from the file extension by default.")
+        parser.add_argument('--batch-size', type=int, help="Rows inserted per transaction.")
+        parser.add_argument('--workers', type=int, help="Parallel resume uploads.")
+        parser.add_argument('--resume-job', metavar='JOB_ID',
+                            help="ID of an interrupted import to continue after its last checkpoint.")
+        parser.add_argument('--report', metavar='PATH',
+                            help="Write the per-row error report to this CSV file.")
+
+    def handle(self, *args, **options):
+        job = None
+        if options['resume_job']:
+            try:
+                job = CandidateImportJob.objects.get(id=options['resume_job'])
+            except (CandidateImportJob.DoesNotExist, ValueError):
+                raise CommandError(f"Import job {options['resume_job']} does not exist.")
+
+        with open(options['rows'], 'rb') as rows, open(options['resumes'], 'rb') as resumes:
+            importer = CandidateImporter(rows, resumes, fmt=options['format'], job=job,
+                                         batch_size=options['batch_size'], workers=options['workers'])
+            self.stdout.write(f"Import job {importer.job.id}")
+            job = importer.run()
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as report:
+                writer = csv.writer(report)
+                writer.writerow(['row', 'email', 'errors'])
+                for error in job.errors:
+                    writer.writerow([error['row'], error['email'], json.dumps(error['errors'])])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {job.imported_count} candidates, rejected {job.error_count} rows "
+            f"({job.rows_processed} rows processed)."
+        ))
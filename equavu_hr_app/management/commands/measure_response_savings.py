@@ -0,0 +1,68 @@
+"""
+Management command to measure what conditional GETs and compression save on
+the admin list and detail endpoints, against the data in the database.
+For each endpoint it reports the body size and CPU time of a full response,
+of the same response compressed with gzip and Brotli, and of a revalidation
+answered with 304 Not Modified.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+import time
+
+from equavu_hr_app.middleware import CompressionMiddleware
+from equavu_hr_app.models import Candidate
+from equavu_hr_app.views import CandidateDetailView, CandidateListView
+
+
+class Command(BaseCommand):
+    help = "Measure bytes and CPU time saved by 304 revalidation and gzip/Brotli on admin responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50,
+                            help="Requests per measurement; the mean is reported.")
+
+    def handle(self, *args, **options):
+        candidate = Candidate.objects.order_by('-updated_at').first()
+        if candidate is None:
+            raise CommandError("No candidates to measure against.")
+
+        endpoints = [
+            ('list', '/api/admin/candidates/', CandidateListView.as_view(), {}),
+            ('detail', f'/api/admin/candidates/{candidate.id}/', CandidateDetailView.as_view(), {'pk': candidate.id}),
+        ]
+
+        self.stdout.write(f"{'endpoint':<8} {'variant':<14} {'bytes':>9} {'cpu ms':>9}")
+        for name, path, view, kwargs in endpoints:
+            for variant, size, cpu in self.measure(path, view, kwargs, options['iterations']):
+                self.stdout.write(f"{name:<8} {variant:<14} {size:>9} {cpu * 1000:>9.2f}")
+
+    def measure(self, path, view, kwargs, iterations):
+        # Pagination links need a host that passes ALLOWED_HOSTS
+        host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+        factory = RequestFactory(SERVER_NAME=host)
+
+        def run(accept_encoding='', if_none_match=None):
+            headers = {'X-ADMIN': '1', 'Accept-Encoding': accept_encoding}
+            if if_none_match:
+                headers['If-None-Match'] = if_none_match
+            middleware = CompressionMiddleware(lambda request: view(request, **kwargs).render())
+            middleware(factory.get(path, headers=headers))  # Warm up
+            total_cpu = 0.0
+            for _ in range(iterations):
+                request = factory.get(path, headers=headers)
+                start = time.process_time()
+                response = middleware(request)
+                total_cpu += time.process_time() - start
+            return response, total_cpu / iterations
+
+        full, full_cpu = run()
+        results = [('full', len(full.content), full_cpu)]
+        for encoding in ('gzip', 'br'):
+            response, cpu = run(accept_encoding=encoding)
+            results.append((encoding, len(response.content), cpu))
+        revalidated, cpu = run(if_none_match=full['ETag'])
+        if revalidated.status_code != 304:
+            raise CommandError(f"Expected 304 when revalidating {path}, got {revalidated.status_code}.")
+        results.append(('304', len(revalidated.content), cpu))
+        return results
@@ -0,0 +1,15 @@
+"""
+Management command to delete expired idempotency keys. Expired keys are no
+longer replayed, so they only take up space.
+"""
+from django.core.management.base import BaseCommand
+
+from equavu_hr_app.idempotency import prune_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys older than IDEMPOTENCY_KEY_TTL_SECONDS."
+
+    def handle(self, *args, **options):
+        deleted = prune_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idempotency key(s)."))
@@ -0,0 +1,16 @@
+"""
+Management command to delete candidate tombstones that delta sync clients no
+longer need. Sync tokens older than the retention period get a 410 and start
+a full sync, so older tombstones are never read.
+"""
+from django.core.management.base import BaseCommand
+
+from equavu_hr_app.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete candidate tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstone(s)."))
@@ -0,0 +1,139 @@
+"""
+Management command to delete candidates whose retention period has passed,
+together with their status history and resumes.
+Candidates are deleted in short transactions of keyset-ordered batches, with
+a pause between batches, instead of one cascading delete that would lock the
+tables for its whole duration. Every committed batch is final, so an
+interrupted purge continues where it stopped when run again. The effects of
+the delete signals (blob releases, tombstones, list summary) and the emails
+still queued for the candidates are applied once per batch. Resume files are
+deleted in bulk after each batch commits; files left behind by a purge that
+died in between are removed by collect_orphaned_resumes.
+"""
+from datetime import timedelta
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from equavu_hr_app.models import (
+    Candidate,
+    FunnelCandidateState,
+    PendingStatusNotification,
+    QueuedEmail,
+    ResumeBlob,
+    StatusChange,
+    StatusChangeArchive
+)
+from equavu_hr_app.signals import candidates_deleted, deleting_in_bulk
+
+
+class Command(BaseCommand):
+    help = ("Delete candidates without activity for CANDIDATE_RETENTION_DAYS, with their status history "
+            "and resumes, in small batches.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=getattr(settings, 'CANDIDATE_RETENTION_DAYS', 730),
+                            help="Delete candidates last updated more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of candidates deleted per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.5,
+                            help="Seconds to pause between batches, to let replicas and other writers catch up.")
+        parser.add_argument('--max-seconds', type=float,
+                            help="Stop after the batch that exceeds this run time; run again to continue.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only count the candidates that would be deleted.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        expired = Candidate.objects.filter(updated_at__lt=cutoff)
+        total = expired.count()
+        if options['dry_run']:
+            self.stdout.write(f"[dry-run] {total} candidates would be deleted.")
+            return
+
+        self.storage = Candidate._meta.get_field('resume').storage
+        started = time.monotonic()
+        purged = files = batches = 0
+        last = None
+        # Keyset pagination on the (updated_at, id) index keeps every batch query cheap.
+        while True:
+            batch = expired.order_by('updated_at', 'id')
+            if last is not None:
+                batch = batch.filter(Q(updated_at__gt=last[0]) | Q(updated_at=last[0], id__gt=last[1]))
+            keys = list(batch.values_list('updated_at', 'id')[:options['batch_size']])
+            if not keys:
+                break
+            last = keys[-1]
+
+            deleted, names, blobs = self._purge_batch([candidate_id for _, candidate_id in keys], cutoff)
+            names, failed = self._delete_resumes(names, blobs)
+            purged += deleted
+            files += len(names) - len(failed)
+            batches += 1
+            self.stdout.write(f"Batch {batches}: deleted {deleted} candidates and {len(names) - len(failed)} "
+                              f"resume files ({purged}/{total}).")
+            if failed:
+                raise CommandError(f"Stopped: {len(failed)} resume files could not be deleted. "
+                                   f"Remove them with collect_orphaned_resumes and run the purge again.")
+            if options['max_seconds'] is not None and time.monotonic() - started >= options['max_seconds']:
+                self.stdout.write(f"Stopped after {options['max_seconds']} seconds; run again to continue.")
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {purged} candidates and {files} resume files in {batches} batches."
+        ))
+
+    def _purge_batch(self, candidate_ids, cutoff):
+        """
+        Delete a batch of candidates and their dependent rows in one transaction;
+        returns (candidates deleted, resume files to delete, released blobs as {sha256: name}).
+        """
+        with transaction.atomic():
+            # Candidates updated since they were selected are no longer expired.
+            candidates = list(Candidate.objects.select_for_update()
+                              .filter(id__in=candidate_ids, updated_at__lt=cutoff)
+                              .only('id', 'email', 'resume', 'resume_sha256'))
+            if not candidates:
+                return 0, [], {}
+            ids = [candidate.id for candidate in candidates]
+
+            for model in (StatusChange, StatusChangeArchive, PendingStatusNotification):
+                model.objects.filter(candidate_id__in=ids).delete()
+            FunnelCandidateState.objects.filter(candidate_id__in=ids).delete()
+            QueuedEmail.objects.filter(recipient__in=[candidate.email for candidate in candidates]).delete()
+            # The dependent rows are gone, so the delete is a single statement; the
+            # per-candidate signal effects are applied once for the whole batch.
+            with deleting_in_bulk():
+                Candidate.objects.filter(id__in=ids).delete()
+            blobs = candidates_deleted(candidates)
+
+            names = [candidate.resume.name for candidate in candidates
+                     if candidate.resume and not candidate.resume_sha256]
+        return len(ids), names, blobs
+
+    def _delete_resumes(self, names, blobs):
+        """
+        Delete resume files in bulk: `names`, and those of the released blobs
+        unless their content was stored again meanwhile. Returns (names to
+        delete, names that could not be deleted).
+        """
+        try:
+            failed = self.storage.delete_many(names) if names else []
+            if not blobs:
+                return names, failed
+            # Deleted under the blobs' locks, so an upload of the same content waits for it
+            with transaction.atomic():
+                unused = ResumeBlob.unused_names(blobs)
+                failed += self.storage.delete_many(unused) if unused else []
+            return names + unused, failed
+        except Exception as e:
+            self.stderr.write(f"Error deleting resume files: {str(e)}")
+            names = names + list(blobs.values())
+            return names, names
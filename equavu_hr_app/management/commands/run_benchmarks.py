@@ -0,0 +1,102 @@
+"""
+Management command to run the micro-benchmark suite (equavu_hr_app.benchmarks)
+and compare it against the committed baseline. Exits with an error when a
+benchmark is slower than its baseline by more than the threshold, so it can
+gate CI. The seeded data is rolled back.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+import os
+
+from equavu_hr_app import benchmarks
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Run the serializer and view micro-benchmarks and fail on regressions against the baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=settings.BENCHMARK_BASELINE_PATH,
+                            help="Baseline JSON file to compare against (or write with --update-baseline).")
+        parser.add_argument('--threshold', type=float,
+                            help="Allowed slowdown as a fraction (default: the baseline's, "
+                                 "else BENCHMARK_REGRESSION_THRESHOLD).")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Write the results as the new baseline instead of comparing.")
+        parser.add_argument('--filter', default='',
+                            help="Only run benchmarks whose name contains this text.")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before timing.")
+        parser.add_argument('--repeat', type=int, default=7, help="Timed rounds; the fastest is kept.")
+        parser.add_argument('--confirm', type=int, default=2,
+                            help="Times a regressed benchmark is measured again before the run fails, "
+                                 "so a burst of load on the machine is not reported as a regression.")
+
+    def handle(self, *args, **options):
+        baseline = {}
+        if not options['update_baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"No baseline at {options['baseline']}; create it with --update-baseline.")
+            baseline = benchmarks.load_baseline(options['baseline'])
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = baseline.get('threshold', getattr(settings, 'BENCHMARK_REGRESSION_THRESHOLD', 0.25))
+
+        results = {}
+        try:
+            with transaction.atomic():
+                self.stdout.write("Seeding benchmark data...")
+                suite = [(name, func) for name, func in benchmarks.build_benchmarks() if options['filter'] in name]
+                self.stdout.write(f"{'benchmark':<40} {'min':>12} {'median':>12} {'baseline':>12} {'change':>8}")
+                for name, func in suite:
+                    results[name] = result = benchmarks.measure(func, options['warmup'], options['repeat'])
+                    self.report(name, result, baseline.get('results', {}).get(name))
+                if baseline:
+                    self.confirm_regressions(dict(suite), results, baseline, threshold, options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        if options['update_baseline']:
+            if options['filter']:
+                raise CommandError("Refusing to write a partial baseline; run without --filter.")
+            benchmarks.write_baseline(options['baseline'], results, threshold)
+            self.stdout.write(self.style.SUCCESS(f"Wrote baseline of {len(results)} benchmarks to "
+                                                 f"{options['baseline']}."))
+            return
+
+        if baseline.get('environment') != benchmarks.environment():
+            self.stdout.write(self.style.WARNING(
+                f"Baseline measured on {baseline.get('environment')}, this run on {benchmarks.environment()}."
+            ))
+        regressions = benchmarks.find_regressions(results, baseline, threshold)
+        if regressions:
+            lines = [f"{name}: {previous * 1e6:.1f}us -> {current * 1e6:.1f}us"
+                     for name, previous, current in regressions]
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}:\n"
+                               + "\n".join(lines))
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {threshold:.0%} in {len(results)} benchmarks."))
+
+    def confirm_regressions(self, suite, results, baseline, threshold, options):
+        """Measure regressed benchmarks again, keeping their best result."""
+        for attempt in range(options['confirm']):
+            regressions = benchmarks.find_regressions(results, baseline, threshold)
+            if not regressions:
+                return
+            self.stdout.write(f"Measuring {len(regressions)} regressed benchmark(s) again...")
+            for name, _, _ in regressions:
+                result = benchmarks.measure(suite[name], options['warmup'], options['repeat'])
+                if result['min'] < results[name]['min']:
+                    results[name] = result
+                self.report(name, results[name], baseline['results'][name])
+
+    def report(self, name, result, previous):
+        baseline = change = ''
+        if previous:
+            baseline = f"{previous['min'] * 1e6:.1f}us"
+            change = f"{result['min'] / previous['min'] - 1:+.0%}"
+        self.stdout.write(f"{name:<40} {result['min'] * 1e6:>10.1f}us {result['median'] * 1e6:>10.1f}us "
+                          f"{baseline:>12} {change:>8}")
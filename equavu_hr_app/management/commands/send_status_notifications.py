@@ -0,0 +1,19 @@
+"""
+Management command to send the status update emails whose coalescing window
+has passed. Run it periodically (e.g. every minute from cron) so notifications
+queued by a process that stopped before its send timer fired still go out.
+Candidate emails queued while the mail server was failing are retried too.
+"""
+from django.core.management.base import BaseCommand
+
+from equavu_hr_app.email_utils import send_due_status_notifications, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = ("Send pending status update emails older than STATUS_NOTIFICATION_WINDOW_SECONDS "
+            "and queued emails that are due for a retry.")
+
+    def handle(self, *args, **options):
+        sent = send_due_status_notifications()
+        retried = send_queued_emails()
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} status notification(s) and {retried} queued email(s)."))
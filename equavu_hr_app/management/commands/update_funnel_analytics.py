@@ -0,0 +1,30 @@
+"""
+Management command to update the hiring funnel snapshot served by the funnel
+analytics endpoint. Meant to run periodically (e.g. from cron); by default
+only the status changes made since the previous run are processed.
+"""
+from django.core.management.base import BaseCommand
+import time
+
+from equavu_hr_app.analytics import rebuild_funnel, update_funnel
+
+
+class Command(BaseCommand):
+    help = "Add new status changes to the hiring funnel snapshot, or rebuild it from the full history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recompute the snapshot from the whole live and archived status history.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Status changes processed per transaction (incremental mode).")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        if options['rebuild']:
+            processed = rebuild_funnel()
+        else:
+            processed = update_funnel(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Rebuilt funnel from' if options['rebuild'] else 'Added'} {processed} status change(s) "
+            f"in {time.monotonic() - start:.2f}s."
+        ))
@@ -0,0 +1,33 @@
+"""
+Management command to upload the resumes waiting in the write-behind spool
+(S3_WRITE_BEHIND) to S3 in the foreground: when the app starts, periodically
+(e.g. every 10 minutes from cron) for files left by a worker that died, and
+before retiring a host. Only one run at a time works on a spool.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from equavu_hr_app.models import Candidate
+
+
+class Command(BaseCommand):
+    help = "Upload the resumes still waiting in the write-behind spool to S3."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-seconds', type=float,
+                            default=getattr(settings, 'S3_UPLOAD_RECOVER_AFTER_SECONDS', 600),
+                            help="Skip files spooled more recently, which a running process may still be uploading. "
+                                 "Use 0 when no process is running, e.g. at startup.")
+
+    def handle(self, *args, **options):
+        storage = Candidate._meta.get_field('resume').storage
+        if not hasattr(storage, 'upload_pending'):
+            raise CommandError("Resume storage is not write-behind (USE_S3 and S3_WRITE_BEHIND).")
+        with storage.recovery_lock() as acquired:
+            if not acquired:
+                self.stdout.write("Another upload of the spool is running.")
+                return
+            uploaded, failed = storage.upload_pending(min_age=options['min_age_seconds'])
+        if failed:
+            raise CommandError(f"Uploaded {uploaded} spooled resume(s); {failed} failed and stay spooled.")
+        self.stdout.write(self.style.SUCCESS(f"Uploaded {uploaded} spooled resume(s)."))
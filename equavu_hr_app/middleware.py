@@ -0,0 +1,196 @@
+"""
+Middleware for the HR application.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+import brotli
+import gzip
+import time
+
+from .conditional import encoded_etag
+from .db_router import replica_reads_allowed
+from .tracing import query_span, start_trace
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_PIN_COOKIE = 'primary_pin'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Allows safe requests to read from replicas, unless the client made a write recently.
+    After a successful write the client gets a short-lived cookie pinning its
+    reads to the primary for REPLICA_PIN_SECONDS, so it sees its own changes
+    even if the replicas have not caught up yet.
+    Async-capable so async views (event streams) are not forced onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def is_pinned(request):
+        try:
+            return float(request.COOKIES.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replica_reads_allowed.set(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads_allowed.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = replica_reads_allowed.set(self.use_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads_allowed.reset(token)
+        return self.process_response(request, response)
+
+    def use_replica(self, request):
+        return request.method in SAFE_METHODS and not self.is_pinned(request)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                str(time.time() + pin_seconds),
+                max_age=pin_seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'text/', 'application/javascript')
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts (q > 0), from Accept-Encoding."""
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with Brotli or gzip, as negotiated with Accept-Encoding.
+    Only complete (non-streaming) textual responses of at least COMPRESSION_MIN_BYTES
+    are compressed, so event streams, ZIP downloads and files pass through. A
+    strong ETag gets the coding as suffix ("<tag>-br"), which conditional GETs
+    strip again when comparing.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (response.streaming or response.status_code != 200 or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(COMPRESSIBLE_CONTENT_TYPES)):
+            return response
+        if len(response.content) < getattr(settings, 'COMPRESSION_MIN_BYTES', 1024):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = accepted_encodings(request)
+        if 'br' in encodings:
+            encoding = 'br'
+            compressed = brotli.compress(response.content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5))
+        elif 'gzip' in encodings:
+            encoding = 'gzip'
+            compressed = gzip.compress(response.content, getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = encoded_etag(response['ETag'], encoding)
+        return response
+
+
+class TracingMiddleware:
+    """
+    Opens the root span of every request (see tracing.py) and, when the request
+    is sampled, records its database queries as child spans. The trace ID is
+    returned in the X-Trace-Id header of sampled requests. Streaming responses
+    are timed until the response object is returned, not until the last chunk.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with start_trace(f"{request.method} {request.path}", request.headers.get('traceparent'),
+                         self.request_attributes(request)) as span, ExitStack() as stack:
+            if span.sampled:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_span))
+            response = self.get_response(request)
+            return self.process_response(request, response, span)
+
+    async def __acall__(self, request):
+        # Queries of async views run in executor threads, whose connections are not wrapped.
+        with start_trace(f"{request.method} {request.path}", request.headers.get('traceparent'),
+                         self.request_attributes(request)) as span:
+            response = await self.get_response(request)
+            return self.process_response(request, response, span)
+
+    @staticmethod
+    def request_attributes(request):
+        return {'http.request.method': request.method, 'url.path': request.path}
+
+    @staticmethod
+    def process_response(request, response, span):
+        if request.resolver_match is not None:
+            span.name = f"{request.method} {request.resolver_match.route}"
+            span.set_attribute('http.route', request.resolver_match.route)
+        span.set_attribute('http.response.status_code', response.status_code)
+        if response.status_code >= 500:
+            span.set_error(f"HTTP {response.status_code}")
+        if span.sampled:
+            response['X-Trace-Id'] = span.trace_id
+        return response
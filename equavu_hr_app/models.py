@@ -1,9 +1,14 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator, FileExtensionValidator
 from django.utils import timezone
+import json
 import os
 import uuid
-from equavu_hr_app.storage import StorageManager
+import zlib
+from equavu_hr_app.storage import StorageManager, content_hash, content_addressed_name
 
 
 class Department(models.TextChoices):
@@ -21,14 +26,36 @@ class ApplicationStatus(models.TextChoices):
 
 
 def resume_upload_path(instance, filename):
-    """Generate a unique path for storing resume files"""
+    """
+    Generate the storage path for a resume file.
+    Resumes are content-addressed by their SHA-256 digest, so identical files
+    share a single stored blob. Falls back to a unique path when no digest is known.
+    """
     ext = filename.split('.')[-1]
+    if instance.resume_sha256:
+        return content_addressed_name(instance.resume_sha256, ext)
     filename = f"{uuid.uuid4()}.{ext}"
     # Use a temporary UUID if instance.id is not available yet
     folder_name = str(instance.id) if instance.id else str(uuid.uuid4())
     return os.path.join('resumes', folder_name, filename)
 
 
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=None):
+    """
+    Insert `objs`, updating `update_fields` of the rows that already exist.
+    MySQL's ON DUPLICATE KEY UPDATE cannot name the conflicting columns and
+    matches on the table's unique keys, so `unique_fields` is only passed to
+    the backends that take a conflict target (PostgreSQL, SQLite).
+    """
+    using = router.db_for_write(model)
+    if not connections[using].features.supports_update_conflicts_with_target:
+        unique_fields = None
+    return model.objects.using(using).bulk_create(
+        objs, batch_size=batch_size,
+        update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields
+    )
+
+
 class Candidate(models.Model):
     """Model for job candidates"""
     # Note: Using UUIDField for id to ensure unique identification,
@@ -47,27 +74,91 @@ class Candidate(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'docx'])],
         storage=StorageManager.get_storage()
     )
+    # SHA-256 of the resume content; empty for resumes stored before content addressing.
+    resume_sha256 = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
     current_status = models.CharField(
         max_length=30,
         choices=ApplicationStatus.choices,
         default=ApplicationStatus.SUBMITTED
     )
+    # Incremented on every status change; used for optimistic concurrency control (ETag / If-Match).
+    version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.full_name} - {self.department}"
 
+    @property
+    def etag(self):
+        """Strong entity tag identifying the current version of the candidate."""
+        return f'"{self.version}"'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored digest so a replaced resume can release its blob.
+        instance._loaded_resume_sha256 = instance.__dict__.get('resume_sha256')
+        return instance
+
+    def save(self, *args, **kwargs):
+        new_upload = bool(self.resume) and not self.resume._committed
+        previous_sha256 = getattr(self, '_loaded_resume_sha256', None)
+        if new_upload:
+            # Upload handlers may already have hashed the file while receiving it.
+            self.resume_sha256 = getattr(self.resume.file, 'sha256', None) or content_hash(self.resume.file)
+
+        with transaction.atomic():
+            if new_upload:
+                # The blob row is locked (and created for new content) before the file is stored, so a
+                # concurrent release or orphan collection of the same content keeps the file.
+                name = self._meta.get_field('resume').generate_filename(self, self.resume.name)
+                blob, created = ResumeBlob.lock(self.resume_sha256, name, self.resume.size)
+                if not created:
+                    # Identical content is already stored: reference it instead of uploading again.
+                    self.resume.name = blob.name
+                    self.resume._committed = True
+            super().save(*args, **kwargs)
+            if new_upload:
+                ResumeBlob.objects.filter(sha256=self.resume_sha256).update(
+                    name=self.resume.name, ref_count=F('ref_count') + 1)
+                if previous_sha256 and previous_sha256 != self.resume_sha256:
+                    ResumeBlob.release(previous_sha256)
+        self._loaded_resume_sha256 = self.resume_sha256
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['email']),
-            models.Index(fields=['department']),
-            models.Index(fields=['current_status']),
             models.Index(fields=['created_at']),
+            # Admin list filters (see CANDIDATE_FILTER_INDEXES): equality filters on the
+            # leading columns, at most one range on the next. They also cover the former
+            # single-column department and current_status indexes.
+            models.Index(fields=['department', 'current_status', 'created_at']),
+            models.Index(fields=['current_status', 'created_at']),
+            models.Index(fields=['department', 'years_of_experience']),
+            models.Index(fields=['current_status', 'years_of_experience']),
+            models.Index(fields=['years_of_experience']),
+            # Keyset order of the delta sync feed
+            models.Index(fields=['updated_at', 'id']),
         ]
 
 
+class CandidateTombstone(models.Model):
+    """
+    Record of a deleted candidate, so delta sync clients can drop it from their cache.
+    Kept for SYNC_TOMBSTONE_RETENTION_DAYS; older sync tokens require a full resync.
+    """
+    candidate_id = models.UUIDField(primary_key=True, editable=False)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.candidate_id} - deleted {self.deleted_at}"
+
+    class Meta:
+        ordering = ['deleted_at']
+
+
 class StatusChange(models.Model):
     """Model to track application status changes"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -88,3 +179,270 @@ class StatusChange(models.Model):
             models.Index(fields=['candidate']),
             models.Index(fields=['created_at']),
         ]
+
+
+class StatusChangeArchive(models.Model):
+    """
+    Compressed cold storage for old StatusChange rows of closed candidates.
+    Each row holds a batch of one candidate's status changes, serialized like the
+    API returns them and zlib-compressed, keeping the live table small.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='archived_status_changes')
+    change_count = models.PositiveIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.candidate_id} - {self.change_count} archived status changes"
+
+    @classmethod
+    def compress(cls, changes):
+        """Compress a list of serialized status changes."""
+        return zlib.compress(json.dumps(changes, separators=(',', ':')).encode('utf-8'), 9)
+
+    def changes(self):
+        """Return the archived status changes, newest first."""
+        return json.loads(zlib.decompress(bytes(self.payload)).decode('utf-8'))
+
+    class Meta:
+        ordering = ['-last_created_at']
+        indexes = [
+            models.Index(fields=['candidate', 'last_created_at']),
+        ]
+
+
+class PendingStatusNotification(models.Model):
+    """
+    Status update email held back for STATUS_NOTIFICATION_WINDOW_SECONDS, so that
+    several status changes of a candidate in quick succession go out as one
+    message with the latest status and all their feedback.
+    """
+    candidate = models.OneToOneField(Candidate, on_delete=models.CASCADE, primary_key=True,
+                                     related_name='pending_notification')
+    status = models.CharField(max_length=30, choices=ApplicationStatus.choices)
+    # Non-empty feedback of the coalesced changes, oldest first
+    feedback = models.JSONField(default=list, blank=True)
+    change_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.candidate_id} - {self.status} ({self.change_count} changes)"
+
+
+class QueuedEmail(models.Model):
+    """
+    Candidate email that could not be sent right away because the mail server
+    failed or its circuit breaker was open. Retried with backoff until sent.
+    An email the mail server rejects permanently, or that has failed
+    EMAIL_MAX_ATTEMPTS times, is kept as a dead letter (failed_at set) and no
+    longer retried.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    recipient = models.EmailField()
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(db_index=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.subject} ({self.attempts} attempts)"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Client-supplied Idempotency-Key of a registration or status update, with a
+    fingerprint of the request that first used it and, once that request has
+    finished, its response for replaying to retries (see idempotency.py).
+    """
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request is in progress
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    response_headers = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.scope} {self.key} - {self.status_code or 'in progress'}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key'),
+        ]
+
+
+class ResumeBlob(models.Model):
+    """
+    A content-addressed resume file shared by every candidate that uploaded the same content.
+    The stored object is only deleted once no candidate references it anymore.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+    @classmethod
+    def lock(cls, sha256, name, size):
+        """
+        Return (blob, created) with the blob's row locked until the transaction
+        ends; a missing blob is created without references. Storing, releasing
+        and deleting a blob's file all happen under this lock.
+        """
+        return cls.objects.select_for_update().get_or_create(
+            sha256=sha256,
+            defaults={'name': name, 'size': size, 'ref_count': 0}
+        )
+
+    @classmethod
+    def acquire(cls, sha256, name, size, count=1):
+        """Record `count` more references to the blob, creating it on first use."""
+        with transaction.atomic():
+            blob, _ = cls.lock(sha256, name, size)
+            cls.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + count)
+        return blob
+
+    @classmethod
+    def release(cls, sha256):
+        """Drop one reference to the blob and delete the stored file once it is unused."""
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                cls.objects.filter(sha256=sha256).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+            transaction.on_commit(lambda: cls.delete_files({sha256: blob.name}))
+
+    @classmethod
+    def release_many(cls, counts):
+        """
+        Drop {sha256: count} references with one update per distinct count and
+        delete the blobs left unused. Returns {sha256: name} of their stored
+        files, which the caller deletes with delete_files() once the transaction
+        has committed.
+        """
+        # Locked in key order, so concurrent releases cannot deadlock
+        list(cls.objects.select_for_update().filter(sha256__in=list(counts)).order_by('sha256').values('sha256'))
+        by_count = {}
+        for sha256, count in counts.items():
+            by_count.setdefault(count, []).append(sha256)
+        for count, digests in by_count.items():
+            cls.objects.filter(sha256__in=digests).update(ref_count=Greatest(F('ref_count') - count, 0))
+        unused = cls.objects.filter(sha256__in=list(counts), ref_count=0)
+        released = dict(unused.values_list('sha256', 'name'))
+        unused.delete()
+        return released
+
+    @classmethod
+    def unused_names(cls, blobs):
+        """
+        Return the names of released blobs ({sha256: name}) whose content has
+        not been stored again since. The blobs stay locked until the caller's
+        transaction ends, so their files must be deleted within it; a concurrent
+        upload of the same content waits until then.
+        """
+        used = set(cls.objects.select_for_update().filter(sha256__in=list(blobs), ref_count__gt=0)
+                   .order_by('sha256').values_list('sha256', flat=True))
+        return [name for sha256, name in blobs.items() if sha256 not in used]
+
+    @classmethod
+    def delete_files(cls, blobs, storage=None):
+        """
+        Delete the stored files of released blobs ({sha256: name}) that are
+        still unused; returns the names that could not be deleted.
+        """
+        storage = storage or Candidate._meta.get_field('resume').storage
+        with transaction.atomic():
+            names = cls.unused_names(blobs)
+            return storage.delete_many(names) if names else []
+
+
+class ImportStatus(models.TextChoices):
+    RUNNING = 'RUNNING', 'Running'
+    COMPLETED = 'COMPLETED', 'Completed'
+    FAILED = 'FAILED', 'Failed'
+
+
+class CandidateImportJob(models.Model):
+    """
+    Progress and per-row error report of a bulk candidate import.
+    `rows_processed` is a checkpoint: a resumed import skips the rows before it.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    source_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=ImportStatus.choices, default=ImportStatus.RUNNING)
+    rows_processed = models.PositiveIntegerField(default=0)
+    imported_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # List of {"row": <row number>, "email": ..., "errors": {...}} for rejected rows
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_name} - {self.status} ({self.rows_processed} rows)"
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class FunnelTransition(models.Model):
+    """
+    Materialized hiring funnel of a department: how many candidates moved from one
+    status to another, and the total time they spent in the status they left.
+    An empty from_status counts candidates entering the funnel. Maintained by
+    the funnel analytics engine (analytics.py) from StatusChange rows.
+    """
+    department = models.CharField(max_length=20, choices=Department.choices)
+    from_status = models.CharField(max_length=30, choices=ApplicationStatus.choices, blank=True)
+    to_status = models.CharField(max_length=30, choices=ApplicationStatus.choices)
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.department}: {self.from_status or '-'} -> {self.to_status} ({self.count})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'from_status', 'to_status'],
+                                    name='unique_funnel_transition'),
+        ]
+
+
+class FunnelCandidateState(models.Model):
+    """Latest status of a candidate seen by the funnel engine, to time its next transition."""
+    candidate_id = models.UUIDField(primary_key=True, editable=False)
+    status = models.CharField(max_length=30, choices=ApplicationStatus.choices)
+    entered_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.candidate_id} - {self.status} since {self.entered_at}"
+
+
+class FunnelWatermark(models.Model):
+    """
+    Position in the (created_at, id) order of StatusChange up to which the funnel
+    is computed. A single row (pk=1), also locked to serialize funnel updates.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    last_change_id = models.UUIDField(null=True, blank=True)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Funnel computed through {self.last_created_at}"
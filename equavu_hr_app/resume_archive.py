@@ -0,0 +1,97 @@
+"""
+On-the-fly ZIP archives of candidate resumes.
+The archive is produced as a stream of bytes while it is being built: no
+temporary files are written and only the resumes being prefetched are held
+in memory. Storage reads run concurrently in a small thread pool ahead of
+the file currently being written, hiding storage latency (e.g. S3 GETs).
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.utils.text import get_valid_filename
+import logging
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+
+class _StreamBuffer:
+    """
+    Unseekable file-like sink for ZipFile that collects written bytes until drained.
+    ZipFile falls back to data descriptors when it cannot seek, so each entry can
+    be emitted as soon as it is written.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def archive_entry_name(candidate):
+    """Name of a candidate's resume inside the archive."""
+    ext = candidate.resume.name.split('.')[-1]
+    return get_valid_filename(f"{candidate.full_name}_{candidate.id}.{ext}")
+
+
+def stream_resume_archive(candidates, storage, prefetch=4):
+    """
+    Yield the bytes of a ZIP archive containing the resumes of the given candidates.
+    Up to `prefetch` resumes are read from storage concurrently. Resumes missing
+    from storage are skipped and listed in a MISSING.txt entry.
+    """
+    buffer = _StreamBuffer()
+    archive = zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED)
+    candidates = iter(candidates)
+    missing = []
+
+    def fetch(name):
+        return list(storage.iter_chunks(name))
+
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        pending = deque()
+
+        def schedule():
+            for candidate in candidates:
+                if candidate.resume:
+                    pending.append((archive_entry_name(candidate), executor.submit(fetch, candidate.resume.name)))
+                    return
+
+        for _ in range(prefetch):
+            schedule()
+
+        while pending:
+            entry_name, future = pending.popleft()
+            schedule()
+            try:
+                chunks = future.result()
+            except FileNotFoundError:
+                logger.warning(f"Resume missing from storage, skipped in archive: {entry_name}")
+                missing.append(entry_name)
+                continue
+
+            with archive.open(entry_name, 'w') as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    yield from _drained(buffer)
+            yield from _drained(buffer)
+
+    if missing:
+        archive.writestr('MISSING.txt', "Resumes not found in storage:\n" + "\n".join(missing) + "\n")
+    archive.close()
+    yield from _drained(buffer)
+
+
+def _drained(buffer):
+    data = buffer.drain()
+    if data:
+        yield data
@@ -2,9 +2,18 @@
 Serializers for the HR application models.
 """
 from rest_framework import serializers
-from .models import Candidate, StatusChange, Department, ApplicationStatus
+from .models import (
+    Candidate,
+    StatusChange,
+    StatusChangeArchive,
+    CandidateImportJob,
+    Department,
+    ApplicationStatus
+)
+from datetime import datetime, time
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
+from django.utils.dateparse import parse_date
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,7 +28,73 @@ class StatusChangeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class CandidateListSerializer(serializers.ModelSerializer):
+def parse_field_names(value):
+    """Split a comma-separated `fields` / `exclude` query parameter."""
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients trim a ModelSerializer with `?fields=` / `?exclude=`.
+    Views resolve the parameters with `select_fields()`, pass the result as
+    context['fields'] and narrow their queryset with `optimize_queryset()`, so
+    only the needed columns are read and nested relations prefetched only when
+    asked for. `id` is always included.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, fields=None, exclude=None):
+        """Validated field names for the query parameters, or None for all fields."""
+        requested, excluded = parse_field_names(fields), parse_field_names(exclude)
+        if not requested and not excluded:
+            return None
+        available = list(cls().fields)
+        unknown = sorted(set(requested + excluded) - set(available))
+        if unknown:
+            raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(unknown)}."]})
+        selected = [name for name in available
+                    if (not requested or name in requested or name == 'id') and name not in excluded]
+        if 'id' not in selected:
+            selected.insert(0, 'id')
+        return selected
+
+    @classmethod
+    def optimize_queryset(cls, queryset, selected=None, required=()):
+        """
+        Load only the columns the selected fields read and prefetch only the
+        selected nested relations; `required` columns are always loaded.
+        """
+        model = queryset.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        columns, prefetches = {model._meta.pk.name, *required}, []
+        for name, field in cls().fields.items():
+            if selected is not None and name not in selected:
+                continue
+            attribute = field.source.split('.')[0]
+            if isinstance(field, serializers.BaseSerializer):
+                prefetches.append(attribute)
+                continue
+            # Choice labels (get_<field>_display) read the underlying column
+            if attribute.startswith('get_') and attribute.endswith('_display'):
+                attribute = attribute[len('get_'):-len('_display')]
+            if attribute not in concrete:
+                # Computed from something we can't map to columns: load the full row
+                columns = None
+            elif columns is not None:
+                columns.add(attribute)
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset.prefetch_related(*prefetches) if prefetches else queryset
+
+
+class CandidateListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for listing candidates (admin view)."""
     department_display = serializers.CharField(source='get_department_display', read_only=True)
     current_status_display = serializers.CharField(source='get_current_status_display', read_only=True)
@@ -32,7 +107,7 @@ class CandidateListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class CandidateDetailSerializer(serializers.ModelSerializer):
+class CandidateDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for candidate details including status changes."""
     status_changes = StatusChangeSerializer(many=True, read_only=True)
     department_display = serializers.CharField(source='get_department_display', read_only=True)
@@ -45,6 +120,15 @@ class CandidateDetailSerializer(serializers.ModelSerializer):
                   'current_status_display', 'created_at', 'updated_at', 'status_changes']
         read_only_fields = ['id', 'created_at', 'updated_at', 'current_status']
 
+    def to_representation(self, instance):
+        """Append archived status changes when the context asks for them."""
+        data = super().to_representation(instance)
+        if self.context.get('include_archived') and 'status_changes' in self.fields:
+            # Archived changes are all older than the live ones, so appending keeps newest-first order.
+            for archive in StatusChangeArchive.objects.filter(candidate=instance):
+                data['status_changes'].extend(archive.changes())
+        return data
+
 
 class CandidateCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a new candidate with resume upload."""
@@ -79,6 +163,32 @@ class CandidateCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class BulkCandidateRowSerializer(CandidateCreateSerializer):
+    """
+    Validates one row of a bulk import with the same rules as registration.
+    Email uniqueness is checked by the importer for a whole batch in one query.
+    """
+    email = serializers.EmailField(max_length=254)
+
+
+class CandidateImportRequestSerializer(serializers.Serializer):
+    """Serializer for a bulk import upload."""
+    rows = serializers.FileField(help_text="CSV or NDJSON file with one candidate per row.")
+    resumes = serializers.FileField(help_text="ZIP archive with the resume files named in the rows.")
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False)
+    job = serializers.UUIDField(required=False, help_text="ID of an interrupted import to resume.")
+
+
+class CandidateImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for bulk import job progress and error reports."""
+
+    class Meta:
+        model = CandidateImportJob
+        fields = ['id', 'source_name', 'status', 'rows_processed', 'imported_count',
+                  'error_count', 'errors', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
 class StatusUpdateSerializer(serializers.Serializer):
     """Serializer for updating a candidate's application status."""
     status = serializers.ChoiceField(choices=ApplicationStatus.choices)
@@ -90,3 +200,90 @@ class StatusUpdateSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 f"Status must be one of: {', '.join([choice[0] for choice in ApplicationStatus.choices])}")
         return value
+
+
+class CommaSeparatedChoiceField(serializers.MultipleChoiceField):
+    """Multiple choices given as repeated and/or comma-separated query parameters."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [data]
+        values = [value.strip() for item in data for value in str(item).split(',') if value.strip()]
+        return sorted(super().to_internal_value(values))
+
+
+class DateOrDateTimeField(serializers.DateTimeField):
+    """ISO 8601 datetime, or a date meaning its midnight."""
+
+    def to_internal_value(self, value):
+        date = parse_date(value) if isinstance(value, str) else None
+        if date is not None:
+            value = datetime.combine(date, time.min).isoformat()
+        return super().to_internal_value(value)
+
+
+# Index serving each accepted combination of equality filters and range filter.
+# Equality filters narrow the leading index columns and at most one range filter
+# scans the next one, so two range filters can't share an index and are rejected.
+CANDIDATE_FILTER_INDEXES = {
+    ((), None): ('created_at',),
+    ((), 'created_at'): ('created_at',),
+    ((), 'years_of_experience'): ('years_of_experience',),
+    (('department',), None): ('department', 'current_status', 'created_at'),
+    (('department',), 'created_at'): ('department', 'current_status', 'created_at'),
+    (('department',), 'years_of_experience'): ('department', 'years_of_experience'),
+    (('current_status',), None): ('current_status', 'created_at'),
+    (('current_status',), 'created_at'): ('current_status', 'created_at'),
+    (('current_status',), 'years_of_experience'): ('current_status', 'years_of_experience'),
+    (('current_status', 'department'), None): ('department', 'current_status', 'created_at'),
+    (('current_status', 'department'), 'created_at'): ('department', 'current_status', 'created_at'),
+    (('current_status', 'department'), 'years_of_experience'): ('department', 'years_of_experience'),
+}
+
+
+class CandidateFilterSerializer(serializers.Serializer):
+    """
+    Validates the candidate list filters from the query parameters.
+    `department` and `current_status` take several values; experience and
+    registration date take a range. Only combinations with an index in
+    CANDIDATE_FILTER_INDEXES are accepted.
+    """
+    department = CommaSeparatedChoiceField(choices=Department.choices, required=False)
+    current_status = CommaSeparatedChoiceField(choices=ApplicationStatus.choices, required=False)
+    min_experience = serializers.IntegerField(min_value=0, required=False)
+    max_experience = serializers.IntegerField(min_value=0, required=False)
+    created_after = DateOrDateTimeField(required=False)
+    created_before = DateOrDateTimeField(required=False)
+
+    def validate(self, data):
+        if data.get('min_experience', 0) > data.get('max_experience', float('inf')):
+            raise serializers.ValidationError({'max_experience': ["Must not be less than min_experience."]})
+        if 'created_after' in data and 'created_before' in data and data['created_after'] >= data['created_before']:
+            raise serializers.ValidationError({'created_before': ["Must be later than created_after."]})
+
+        ranges = []
+        if 'min_experience' in data or 'max_experience' in data:
+            ranges.append('years_of_experience')
+        if 'created_after' in data or 'created_before' in data:
+            ranges.append('created_at')
+        if len(ranges) > 1:
+            raise serializers.ValidationError(
+                "Experience and registration date ranges can't be combined; filter by one range at a time."
+            )
+        equality = tuple(sorted(name for name in ('department', 'current_status') if data.get(name)))
+        if (equality, ranges[0] if ranges else None) not in CANDIDATE_FILTER_INDEXES:
+            raise serializers.ValidationError("This combination of filters is not supported.")
+        return data
+
+    def filter_queryset(self, queryset):
+        """Apply the validated filters to a candidate queryset."""
+        data = self.validated_data
+        lookups = {
+            'department__in': data.get('department'),
+            'current_status__in': data.get('current_status'),
+            'years_of_experience__gte': data.get('min_experience'),
+            'years_of_experience__lte': data.get('max_experience'),
+            'created_at__gte': data.get('created_after'),
+            'created_at__lt': data.get('created_before'),
+        }
+        return queryset.filter(**{lookup: value for lookup, value in lookups.items() if value not in (None, [])})
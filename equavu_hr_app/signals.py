@@ -0,0 +1,65 @@
+"""
+Signal handlers for the HR application models.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+import threading
+
+from .email_registry import email_registry
+from .list_summary import candidates_changed
+from .models import Candidate, CandidateTombstone, ResumeBlob, bulk_upsert
+
+_bulk_delete = threading.local()
+
+
+@receiver(post_save, sender=Candidate)
+def remember_candidate_email(sender, instance, created, **kwargs):
+    """Keep this process's registered-email filter in sync with new candidates."""
+    if created:
+        email_registry.add(instance.email)
+    transaction.on_commit(candidates_changed)
+
+
+@receiver(post_delete, sender=Candidate)
+def apply_candidate_deletion(sender, instance, **kwargs):
+    """Apply the effects of a deleted candidate, unless a bulk delete applies them for the whole batch."""
+    if getattr(_bulk_delete, 'active', False):
+        return
+    released = candidates_deleted([instance])
+    if released:
+        transaction.on_commit(lambda: ResumeBlob.delete_files(released))
+
+
+def candidates_deleted(candidates):
+    """
+    Apply the effects of deleting candidates: release the references to their
+    content-addressed resume blobs, leave tombstones for the delta sync feed and
+    refresh the list summary once committed. Returns the released blobs as
+    {sha256: name}; the caller deletes their files with ResumeBlob.delete_files().
+    """
+    counts = Counter(candidate.resume_sha256 for candidate in candidates if candidate.resume_sha256)
+    with transaction.atomic():
+        released = ResumeBlob.release_many(counts) if counts else {}
+        now = timezone.now()
+        bulk_upsert(CandidateTombstone,
+                    [CandidateTombstone(candidate_id=candidate.id, deleted_at=now) for candidate in candidates],
+                    unique_fields=['candidate_id'], update_fields=['deleted_at'])
+        transaction.on_commit(candidates_changed)
+    return released
+
+
+@contextmanager
+def deleting_in_bulk():
+    """
+    Skip the per-candidate effects of the deletes in this block, so that a bulk
+    delete applies them with one candidates_deleted() call for the whole batch.
+    """
+    _bulk_delete.active = True
+    try:
+        yield
+    finally:
+        _bulk_delete.active = False
@@ -2,10 +2,81 @@
 Storage abstraction layer for handling file storage.
 This allows for easy switching between local and cloud storage solutions.
 """
-from django.core.files.storage import FileSystemStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
 from django.conf import settings
+from django.utils._os import safe_join
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+import atexit
+import fcntl
+import hashlib
+import logging
 import os
+import queue
+import tempfile
+import threading
+import time
+
+from .circuit_breaker import get_breaker
+from .tracing import trace_storage
+
+logger = logging.getLogger(__name__)
+
+# Resumes stored by content live under this prefix, keyed by their SHA-256 digest.
+CONTENT_ADDRESSED_PREFIX = 'resumes/sha256/'
+
+# Chunk size for streaming reads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Suffix of files still being written to the spool or read cache
+PARTIAL_SUFFIX = '.part'
+
+# Most keys S3 accepts in one DeleteObjects request
+S3_DELETE_BATCH_SIZE = 1000
+# S3 error codes asking the client to slow down, counted as failures like 5xx responses
+S3_THROTTLING_CODES = ('SlowDown', 'Throttling', 'RequestTimeout')
+
+
+def content_hash(content):
+    """
+    Compute the SHA-256 hex digest of a file-like object, reading it chunk by chunk
+    so large uploads never have to be held in memory.
+    """
+    digest = hashlib.sha256()
+    if hasattr(content, 'chunks'):
+        for chunk in content.chunks():
+            digest.update(chunk)
+    else:
+        content.seek(0)
+        for chunk in iter(lambda: content.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_addressed_name(digest, ext):
+    """Return the storage name of the blob with the given digest and file extension."""
+    return f"{CONTENT_ADDRESSED_PREFIX}{digest[:2]}/{digest}.{ext.lower()}"
+
+
+def is_content_addressed(name):
+    """Whether a storage name points at a content-addressed blob."""
+    return bool(name) and str(name).replace('\\', '/').startswith(CONTENT_ADDRESSED_PREFIX)
+
+
+def content_address_digest(name):
+    """Return the digest of a content-addressed storage name."""
+    return str(name).replace('\\', '/').rsplit('/', 1)[-1].split('.', 1)[0]
 
 
 class StorageManager:
@@ -22,22 +93,623 @@ class StorageManager:
         This method can be extended to return different storage backends
         based on settings.
         """
+        # Operations are recorded as spans of sampled request traces
+        return trace_storage(StorageManager._get_backend())
+
+    @staticmethod
+    def _get_backend():
         # Default to local file storage
+        if getattr(settings, "USE_MEMORY_STORAGE", False):
+            return MemoryStorage(latency=getattr(settings, "MEMORY_STORAGE_LATENCY_SECONDS", 0))
         if getattr(settings, "USE_S3", False):
-            return S3Storage()
+            if getattr(settings, "S3_WRITE_BEHIND", False):
+                return WriteBehindS3Storage()
+            return CachedS3Storage()
         else:
             return LocalStorage()
 
 
-class S3Storage(S3Boto3Storage):
+class ContentAddressedMixin:
+    """
+    Skips writing content-addressed blobs that are already stored.
+    The name of such a blob is derived from its content, so an existing object
+    is byte-for-byte identical and uploading it again would be wasted work.
+    """
+
+    def save(self, name, content, max_length=None):
+        if is_content_addressed(name) and self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def is_s3_failure(exc):
+    """Whether an exception means S3 is failing (as opposed to e.g. a missing object)."""
+    if isinstance(exc, ClientError):
+        return (exc.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500
+                or exc.response.get('Error', {}).get('Code') in S3_THROTTLING_CODES)
+    return isinstance(exc, (BotoCoreError, S3UploadFailedError))
+
+
+# Operation of the current thread that already went through the S3 circuit breaker
+_s3_call = threading.local()
+
+
+class S3Storage(ContentAddressedMixin, S3Boto3Storage):
     """
     S3 storage implementation using django-storages and boto3.
+    Requests time out after S3_CONNECT_TIMEOUT_SECONDS / S3_READ_TIMEOUT_SECONDS,
+    and every operation goes through the 's3' circuit breaker: while it is
+    open, operations that need S3 raise DependencyUnavailable (503) at once.
     """
     def __init__(self):
         super().__init__()
+        self.client_config = self.client_config.merge(Config(
+            connect_timeout=getattr(settings, 'S3_CONNECT_TIMEOUT_SECONDS', 5),
+            read_timeout=getattr(settings, 'S3_READ_TIMEOUT_SECONDS', 30),
+            retries={'max_attempts': getattr(settings, 'S3_MAX_ATTEMPTS', 3), 'mode': 'standard'},
+        ))
+        self.breaker = get_breaker('s3')
+
+    def _guarded(self, func, *args, **kwargs):
+        # Operations made up of others (e.g. move) count as one call
+        if getattr(_s3_call, 'active', False):
+            return func(*args, **kwargs)
+        _s3_call.active = True
+        try:
+            return self.breaker.call(func, *args, is_failure=is_s3_failure, **kwargs)
+        finally:
+            _s3_call.active = False
+
+    def _open(self, name, mode='rb'):
+        return self._guarded(super()._open, name, mode)
+
+    def _save(self, name, content):
+        return self._guarded(super()._save, name, content)
+
+    def exists(self, name):
+        return self._guarded(super().exists, name)
+
+    def delete(self, name):
+        return self._guarded(super().delete, name)
+
+    def size(self, name):
+        return self._guarded(super().size, name)
+
+    def listdir(self, path):
+        return self._guarded(super().listdir, path)
+
+    def get_modified_time(self, name):
+        return self._guarded(super().get_modified_time, name)
 
+    def _relative_name(self, key):
+        """Strip the configured location from an object key."""
+        if self.location:
+            return key[len(self.location):].lstrip('/')
+        return key
 
-class LocalStorage(FileSystemStorage):
+    def iter_chunks(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Stream the object's content chunk by chunk straight from the GET response,
+        without the temporary file S3File downloads to.
+        """
+        key = self._normalize_name(clean_name(name))
+        try:
+            body = self._guarded(self.connection.meta.client.get_object, Bucket=self.bucket_name, Key=key)['Body']
+        except ClientError as err:
+            if err.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+                raise FileNotFoundError(f"File does not exist: {name}")
+            raise
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def iter_files(self, prefix=''):
+        """
+        Yield (name, size, modified_time) for every object under prefix.
+        The bucket is listed page by page with ListObjectsV2, so memory stays
+        bounded however many objects it holds.
+        """
+        key_prefix = self._normalize_name(clean_name(prefix)) if prefix else self.location
+        paginator = self.connection.meta.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=key_prefix or ''):
+            for entry in page.get('Contents', ()):
+                yield self._relative_name(entry['Key']), entry['Size'], entry['LastModified']
+
+    def move(self, old_name, new_name):
+        """Move an object with a server-side copy instead of downloading it."""
+        return self._guarded(self._move, old_name, new_name)
+
+    def _move(self, old_name, new_name):
+        source = self._normalize_name(clean_name(old_name))
+        target = self._normalize_name(clean_name(new_name))
+        self.connection.meta.client.copy_object(
+            Bucket=self.bucket_name,
+            Key=target,
+            CopySource={'Bucket': self.bucket_name, 'Key': source}
+        )
+        self.delete(old_name)
+        return clean_name(new_name)
+
+    def delete_many(self, names):
+        """
+        Delete objects with DeleteObjects requests of up to S3_DELETE_BATCH_SIZE
+        keys instead of one request per object. Returns the names S3 could not
+        delete; missing objects count as deleted.
+        """
+        names = [clean_name(name) for name in names]
+        failed = []
+        for start in range(0, len(names), S3_DELETE_BATCH_SIZE):
+            keys = {self._normalize_name(name): name for name in names[start:start + S3_DELETE_BATCH_SIZE]}
+            response = self._guarded(self.connection.meta.client.delete_objects, Bucket=self.bucket_name,
+                                     Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True})
+            for error in response.get('Errors', ()):
+                logger.warning(f"Error deleting {error['Key']}: {error.get('Code')} {error.get('Message')}")
+                failed.append(keys.get(error['Key'], error['Key']))
+        return failed
+
+
+class LocalReadCache:
+    """
+    Read-through cache of remote files on local disk, bounded by their total
+    size with least-recently-used eviction.
+    The cache directory is shared by all processes using it (e.g. gunicorn
+    workers), so the directory itself is the index: every hit refreshes the
+    file's modification time, and after each fetch the directory is scanned
+    and the least recently used files are removed until the total fits, under
+    a file lock so that concurrent evictions do not overshoot. The scan costs
+    far less than the remote read before it. Counters are per process.
+    Concurrent misses for the same name in a process wait for a single fetch.
+    Files larger than the whole cache are streamed through a temporary file
+    without being cached.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+        self._fetching = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._evict()
+
+    def _path(self, name):
+        return safe_join(self.directory, clean_name(name))
+
+    def _entries(self):
+        """Return the cached files as [(mtime, name, size)], least recently used first."""
+        entries = []
+        # Partial files older than an hour belong to fetches that died midway
+        stale_before = time.time() - 3600
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                    if filename.endswith(PARTIAL_SUFFIX):
+                        if stat.st_mtime < stale_before:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue  # Evicted or renamed by another process meanwhile
+                name = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                entries.append((stat.st_mtime, name, stat.st_size))
+        return sorted(entries)
+
+    @contextmanager
+    def _directory_lock(self):
+        """Exclusive lock of the cache directory across processes."""
+        with open(f"{self.directory.rstrip(os.sep)}.lock", 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def open(self, name, fetch):
+        """
+        Return the cached content of `name` as a binary file, first calling
+        fetch(file) to write it into the cache on a miss. The returned file
+        stays readable even if the entry is evicted meanwhile.
+        """
+        name = clean_name(name)
+        path = self._path(name)
+        while True:
+            try:
+                fh = open(path, 'rb')
+            except FileNotFoundError:
+                pass
+            else:
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    pass  # Evicted by another process after it was opened
+                with self._lock:
+                    self.hits += 1
+                return fh
+            with self._lock:
+                pending = self._fetching.get(name)
+                if pending is None:
+                    pending = self._fetching[name] = {'done': threading.Event(), 'error': None}
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+            pending['done'].wait()
+            if pending['error'] is not None:
+                raise pending['error']
+
+        try:
+            return self._fetch(path, fetch)
+        except Exception as err:
+            pending['error'] = err
+            raise
+        finally:
+            with self._lock:
+                del self._fetching[name]
+            pending['done'].set()
+
+    def _fetch(self, path, fetch):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix=PARTIAL_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fetch(fh)
+            size = os.path.getsize(partial)
+            fh = open(partial, 'rb')
+            if size > self.max_bytes:
+                return fh
+            os.replace(partial, path)
+            self._evict()
+            return fh
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def _evict(self):
+        with self._directory_lock():
+            entries = self._entries()
+            total = sum(size for _, _, size in entries)
+            for _, name, size in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+
+    def invalidate(self, name):
+        """Drop `name` from the cache, e.g. after it was overwritten or deleted."""
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, _, size in entries),
+                'max_bytes': self.max_bytes,
+            }
+
+
+class CachedS3Storage(S3Storage):
+    """
+    S3 storage that keeps recently read files in a LocalReadCache of
+    S3_READ_CACHE_MAX_BYTES (0 disables it), so reviewing the same resumes
+    again reads them from local disk instead of another GET.
+    Writes and deletes through this storage invalidate the cached copy.
+    Resumes are content-addressed, so a cached copy cannot go stale; entries
+    deleted by other hosts just age out of the cache.
+    """
+
+    def __init__(self):
+        super().__init__()
+        max_bytes = getattr(settings, 'S3_READ_CACHE_MAX_BYTES', 0)
+        self.read_cache = None
+        if max_bytes:
+            directory = getattr(settings, 'S3_READ_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'resumes'))
+            self.read_cache = LocalReadCache(directory, max_bytes)
+
+    def _download(self, name, fh):
+        for chunk in super().iter_chunks(name):
+            fh.write(chunk)
+
+    def _open(self, name, mode='rb'):
+        if self.read_cache is None or mode != 'rb':
+            return super()._open(name, mode)
+        return File(self.read_cache.open(name, lambda fh: self._download(name, fh)), name)
+
+    def iter_chunks(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        if self.read_cache is None:
+            yield from super().iter_chunks(name, chunk_size)
+            return
+        with self.read_cache.open(name, lambda fh: self._download(name, fh)) as fh:
+            while chunk := fh.read(chunk_size):
+                yield chunk
+
+    def _save(self, name, content):
+        if self.read_cache is not None:
+            self.read_cache.invalidate(name)
+        return super()._save(name, content)
+
+    def delete(self, name):
+        if self.read_cache is not None:
+            self.read_cache.invalidate(name)
+        super().delete(name)
+
+    def delete_many(self, names):
+        if self.read_cache is not None:
+            for name in names:
+                self.read_cache.invalidate(name)
+        return super().delete_many(names)
+
+    def move(self, old_name, new_name):
+        if self.read_cache is not None:
+            self.read_cache.invalidate(old_name)
+        return super().move(old_name, new_name)
+
+
+class WriteBehindS3Storage(CachedS3Storage):
+    """
+    S3 storage that writes files to a local spool directory and uploads them
+    from background threads, so saving a resume costs a local disk write
+    instead of an S3 PUT.
+    A spooled file is the record of its pending upload: it is written to a
+    temporary name, fsynced and renamed into place before save() returns, and
+    only removed once S3 has the object. Reads are served from the spool until
+    then. Files a crashed or stopped process left behind are uploaded by the
+    upload_spooled_resumes command (`upload_pending()` under `recovery_lock()`),
+    not by every process that loads the app, so they are not uploaded twice.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.spool_dir = getattr(settings, 'S3_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'spool'))
+        self.transfer_config = TransferConfig(
+            multipart_threshold=getattr(settings, 'S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024),
+            multipart_chunksize=getattr(settings, 'S3_MULTIPART_THRESHOLD', 8 * 1024 * 1024),
+            max_concurrency=getattr(settings, 'S3_MULTIPART_CONCURRENCY', 4),
+        )
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._attempts = {}
+        # Names being uploaded, and those of them deleted meanwhile
+        self._uploading = set()
+        self._cancelled = set()
+
+    def _spool_path(self, name):
+        return safe_join(self.spool_dir, clean_name(name))
+
+    def save(self, name, content, max_length=None):
+        # Saving never waits for S3: whether it already has a content-addressed blob is
+        # checked by the background upload (Candidate.save already reuses known blobs).
+        if is_content_addressed(name) and os.path.isfile(self._spool_path(name)):
+            return name
+        return Storage.save(self, name, content, max_length=max_length)
+
+    def _save(self, name, content):
+        name = clean_name(name)
+        path = self._spool_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix=PARTIAL_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        self._enqueue(name)
+        return name
+
+    def _open(self, name, mode='rb'):
+        try:
+            return File(open(self._spool_path(name), mode), name)
+        except FileNotFoundError:
+            return super()._open(name, mode)
+
+    def exists(self, name):
+        return os.path.isfile(self._spool_path(name)) or super().exists(name)
+
+    def size(self, name):
+        try:
+            return os.path.getsize(self._spool_path(name))
+        except FileNotFoundError:
+            return super().size(name)
+
+    def iter_chunks(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        try:
+            fh = open(self._spool_path(name), 'rb')
+        except FileNotFoundError:
+            yield from super().iter_chunks(name, chunk_size)
+            return
+        with fh:
+            while chunk := fh.read(chunk_size):
+                yield chunk
+
+    def delete(self, name):
+        self._unspool(name)
+        super().delete(name)
+
+    def delete_many(self, names):
+        for name in names:
+            self._unspool(name)
+        return super().delete_many(names)
+
+    def _unspool(self, name):
+        # Drop the pending upload; one in progress deletes its object once done
+        name = clean_name(name)
+        with self._lock:
+            try:
+                os.remove(self._spool_path(name))
+            except FileNotFoundError:
+                pass
+            if name in self._uploading:
+                self._cancelled.add(name)
+
+    def move(self, old_name, new_name):
+        # Moving is a server-side copy, so the source has to be uploaded first
+        if os.path.isfile(self._spool_path(old_name)):
+            self._upload(clean_name(old_name))
+        return super().move(old_name, new_name)
+
+    def pending(self, min_age=0):
+        """Names of the spooled files not yet uploaded, skipping those spooled less than `min_age` seconds ago."""
+        names = []
+        spooled_before = time.time() - min_age
+        for root, _, files in os.walk(self.spool_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                if filename.endswith(PARTIAL_SUFFIX):
+                    continue
+                if min_age:
+                    try:
+                        if os.path.getmtime(path) > spooled_before:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                names.append(os.path.relpath(path, self.spool_dir).replace(os.sep, '/'))
+        return sorted(names)
+
+    def _remove_stale_partials(self):
+        # Partial files older than an hour belong to writes that died midway
+        stale_before = time.time() - 3600
+        for root, _, files in os.walk(self.spool_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    if filename.endswith(PARTIAL_SUFFIX) and os.path.getmtime(path) < stale_before:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    @contextmanager
+    def recovery_lock(self):
+        """
+        Exclusive lock of the spool for recovery, held by at most one process;
+        yields whether it was acquired.
+        """
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with open(f"{self.spool_dir.rstrip(os.sep)}.lock", 'a') as fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def recover(self):
+        """Queue the uploads left in the spool by a previous process on this process's workers."""
+        self._remove_stale_partials()
+        names = self.pending()
+        for name in names:
+            self._enqueue(name)
+        if names:
+            logger.info(f"Recovered {len(names)} pending S3 uploads from {self.spool_dir}")
+        return len(names)
+
+    def upload_pending(self, min_age=0):
+        """
+        Upload the spooled files older than `min_age` seconds in the calling
+        thread; returns (uploaded, failed). Younger files may still be uploaded
+        by the process that spooled them.
+        """
+        self._remove_stale_partials()
+        uploaded = failed = 0
+        for name in self.pending(min_age):
+            try:
+                self._upload(name)
+                uploaded += 1
+            except Exception:
+                logger.exception(f"Upload of spooled file {name} to S3 failed")
+                failed += 1
+        return uploaded, failed
+
+    def drain(self, timeout=None):
+        """Wait until the queued uploads are done; returns whether they all finished in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _enqueue(self, name):
+        with self._lock:
+            if not self._workers:
+                for _ in range(getattr(settings, 'S3_UPLOAD_WORKERS', 2)):
+                    worker = threading.Thread(target=self._work, name='s3-write-behind', daemon=True)
+                    worker.start()
+                    self._workers.append(worker)
+                atexit.register(self.drain, getattr(settings, 'S3_UPLOAD_DRAIN_SECONDS', 30))
+        self._queue.put(name)
+
+    def _work(self):
+        while True:
+            name = self._queue.get()
+            try:
+                self._upload(name)
+                self._attempts.pop(name, None)
+            except Exception:
+                # The file stays spooled; retry with exponential backoff
+                attempts = self._attempts[name] = self._attempts.get(name, 0) + 1
+                delay = min(getattr(settings, 'S3_UPLOAD_RETRY_SECONDS', 5) * 2 ** (attempts - 1), 300)
+                logger.exception(f"Upload of spooled file {name} to S3 failed, retrying in {delay}s")
+                retry = threading.Timer(delay, self._queue.put, (name,))
+                retry.daemon = True
+                retry.start()
+            finally:
+                self._queue.task_done()
+
+    def _upload(self, name):
+        path = self._spool_path(name)
+        with self._lock:
+            self._uploading.add(name)
+        try:
+            try:
+                fh = open(path, 'rb')
+            except FileNotFoundError:
+                return  # Deleted, or uploaded by another process
+            with fh:
+                spooled = os.fstat(fh.fileno())
+                # Content-addressed objects S3 already has are identical; skip the PUT
+                if not (is_content_addressed(name) and super().exists(name)):
+                    super()._save(name, File(fh, name))
+        finally:
+            with self._lock:
+                self._uploading.discard(name)
+                cancelled = name in self._cancelled
+                self._cancelled.discard(name)
+        if cancelled:
+            super().delete(name)
+            return
+        try:
+            # Keep the file if it was replaced while uploading; its own upload is queued
+            current = os.stat(path)
+            if (current.st_ino, current.st_mtime_ns) == (spooled.st_ino, spooled.st_mtime_ns):
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class LocalStorage(ContentAddressedMixin, FileSystemStorage):
     """
     Local file storage implementation.
     Extends Django's FileSystemStorage with additional functionality.
@@ -65,6 +737,183 @@ class LocalStorage(FileSystemStorage):
         """Return the URL where the file can be accessed."""
         return super().url(name)
 
+    def iter_chunks(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """Stream the file's content chunk by chunk."""
+        with open(self.path(name), 'rb') as fh:
+            while chunk := fh.read(chunk_size):
+                yield chunk
+
+    def iter_files(self, prefix=''):
+        """
+        Yield (name, size, modified_time) for every file under prefix.
+        Directories are walked lazily with os.scandir, so memory stays bounded
+        however many files they hold.
+        """
+        pending = [self.path(prefix)]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        name = os.path.relpath(entry.path, settings.MEDIA_ROOT).replace(os.sep, '/')
+                        yield name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+
+    def move(self, old_name, new_name):
+        """Move a file within the storage, creating the target directory if needed."""
+        target = self.path(new_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(self.path(old_name), target)
+        return new_name
+
+    def delete_many(self, names):
+        """Delete several files; returns the names that could not be deleted."""
+        failed = []
+        for name in names:
+            try:
+                self.delete(name)
+            except OSError as e:
+                logger.warning(f"Error deleting {name}: {str(e)}")
+                failed.append(name)
+        return failed
+
+
+@deconstructible
+class MemoryStorage(ContentAddressedMixin, Storage):
+    """
+    Storage keeping files in process memory, for tests and benchmarks that
+    should neither touch the disk nor the network.
+    Files have no filesystem path (`path()` raises NotImplementedError), so
+    code using this storage exercises the same streaming reads as with S3.
+    Every operation can be slowed down by `latency` seconds to simulate a
+    remote backend.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self._files = {}  # name -> (content, modified time)
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _content(self, name):
+        with self._lock:
+            try:
+                return self._files[clean_name(name)][0]
+            except KeyError:
+                raise FileNotFoundError(f"File does not exist: {name}")
+
+    def _save(self, name, content):
+        self._delay()
+        name = clean_name(name)
+        data = b''.join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in content.chunks())
+        with self._lock:
+            self._files[name] = (data, datetime.now(timezone.utc))
+        return name
+
+    def _open(self, name, mode='rb'):
+        if any(flag in mode for flag in 'wa+'):
+            raise ValueError(f"MemoryStorage files are read-only once saved (mode {mode!r}).")
+        self._delay()
+        data = self._content(name)
+        return ContentFile(data if 'b' in mode else data.decode(), name=name)
+
+    def exists(self, name):
+        self._delay()
+        with self._lock:
+            return clean_name(name) in self._files
+
+    def delete(self, name):
+        self._delay()
+        with self._lock:
+            self._files.pop(clean_name(name), None)
+
+    def delete_many(self, names):
+        """Delete several files at the latency of one operation, like a batch request."""
+        self._delay()
+        with self._lock:
+            for name in names:
+                self._files.pop(clean_name(name), None)
+        return []
+
+    def size(self, name):
+        self._delay()
+        return len(self._content(name))
+
+    def url(self, name):
+        return urljoin(settings.MEDIA_URL, filepath_to_uri(clean_name(name)))
+
+    def listdir(self, path):
+        self._delay()
+        prefix = clean_name(path).strip('/')
+        prefix = f"{prefix}/" if prefix else ''
+        directories, files = set(), []
+        with self._lock:
+            names = list(self._files)
+        for name in names:
+            if name.startswith(prefix):
+                head, _, tail = name[len(prefix):].partition('/')
+                if tail:
+                    directories.add(head)
+                else:
+                    files.append(head)
+        return sorted(directories), sorted(files)
+
+    def get_modified_time(self, name):
+        self._delay()
+        with self._lock:
+            try:
+                return self._files[clean_name(name)][1]
+            except KeyError:
+                raise FileNotFoundError(f"File does not exist: {name}")
+
+    get_created_time = get_accessed_time = get_modified_time
+
+    def set_modified_time(self, name, modified_time):
+        """Backdate a file, e.g. to simulate old uploads."""
+        with self._lock:
+            name = clean_name(name)
+            self._files[name] = (self._files[name][0], modified_time)
+
+    def iter_chunks(self, name, chunk_size=STREAM_CHUNK_SIZE):
+        """Stream the file's content chunk by chunk."""
+        self._delay()
+        data = self._content(name)
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    def iter_files(self, prefix=''):
+        """Yield (name, size, modified_time) for every file under prefix, in name order."""
+        self._delay()
+        prefix = clean_name(prefix) if prefix else ''
+        with self._lock:
+            entries = sorted((name, len(data), modified) for name, (data, modified) in self._files.items()
+                             if name.startswith(prefix))
+        yield from entries
+
+    def move(self, old_name, new_name):
+        """Rename a file within the storage."""
+        self._delay()
+        new_name = clean_name(new_name)
+        with self._lock:
+            try:
+                self._files[new_name] = self._files.pop(clean_name(old_name))
+            except KeyError:
+                raise FileNotFoundError(f"File does not exist: {old_name}")
+        return new_name
+
+    def clear(self):
+        """Remove every file."""
+        with self._lock:
+            self._files.clear()
+
 
 # Factory function to get the configured storage backend
 def get_storage_backend():
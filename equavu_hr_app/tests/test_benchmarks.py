@@ -0,0 +1,26 @@
+from django.test import TestCase
+from equavu_hr_app import benchmarks
+
+
+class BenchmarkSuiteTest(TestCase):
+    """Test cases for the micro-benchmark suite."""
+
+    def test_benchmarks_run(self):
+        """Test that every benchmark runs against a small data set."""
+        suite = benchmarks.build_benchmarks(sizes=(2,), depths=(1, 3))
+        self.assertEqual(len(suite), 8)
+        for name, func in suite:
+            with self.subTest(name):
+                func()
+
+    def test_measure(self):
+        """Test that measuring returns per-call timings."""
+        result = benchmarks.measure(lambda: sum(range(100)), warmup=1, repeat=3)
+        self.assertLessEqual(result['min'], result['median'])
+        self.assertGreater(result['min'], 0)
+
+    def test_regressions_beyond_threshold(self):
+        """Test that only results slower than baseline * (1 + threshold) are regressions."""
+        baseline = {'results': {'fast': {'min': 1.0}, 'slow': {'min': 1.0}}}
+        results = {'fast': {'min': 1.2}, 'slow': {'min': 1.3}, 'new': {'min': 5.0}}
+        self.assertEqual(benchmarks.find_regressions(results, baseline, 0.25), [('slow', 1.0, 1.3)])
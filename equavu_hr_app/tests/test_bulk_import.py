@@ -0,0 +1,193 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from equavu_hr_app.bulk_import import CandidateImporter
+from equavu_hr_app.models import Candidate, StatusChange, ResumeBlob, CandidateImportJob, Department, ImportStatus
+from io import BytesIO, StringIO
+import json
+import os
+import tempfile
+import threading
+import zipfile
+
+CSV_ROWS = (
+    "full_name,email,date_of_birth,years_of_experience,department,resume\n"
+    "Ann Smith,ann@example.com,1990-01-01,3,IT,ann.pdf\n"
+    "Bob Jones,bob@example.com,1991-02-02,5,HR,bob.docx\n"
+    "Ann Again,ann@example.com,1990-01-01,3,IT,ann.pdf\n"
+    "Cid Null,cid@example.com,1992-03-03,1,SALES,cid.pdf\n"
+    "Dee Gone,dee@example.com,1993-04-04,2,FINANCE,missing.pdf\n"
+    "Eve Twin,eve@example.com,1994-05-05,4,FINANCE,ann-copy.pdf\n"
+)
+
+
+def resume_archive():
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('ann.pdf', b"%PDF- ann resume")
+        archive.writestr('ann-copy.pdf', b"%PDF- ann resume")
+        archive.writestr('bob.docx', b"PK\x03\x04 bob resume")
+        archive.writestr('cid.pdf', b"%PDF- cid resume")
+        archive.writestr('fake.pdf', b"MZ not a pdf")
+    return buffer.getvalue()
+
+
+class CandidateBulkImportTest(TransactionTestCase):
+    """Test cases for bulk candidate import; API imports run in a background thread."""
+
+    def setUp(self):
+        """Set up the client and an existing candidate."""
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.import_url = reverse('equavo_hr_app:admin-candidate-import')
+        self.existing = Candidate.objects.create(
+            full_name="Bob Existing",
+            email="existing@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("bob.docx", b"PK\x03\x04 bob resume")
+        )
+
+    def tearDown(self):
+        """Clean up after tests."""
+        storage = Candidate._meta.get_field('resume').storage
+        for blob in ResumeBlob.objects.all():
+            if storage.exists(blob.name):
+                storage.delete(blob.name)
+
+    def _post(self, rows, rows_name='rows.csv', **extra):
+        return self.client.post(self.import_url, {
+            'rows': SimpleUploadedFile(rows_name, rows.encode('utf-8')),
+            'resumes': SimpleUploadedFile('resumes.zip', resume_archive()),
+            **extra
+        }, format='multipart')
+
+    def _wait(self, response):
+        """Wait for the background import started by a response and return the polled job."""
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.json()['id']
+        for thread in threading.enumerate():
+            if thread.name == f"import-{job_id}":
+                thread.join(timeout=30)
+        return self.client.get(response['Location']).json()
+
+    def test_import_with_error_report(self):
+        """Test that valid rows are imported and invalid ones are reported per row."""
+        response = self._post(CSV_ROWS)
+
+        self.assertEqual(response.json()['status'], ImportStatus.RUNNING)
+        data = self._wait(response)
+        self.assertEqual(data['status'], ImportStatus.COMPLETED)
+        self.assertEqual(data['imported_count'], 3)
+        self.assertEqual(data['rows_processed'], 6)
+        self.assertEqual({error['row']: list(error['errors']) for error in data['errors']},
+                         {3: ['email'], 4: ['department'], 5: ['resume']})
+
+        ann = Candidate.objects.get(email='ann@example.com')
+        self.assertEqual(StatusChange.objects.filter(candidate=ann).count(), 1)
+        # Identical resumes share one blob, including the one uploaded by registration
+        eve = Candidate.objects.get(email='eve@example.com')
+        self.assertEqual(eve.resume.name, ann.resume.name)
+        self.assertEqual(ResumeBlob.objects.get(sha256=ann.resume_sha256).ref_count, 2)
+        bob = Candidate.objects.get(email='bob@example.com')
+        self.assertEqual(bob.resume.name, self.existing.resume.name)
+        self.assertEqual(ResumeBlob.objects.get(sha256=bob.resume_sha256).ref_count, 2)
+
+    def test_resumes_not_held_in_memory_until_uploaded(self):
+        """Test that validated rows keep only the digest of their resume, which is read again to upload it."""
+        importer = CandidateImporter(SimpleUploadedFile('rows.csv', CSV_ROWS.encode('utf-8')),
+                                     BytesIO(resume_archive()))
+        batch = [(1, {'full_name': 'Cid Null', 'email': 'cid@example.com', 'date_of_birth': '1992-03-03',
+                      'years_of_experience': 1, 'department': 'IT', 'resume': 'cid.pdf'})]
+        rows, _ = importer._validate(batch)
+        self.assertIsNone(rows[0][1]['resume'].file)
+
+        with transaction.atomic():
+            importer._insert(rows, importer._store_resumes(rows))
+        with Candidate.objects.get(email='cid@example.com').resume.open('rb') as resume:
+            self.assertEqual(resume.read(), b"%PDF- cid resume")
+
+    def test_resume_interrupted_import(self):
+        """Test that resuming a job skips the rows before its checkpoint."""
+        job = CandidateImportJob.objects.create(source_name='rows.csv', status=ImportStatus.FAILED, rows_processed=1)
+
+        self._wait(self._post(CSV_ROWS, job=str(job.id)))
+
+        self.assertFalse(Candidate.objects.filter(email='ann@example.com', full_name='Ann Smith').exists())
+        self.assertEqual(Candidate.objects.get(email='ann@example.com').full_name, 'Ann Again')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportStatus.COMPLETED)
+        self.assertEqual(job.imported_count, 3)
+        self.assertEqual(os.listdir(settings.BULK_IMPORT_STAGING_DIR), [])
+
+    def test_running_import_not_resumed_twice(self):
+        """Test that a job still checkpointing cannot be resumed by a second import."""
+        job = CandidateImportJob.objects.create(source_name='rows.csv', status=ImportStatus.RUNNING, rows_processed=1)
+
+        response = self._post(CSV_ROWS, job=str(job.id))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Candidate.objects.filter(email='ann@example.com').exists())
+
+    def test_resume_content_checked_against_extension(self):
+        """Test that archived resumes whose first bytes do not match their extension are rejected."""
+        rows = CSV_ROWS.splitlines()[0] + "\nFay Fake,fay@example.com,1995-06-06,2,IT,fake.pdf\n"
+
+        data = self._wait(self._post(rows))
+
+        self.assertEqual(data['errors'], [{'row': 1, 'email': 'fay@example.com',
+                                           'errors': {'resume': ["The file content does not match its extension."]}}])
+        self.assertFalse(Candidate.objects.filter(email='fay@example.com').exists())
+
+    @override_settings(BULK_IMPORT_MAX_ERRORS=2, BULK_IMPORT_BATCH_SIZE=2)
+    def test_error_report_capped(self):
+        """Test that the error report keeps the first rejected rows while error_count counts them all."""
+        job = CandidateImporter(SimpleUploadedFile('rows.csv', CSV_ROWS.encode('utf-8')),
+                                BytesIO(resume_archive())).run()
+
+        self.assertEqual(job.error_count, 3)
+        self.assertEqual([error['row'] for error in job.errors], [3, 4])
+        self.assertEqual(job.imported_count, 3)
+
+    def test_invalid_archive_rejected(self):
+        """Test that a resumes file that is not a ZIP archive is rejected."""
+        response = self.client.post(self.import_url, {
+            'rows': SimpleUploadedFile('rows.csv', CSV_ROWS.encode('utf-8')),
+            'resumes': SimpleUploadedFile('resumes.zip', b"not a zip"),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_command_with_ndjson(self):
+        """Test the import_candidates command with NDJSON rows and an error report."""
+        rows = [
+            {'full_name': 'Ann Smith', 'email': 'ann@example.com', 'date_of_birth': '1990-01-01',
+             'years_of_experience': 3, 'department': 'IT', 'resume': 'ann.pdf'},
+            {'full_name': 'Bad Row', 'email': 'not-an-email', 'date_of_birth': '1990-01-01',
+             'years_of_experience': 3, 'department': 'IT', 'resume': 'cid.pdf'},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            rows_path = os.path.join(directory, 'rows.ndjson')
+            zip_path = os.path.join(directory, 'resumes.zip')
+            report_path = os.path.join(directory, 'report.csv')
+            with open(rows_path, 'w') as fh:
+                fh.write("\n".join(json.dumps(row) for row in rows) + "\nnot json\n")
+            with open(zip_path, 'wb') as fh:
+                fh.write(resume_archive())
+
+            out = StringIO()
+            call_command('import_candidates', rows_path, zip_path, '--report', report_path, stdout=out)
+
+            with open(report_path) as fh:
+                report = fh.read()
+
+        self.assertIn("Imported 1 candidates, rejected 2 rows", out.getvalue())
+        self.assertTrue(Candidate.objects.filter(email='ann@example.com').exists())
+        self.assertIn("not-an-email", report)
+        self.assertIn("Malformed row.", report)
@@ -0,0 +1,253 @@
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest import mock
+from equavu_hr_app import db_router
+from equavu_hr_app.db_router import PrimaryReplicaRouter
+from equavu_hr_app.middleware import ReplicaRoutingMiddleware, PRIMARY_PIN_COOKIE
+from equavu_hr_app.models import ApplicationStatus, Candidate, Department
+from equavu_hr_app.tracing import TraceContextFilter, sanitize_statement, start_trace
+import json
+import logging
+import os
+import tempfile
+import time
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+@mock.patch('equavu_hr_app.db_router.in_primary_transaction', return_value=False)
+class ReplicaRoutingTest(TestCase):
+    """Test cases for read replica routing with read-your-writes stickiness."""
+
+    def setUp(self):
+        """Set up a middleware that records where reads would be routed."""
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.read_db = None
+
+        def view(request):
+            self.read_db = self.router.db_for_read(Candidate)
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        self.middleware = ReplicaRoutingMiddleware(view)
+
+    @mock.patch('equavu_hr_app.db_router.is_replica_healthy', return_value=True)
+    def test_safe_requests_read_from_replica(self, *mocks):
+        """Test that GET requests read from a healthy replica and writes use the primary."""
+        self.middleware(self.factory.get('/api/admin/candidates/'))
+        self.assertEqual(self.read_db, 'replica')
+        self.assertEqual(self.router.db_for_write(Candidate), 'default')
+
+        self.middleware(self.factory.post('/api/candidates/register/'))
+        self.assertEqual(self.read_db, 'default')
+
+    @mock.patch('equavu_hr_app.db_router.is_replica_healthy', return_value=True)
+    def test_client_pinned_to_primary_after_write(self, *mocks):
+        """Test that a client reads its own write from the primary right after making it."""
+        response = self.middleware(self.factory.put('/api/admin/candidates/1/status/'))
+        pin = response.cookies[PRIMARY_PIN_COOKIE].value
+
+        request = self.factory.get('/api/admin/candidates/1/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = pin
+        self.middleware(request)
+        self.assertEqual(self.read_db, 'default')
+
+        request.COOKIES[PRIMARY_PIN_COOKIE] = str(time.time() - 1)
+        self.middleware(request)
+        self.assertEqual(self.read_db, 'replica')
+
+    @mock.patch('equavu_hr_app.db_router.is_replica_healthy', return_value=False)
+    def test_lagging_replica_falls_back_to_primary(self, *mocks):
+        """Test that reads go to the primary when no replica is healthy."""
+        self.middleware(self.factory.get('/api/admin/candidates/'))
+        self.assertEqual(self.read_db, 'default')
+
+    def test_reads_outside_requests_use_primary(self, *mocks):
+        """Test that management commands and other code outside requests read from the primary."""
+        self.assertEqual(self.router.db_for_read(Candidate), 'default')
+
+
+class ReplicaDatabaseRoutingTest(TransactionTestCase):
+    """
+    Test cases for replica routing of real requests over the test replica connection.
+    The test replica mirrors the test database and reports no replication of its
+    own, so the lag it reports is set by each test.
+    """
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        """Set up a candidate and an admin client."""
+        db_router._health.clear()
+        self.replica = settings.DATABASE_REPLICAS[0]
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf")
+        )
+        self.detail_url = reverse('equavo_hr_app:admin-candidate-detail', args=[self.candidate.id])
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db_router._health.clear()
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    def _request(self, method, url, **kwargs):
+        """Make a request; returns the number of (primary, replica) queries it ran."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[self.replica]) as replica:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(primary), len(replica)
+
+    @mock.patch('equavu_hr_app.db_router.replica_lag', return_value=0)
+    def test_reads_replica_writes_and_pinned_reads_primary(self, replica_lag):
+        """Test that reads use the replica, while writes and the writer's next reads use the primary."""
+        primary, replica = self._request('get', self.detail_url)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        replica_lag.assert_called_with(self.replica)
+
+        status_url = reverse('equavo_hr_app:admin-status-update', args=[self.candidate.id])
+        primary, replica = self._request('put', status_url, data={'status': ApplicationStatus.UNDER_REVIEW},
+                                         format='json')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # The pin cookie set by the write keeps this client on the primary
+        primary, replica = self._request('get', self.detail_url)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        self.client.cookies.pop(PRIMARY_PIN_COOKIE)
+        primary, replica = self._request('get', self.detail_url)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    @override_settings(REPLICA_MAX_LAG_SECONDS=5)
+    @mock.patch('equavu_hr_app.db_router.replica_lag', return_value=30)
+    def test_lagging_replica_falls_back_to_primary(self, replica_lag):
+        """Test that a replica behind by more than the limit is skipped until its next check."""
+        for _ in range(2):
+            primary, replica = self._request('get', self.detail_url)
+            self.assertGreater(primary, 0)
+            self.assertEqual(replica, 0)
+        # The check result is reused until REPLICA_HEALTH_CHECK_INTERVAL passes
+        self.assertEqual(replica_lag.call_count, 1)
+
+    @mock.patch('equavu_hr_app.db_router.replica_lag', side_effect=ConnectionError("replica down"))
+    def test_unreachable_replica_falls_back_to_primary(self, replica_lag):
+        """Test that a replica failing its check is skipped."""
+        primary, replica = self._request('get', self.detail_url)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+
+class TracingTest(TestCase):
+    """Test cases for request tracing."""
+
+    def setUp(self):
+        """Set up a temporary export file."""
+        fd, self.export_path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+
+    def tearDown(self):
+        """Clean up the export file and registered resumes."""
+        os.remove(self.export_path)
+        for candidate in Candidate.objects.all():
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _register(self, **headers):
+        return APIClient().post(reverse('equavo_hr_app:candidate-register'), {
+            'full_name': "New User",
+            'email': "new@example.com",
+            'date_of_birth': "1995-05-05",
+            'years_of_experience': 3,
+            'department': Department.HR,
+            'resume': SimpleUploadedFile("resume.pdf", b"%PDF-1.4 resume", content_type="application/pdf"),
+        }, format='multipart', **headers)
+
+    def _exported_spans(self):
+        with open(self.export_path) as fh:
+            return [span for line in fh
+                    for resource in json.loads(line)['resourceSpans']
+                    for scope in resource['scopeSpans']
+                    for span in scope['spans']]
+
+    def test_sampled_request_exports_spans(self):
+        """Test that a sampled registration exports its root span with query, storage and email spans."""
+        with override_settings(TRACING_SAMPLE_RATE=1, TRACING_EXPORT_PATH=self.export_path):
+            response = self._register()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        spans = self._exported_spans()
+        root = next(span for span in spans if 'parentSpanId' not in span)
+        self.assertEqual(root['name'], "POST api/candidates/register/")
+        self.assertEqual(response['X-Trace-Id'], root['traceId'])
+        names = {span['name'] for span in spans}
+        self.assertTrue({'db.query', 'storage.save', 'email.send'} <= names, names)
+
+        span_ids = {span['spanId'] for span in spans}
+        for span in spans:
+            self.assertEqual(span['traceId'], root['traceId'])
+            self.assertLessEqual(int(span['startTimeUnixNano']), int(span['endTimeUnixNano']))
+            if span is not root:
+                self.assertIn(span['parentSpanId'], span_ids)
+
+    def test_traceparent_sets_trace_id(self):
+        """Test that the trace continues the one of an incoming traceparent header."""
+        trace_id, parent_id = 'ab' * 16, 'cd' * 8
+        with override_settings(TRACING_SAMPLE_RATE=1, TRACING_EXPORT_PATH=self.export_path):
+            self._register(HTTP_TRACEPARENT=f"00-{trace_id}-{parent_id}-01")
+
+        root = next(span for span in self._exported_spans() if span.get('parentSpanId') == parent_id)
+        self.assertEqual(root['traceId'], trace_id)
+
+    def test_statements_exported_without_values(self):
+        """Test that exported statements hold neither query parameters nor inlined literals."""
+        with override_settings(TRACING_SAMPLE_RATE=1, TRACING_EXPORT_PATH=self.export_path):
+            self._register()
+
+        statements = [attribute['value']['stringValue'] for span in self._exported_spans()
+                      for attribute in span['attributes'] if attribute['key'] == 'db.statement']
+        self.assertTrue(statements)
+        self.assertFalse([statement for statement in statements if "new@example.com" in statement])
+        self.assertEqual(sanitize_statement("SELECT * FROM t1 WHERE name = 'O''Hara' AND age > 30 LIMIT %s"),
+                         "SELECT * FROM t1 WHERE name = ? AND age > ? LIMIT %s")
+
+    def test_app_log_records_carry_trace_id(self):
+        """Test that records logged by views reach the configured handlers with the request's trace ID."""
+        handlers = logging.getLogger('equavu_hr_app').handlers
+        self.assertTrue(handlers)
+        with override_settings(TRACING_SAMPLE_RATE=1, TRACING_EXPORT_PATH=self.export_path), \
+                mock.patch.object(handlers[0], 'emit') as emit:
+            response = self._register()
+
+        records = [call.args[0] for call in emit.call_args_list if call.args[0].name == 'equavu_hr_app.views']
+        self.assertTrue(records)
+        for record in records:
+            self.assertEqual(record.trace_id, response['X-Trace-Id'])
+
+    def test_unsampled_request_exports_nothing(self):
+        """Test that requests outside the sample record no spans but still have a trace ID for logs."""
+        with override_settings(TRACING_SAMPLE_RATE=0, TRACING_EXPORT_PATH=self.export_path):
+            response = self._register()
+            with start_trace('job') as span:
+                record = logging.LogRecord('test', logging.INFO, __file__, 1, "message", None, None)
+                TraceContextFilter().filter(record)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.has_header('X-Trace-Id'))
+        self.assertEqual(os.path.getsize(self.export_path), 0)
+        self.assertEqual(record.trace_id, span.trace_id)
+        self.assertEqual(record.span_id, span.span_id)
@@ -1,7 +1,17 @@
+from contextlib import contextmanager
+from django.db import connections
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from equavu_hr_app.models import Candidate, StatusChange, Department, ApplicationStatus
-import os
+from django.utils import timezone
+from equavu_hr_app.analytics import _save_states
+from equavu_hr_app.email_registry import BloomFilter, email_registry
+from equavu_hr_app.models import (
+    Candidate, CandidateTombstone, FunnelCandidateState, StatusChange, Department, ApplicationStatus
+)
+from equavu_hr_app.signals import candidates_deleted
+from unittest import mock
+import uuid
 
 
 class CandidateModelTest(TestCase):
@@ -31,8 +41,7 @@ class CandidateModelTest(TestCase):
         """Clean up after tests."""
         # Delete test files
         if self.candidate.resume:
-            if os.path.isfile(self.candidate.resume.path):
-                os.remove(self.candidate.resume.path)
+            self.candidate.resume.storage.delete(self.candidate.resume.name)
 
     def test_candidate_creation(self):
         """Test that a candidate can be created with valid data."""
@@ -105,8 +114,7 @@ class StatusChangeModelTest(TestCase):
         """Clean up after tests."""
         # Delete test files
         if self.candidate.resume:
-            if os.path.isfile(self.candidate.resume.path):
-                os.remove(self.candidate.resume.path)
+            self.candidate.resume.storage.delete(self.candidate.resume.name)
 
     def test_status_change_creation(self):
         """Test that a status change can be created with valid data."""
@@ -138,3 +146,78 @@ class StatusChangeModelTest(TestCase):
         # The second status change should be first in the list (most recent)
         self.assertEqual(status_changes[0], second_status_change)
         self.assertEqual(status_changes[1], self.status_change)
+
+
+class EmailRegistryTest(TestCase):
+    """Test cases for the registered-email Bloom filter."""
+
+    def test_bloom_filter_membership(self):
+        """Test that added values are always reported as possibly present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        emails = [f"user{i}@example.com" for i in range(1000)]
+        for email in emails:
+            bloom.add(email)
+
+        self.assertTrue(all(email in bloom for email in emails))
+        false_positives = sum(f"other{i}@example.com" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_registry_confirms_against_database(self):
+        """Test that the registry reports registered emails and tracks new candidates."""
+        email_registry.reset()
+        self.assertFalse(email_registry.is_registered("late@example.com"))
+
+        candidate = Candidate.objects.create(
+            full_name="Late User",
+            email="late@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=1,
+            department=Department.HR,
+            resume=SimpleUploadedFile("late.pdf", b"late resume", content_type="application/pdf")
+        )
+        self.assertTrue(email_registry.is_registered("late@example.com"))
+        self.assertFalse(email_registry.is_registered("never@example.com"))
+        candidate.resume.storage.delete(candidate.resume.name)
+
+
+class BulkUpsertTest(TestCase):
+    """Test cases for the upserts of bulk_upsert on the production MySQL backend."""
+
+    @contextmanager
+    def mysql_statements(self):
+        """Route writes to an unconnected MySQL 8 backend and yield the SQL statements it is sent."""
+        mysql = MySQLDatabaseWrapper({**connections.settings['default'], 'ENGINE': 'django.db.backends.mysql'},
+                                     alias='mysql')
+        mysql.mysql_server_data = {'version': '8.0.36', 'sql_mode': '', 'default_isolation_level': 'repeatable read',
+                                   'has_zoneinfo_database': True, 'lower_case_table_names': 0,
+                                   'sql_auto_is_null': False}
+        connections['mysql'] = mysql
+        statements = []
+        try:
+            with mock.patch('equavu_hr_app.models.router.db_for_write', return_value='mysql'), \
+                    mock.patch.object(mysql, 'ensure_connection'), \
+                    mock.patch.object(mysql, 'connection', create=True) as raw:
+                yield statements
+                statements.extend(call.args[0] for call in raw.cursor.return_value.execute.call_args_list)
+        finally:
+            del connections['mysql']
+
+    def test_tombstones_upserted_on_mysql(self):
+        """Test that deleted candidates' tombstones are upserted with ON DUPLICATE KEY UPDATE."""
+        with self.mysql_statements() as statements:
+            candidates_deleted([Candidate(id=uuid.uuid4())])
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn(f"INSERT INTO `{CandidateTombstone._meta.db_table}`", statements[0])
+        self.assertIn("ON DUPLICATE KEY UPDATE `deleted_at` = new.`deleted_at`", statements[0])
+
+    def test_funnel_states_upserted_on_mysql(self):
+        """Test that the funnel engine's candidate states are upserted with ON DUPLICATE KEY UPDATE."""
+        with self.mysql_statements() as statements:
+            _save_states([FunnelCandidateState(candidate_id=uuid.uuid4(), status=ApplicationStatus.SUBMITTED,
+                                               entered_at=timezone.now())])
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn(f"INSERT INTO `{FunnelCandidateState._meta.db_table}`", statements[0])
+        self.assertIn("ON DUPLICATE KEY UPDATE `status` = new.`status`, `entered_at` = new.`entered_at`",
+                      statements[0])
@@ -1,14 +1,19 @@
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
-from equavu_hr_app.models import Candidate, StatusChange, Department, ApplicationStatus
+from django.core.management import call_command
+from django.utils import timezone
+from equavu_hr_app.models import Candidate, StatusChange, StatusChangeArchive, Department, ApplicationStatus
 from equavu_hr_app.serializers import (
+    CANDIDATE_FILTER_INDEXES,
+    CandidateFilterSerializer,
     CandidateListSerializer,
     CandidateDetailSerializer,
     CandidateCreateSerializer,
     StatusChangeSerializer,
     StatusUpdateSerializer
 )
-import os
+from datetime import timedelta
+from io import StringIO
 
 
 class CandidateSerializerTest(TestCase):
@@ -47,8 +52,7 @@ class CandidateSerializerTest(TestCase):
         """Clean up after tests."""
         # Delete test files
         if self.candidate.resume:
-            if os.path.isfile(self.candidate.resume.path):
-                os.remove(self.candidate.resume.path)
+            self.candidate.resume.storage.delete(self.candidate.resume.name)
 
     def test_candidate_list_serializer(self):
         """Test the CandidateListSerializer."""
@@ -142,3 +146,71 @@ class CandidateSerializerTest(TestCase):
         serializer = StatusUpdateSerializer(data=invalid_data)
         self.assertFalse(serializer.is_valid())
         self.assertIn('status', serializer.errors)
+
+    def test_candidate_filter_combinations_have_indexes(self):
+        """Test that every accepted filter combination is served by a model index."""
+        indexes = {tuple(index.fields) for index in Candidate._meta.indexes}
+        for combination, fields in CANDIDATE_FILTER_INDEXES.items():
+            self.assertIn(fields, indexes, combination)
+
+        serializer = CandidateFilterSerializer(data={'department': 'IT,HR', 'created_before': '2025-01-01'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['department'], ['HR', 'IT'])
+
+
+class ArchivedStatusHistoryTest(TestCase):
+    """Test cases for archiving old status history of closed candidates."""
+
+    def setUp(self):
+        """Set up a rejected candidate with old and recent history."""
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf"),
+            current_status=ApplicationStatus.REJECTED
+        )
+        old = timezone.now() - timedelta(days=400)
+        StatusChange.objects.create(candidate=self.candidate, new_status=ApplicationStatus.SUBMITTED,
+                                    feedback="Submitted.", created_at=old)
+        StatusChange.objects.create(candidate=self.candidate, previous_status=ApplicationStatus.SUBMITTED,
+                                    new_status=ApplicationStatus.UNDER_REVIEW, feedback="Reviewing.",
+                                    created_at=old + timedelta(days=1))
+        StatusChange.objects.create(candidate=self.candidate, previous_status=ApplicationStatus.UNDER_REVIEW,
+                                    new_status=ApplicationStatus.REJECTED, feedback="Rejected.")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    def test_old_history_archived(self):
+        """Test that only old changes of closed candidates move to the archive."""
+        call_command('archive_status_history', stdout=StringIO())
+
+        self.assertEqual(StatusChange.objects.filter(candidate=self.candidate).count(), 1)
+        archive = StatusChangeArchive.objects.get(candidate=self.candidate)
+        self.assertEqual(archive.change_count, 2)
+        self.assertEqual([change['new_status'] for change in archive.changes()],
+                         [ApplicationStatus.UNDER_REVIEW, ApplicationStatus.SUBMITTED])
+
+    def test_detail_serializer_includes_archive_when_asked(self):
+        """Test that archived history is returned transparently on request."""
+        call_command('archive_status_history', stdout=StringIO())
+
+        data = CandidateDetailSerializer(self.candidate).data
+        self.assertEqual(len(data['status_changes']), 1)
+
+        data = CandidateDetailSerializer(self.candidate, context={'include_archived': True}).data
+        self.assertEqual([change['new_status'] for change in data['status_changes']],
+                         [ApplicationStatus.REJECTED, ApplicationStatus.UNDER_REVIEW, ApplicationStatus.SUBMITTED])
+        self.assertEqual(data['status_changes'][1]['feedback'], "Reviewing.")
+
+    def test_open_candidates_not_archived(self):
+        """Test that candidates still in progress keep their full history."""
+        Candidate.objects.filter(id=self.candidate.id).update(current_status=ApplicationStatus.UNDER_REVIEW)
+        call_command('archive_status_history', stdout=StringIO())
+
+        self.assertEqual(StatusChange.objects.filter(candidate=self.candidate).count(), 3)
+        self.assertFalse(StatusChangeArchive.objects.exists())
@@ -0,0 +1,720 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from botocore.exceptions import EndpointConnectionError
+from equavu_hr_app.circuit_breaker import CircuitBreaker, DependencyUnavailable, get_breaker
+from equavu_hr_app.models import (
+    ApplicationStatus,
+    Candidate,
+    CandidateTombstone,
+    Department,
+    QueuedEmail,
+    ResumeBlob,
+    StatusChange
+)
+from equavu_hr_app.storage import (
+    CONTENT_ADDRESSED_PREFIX,
+    CachedS3Storage,
+    LocalReadCache,
+    MemoryStorage,
+    S3Storage,
+    StorageManager,
+    WriteBehindS3Storage,
+    content_hash,
+    is_content_addressed
+)
+from io import StringIO
+from storages.backends.s3boto3 import S3Boto3Storage
+from unittest import mock
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+class ContentAddressedResumeTest(TestCase):
+    """Test cases for content-addressed resume storage."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.content = b"content-addressed resume"
+        self.candidate = self._create_candidate("first@example.com", self.content)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        storage = Candidate._meta.get_field('resume').storage
+        for candidate in Candidate.objects.all():
+            if candidate.resume:
+                storage.delete(candidate.resume.name)
+        for blob in ResumeBlob.objects.all():
+            if storage.exists(blob.name):
+                storage.delete(blob.name)
+
+    def _create_candidate(self, email, content):
+        return Candidate.objects.create(
+            full_name="Test User",
+            email=email,
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("resume.pdf", content, content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+
+    def test_resume_stored_by_content_hash(self):
+        """Test that the resume name and recorded hash are derived from the content."""
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(self.candidate.resume_sha256, digest)
+        self.assertTrue(is_content_addressed(self.candidate.resume.name))
+        self.assertIn(digest, self.candidate.resume.name)
+        self.assertEqual(content_hash(ContentFile(self.content)), digest)
+
+    def test_identical_resumes_share_one_blob(self):
+        """Test that identical uploads reference the same stored blob."""
+        second = self._create_candidate("second@example.com", self.content)
+
+        self.assertEqual(second.resume.name, self.candidate.resume.name)
+        blob = ResumeBlob.objects.get(sha256=self.candidate.resume_sha256)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, len(self.content))
+
+    def test_blob_deleted_only_when_unused(self):
+        """Test that a shared blob survives until its last reference is deleted."""
+        second = self._create_candidate("second@example.com", self.content)
+        storage, name = self.candidate.resume.storage, self.candidate.resume.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidate.delete()
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(ResumeBlob.objects.get(sha256=second.resume_sha256).ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(ResumeBlob.objects.exists())
+
+    def test_reuse_reads_size_from_blob(self):
+        """Test that referencing a stored blob neither uploads the file again nor asks storage for its size."""
+        storage = Candidate._meta.get_field('resume').storage
+        with mock.patch.object(type(storage), 'size', side_effect=AssertionError("size requested")), \
+                mock.patch.object(type(storage), 'save', side_effect=AssertionError("uploaded again")):
+            second = self._create_candidate("second@example.com", self.content)
+
+        self.assertEqual(second.resume.name, self.candidate.resume.name)
+        self.assertEqual(ResumeBlob.objects.get(sha256=second.resume_sha256).size, len(self.content))
+
+    def test_file_kept_when_stored_again_before_deletion(self):
+        """Test that a released blob's file survives if the same content is uploaded before it is deleted."""
+        storage, name = self.candidate.resume.storage, self.candidate.resume.name
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.candidate.delete()
+        second = self._create_candidate("second@example.com", self.content)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(second.resume.name, name)
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(ResumeBlob.objects.get(sha256=second.resume_sha256).ref_count, 1)
+
+    def test_dedupe_resumes_command(self):
+        """Test that legacy resumes are rehashed onto content-addressed blobs."""
+        storage = Candidate._meta.get_field('resume').storage
+        legacy_name = storage.save("resumes/legacy/resume.pdf", ContentFile(self.content))
+        legacy = self._create_candidate("legacy@example.com", b"placeholder")
+        ResumeBlob.objects.filter(sha256=legacy.resume_sha256).update(ref_count=0)
+        Candidate.objects.filter(id=legacy.id).update(resume=legacy_name, resume_sha256='')
+
+        out = StringIO()
+        call_command('dedupe_resumes', stdout=out)
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.resume.name, self.candidate.resume.name)
+        self.assertEqual(legacy.resume_sha256, self.candidate.resume_sha256)
+        self.assertFalse(storage.exists(legacy_name))
+        self.assertEqual(ResumeBlob.objects.get(sha256=legacy.resume_sha256).ref_count, 2)
+        self.assertIn("1 duplicates", out.getvalue())
+
+
+class OrphanedResumeCollectorTest(TestCase):
+    """Test cases for the collect_orphaned_resumes command."""
+
+    def setUp(self):
+        """Set up a referenced resume and an old orphaned file."""
+        self.storage = Candidate._meta.get_field('resume').storage
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("resume.pdf", b"referenced resume", content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+        self.orphan = self.storage.save("resumes/orphan/resume.pdf", ContentFile(b"orphaned resume"))
+        self.recent = self.storage.save("resumes/recent/resume.pdf", ContentFile(b"in-flight resume"))
+        old = time.time() - 2 * 24 * 3600
+        for name in (self.candidate.resume.name, self.orphan):
+            if isinstance(self.storage, MemoryStorage):
+                self.storage.set_modified_time(name, datetime.fromtimestamp(old, tz=dt_timezone.utc))
+            else:
+                os.utime(self.storage.path(name), (old, old))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for name in (self.candidate.resume.name, self.orphan, self.recent, f"quarantine/{self.orphan}"):
+            if self.storage.exists(name):
+                self.storage.delete(name)
+
+    def test_dry_run_keeps_files(self):
+        """Test that a dry run only reports orphans."""
+        out = StringIO()
+        call_command('collect_orphaned_resumes', '--dry-run', stdout=out)
+
+        self.assertIn(f"Orphaned: {self.orphan}", out.getvalue())
+        self.assertTrue(self.storage.exists(self.orphan))
+
+    def test_orphans_deleted(self):
+        """Test that only old unreferenced files are deleted."""
+        call_command('collect_orphaned_resumes', '--batch-size', '1', stdout=StringIO())
+
+        self.assertFalse(self.storage.exists(self.orphan))
+        self.assertTrue(self.storage.exists(self.recent))
+        self.assertTrue(self.storage.exists(self.candidate.resume.name))
+
+    def test_released_blob_files_collected_unless_referenced_again(self):
+        """Test that content-addressed orphans are deleted only while no blob references them."""
+        stale = self.storage.save(f"{CONTENT_ADDRESSED_PREFIX}ab/{'ab' * 32}.pdf", ContentFile(b"released resume"))
+        ResumeBlob.objects.filter(sha256=self.candidate.resume_sha256).update(ref_count=0)
+        Candidate.objects.filter(id=self.candidate.id).update(resume="resumes/elsewhere/resume.pdf")
+        # Referenced again after the batch query, as by an upload of the same content meanwhile
+        unused_names = ResumeBlob.unused_names.__func__
+
+        def referenced_again(cls, blobs):
+            ResumeBlob.objects.filter(sha256=self.candidate.resume_sha256).update(ref_count=1)
+            return unused_names(cls, blobs)
+
+        with mock.patch.object(ResumeBlob, 'unused_names', classmethod(referenced_again)):
+            call_command('collect_orphaned_resumes', '--min-age-hours', '0', stdout=StringIO())
+
+        self.assertFalse(self.storage.exists(stale))
+        self.assertTrue(self.storage.exists(self.candidate.resume.name))
+
+    def test_orphans_quarantined(self):
+        """Test that orphans can be moved aside instead of deleted."""
+        call_command('collect_orphaned_resumes', '--quarantine', 'quarantine', stdout=StringIO())
+
+        self.assertFalse(self.storage.exists(self.orphan))
+        self.assertTrue(self.storage.exists(f"quarantine/{self.orphan}"))
+
+
+class RetentionPurgeTest(TestCase):
+    """Test cases for the purge_expired_candidates command."""
+
+    def setUp(self):
+        """Set up two expired candidates, one sharing its resume with a recent candidate."""
+        self.storage = Candidate._meta.get_field('resume').storage
+        self.expired = [self._create_candidate("old1@example.com", b"%PDF-1.4 old resume"),
+                        self._create_candidate("old2@example.com", b"%PDF-1.4 shared resume")]
+        self.recent = self._create_candidate("recent@example.com", b"%PDF-1.4 shared resume")
+        for candidate in self.expired:
+            StatusChange.objects.create(candidate=candidate, new_status=ApplicationStatus.REJECTED)
+        Candidate.objects.filter(id__in=[c.id for c in self.expired]).update(
+            updated_at=timezone.now() - timedelta(days=settings.CANDIDATE_RETENTION_DAYS + 1))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for candidate in self.expired + [self.recent]:
+            if self.storage.exists(candidate.resume.name):
+                self.storage.delete(candidate.resume.name)
+
+    def _create_candidate(self, email, content):
+        return Candidate.objects.create(
+            full_name="Test User",
+            email=email,
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("resume.pdf", content, content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+
+    def test_expired_candidates_purged(self):
+        """Test that expired candidates, their history and unshared resumes are deleted in batches."""
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purge_expired_candidates', '--batch-size', '1', '--sleep', '0', stdout=out)
+
+        self.assertIn("Batch 2: deleted 1 candidates", out.getvalue())
+        self.assertIn("Deleted 2 candidates and 1 resume files in 2 batches.", out.getvalue())
+        self.assertEqual(list(Candidate.objects.all()), [self.recent])
+        self.assertFalse(StatusChange.objects.exists())
+        self.assertEqual(set(CandidateTombstone.objects.values_list('candidate_id', flat=True)),
+                         {candidate.id for candidate in self.expired})
+        self.assertFalse(self.storage.exists(self.expired[0].resume.name))
+        self.assertTrue(self.storage.exists(self.recent.resume.name))
+        self.assertEqual(ResumeBlob.objects.get(sha256=self.recent.resume_sha256).ref_count, 1)
+        self.assertFalse(ResumeBlob.objects.filter(sha256=self.expired[0].resume_sha256).exists())
+
+    def test_queued_emails_purged_and_delete_signals_applied_once(self):
+        """Test that a batch drops the candidates' queued emails and applies each delete effect once."""
+        for email in ("old1@example.com", "recent@example.com"):
+            QueuedEmail.objects.create(subject="Status", message="Update", recipient=email, send_after=timezone.now())
+
+        with mock.patch('equavu_hr_app.signals.ResumeBlob.release_many',
+                        wraps=ResumeBlob.release_many) as release_many:
+            call_command('purge_expired_candidates', '--batch-size', '10', '--sleep', '0', stdout=StringIO())
+
+        self.assertEqual(release_many.call_count, 1)
+        self.assertEqual(list(QueuedEmail.objects.values_list('recipient', flat=True)), ["recent@example.com"])
+        self.assertEqual(ResumeBlob.objects.get(sha256=self.recent.resume_sha256).ref_count, 1)
+
+    def test_interrupted_purge_resumed(self):
+        """Test that a purge stopped by its time budget continues on the next run."""
+        out = StringIO()
+        call_command('purge_expired_candidates', '--batch-size', '1', '--max-seconds', '0', stdout=out)
+        self.assertIn("run again to continue", out.getvalue())
+        self.assertEqual(Candidate.objects.count(), 2)
+
+        call_command('purge_expired_candidates', '--batch-size', '1', '--sleep', '0', stdout=out)
+        self.assertEqual(list(Candidate.objects.all()), [self.recent])
+
+    def test_s3_deletes_batched(self):
+        """Test that S3 objects are deleted with DeleteObjects requests of at most 1000 keys."""
+        client = mock.Mock()
+        client.delete_objects.side_effect = [{}, {'Errors': [{'Key': "resumes/1499.pdf", 'Code': 'AccessDenied'}]}]
+        connection = mock.PropertyMock(return_value=mock.Mock(meta=mock.Mock(client=client)))
+        with override_settings(S3_READ_CACHE_MAX_BYTES=0), mock.patch.object(S3Storage, 'connection', connection):
+            failed = CachedS3Storage().delete_many([f"resumes/{i}.pdf" for i in range(1500)])
+
+        self.assertEqual(failed, ["resumes/1499.pdf"])
+        self.assertEqual([len(call.kwargs['Delete']['Objects']) for call in client.delete_objects.call_args_list],
+                         [1000, 500])
+
+
+class FakeS3:
+    """In-memory stand-in for the S3 calls of S3Boto3Storage."""
+
+    def __init__(self):
+        self.objects = {}
+        self.failures = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def save(self, storage, name, content):
+        self.gate.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("S3 unavailable")
+        self.objects[name] = content.read()
+        return name
+
+    def patches(self):
+        return [
+            mock.patch.object(S3Boto3Storage, '_save', lambda storage, *args: self.save(storage, *args)),
+            mock.patch.object(S3Boto3Storage, 'exists', lambda storage, name: name in self.objects),
+            mock.patch.object(S3Boto3Storage, 'delete', lambda storage, name: self.objects.pop(name, None)),
+        ]
+
+
+@override_settings(S3_UPLOAD_WORKERS=1, S3_UPLOAD_RETRY_SECONDS=0.01, S3_READ_CACHE_MAX_BYTES=0)
+class WriteBehindStorageTest(TestCase):
+    """Test cases for write-behind S3 uploads."""
+
+    def setUp(self):
+        """Set up a write-behind storage with a temporary spool and a fake bucket."""
+        self.spool_dir = tempfile.mkdtemp()
+        self.s3 = FakeS3()
+        for patcher in self.s3.patches():
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        with override_settings(S3_SPOOL_DIR=self.spool_dir):
+            self.storage = WriteBehindS3Storage()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.s3.gate.set()
+        self.storage.drain(5)
+        shutil.rmtree(self.spool_dir)
+        if os.path.exists(f"{self.spool_dir}.lock"):
+            os.remove(f"{self.spool_dir}.lock")
+
+    def test_reads_served_from_spool_until_uploaded(self):
+        """Test that a saved file is readable before its upload and leaves the spool after it."""
+        self.s3.gate.clear()
+        name = self.storage.save("resumes/a/resume.pdf", ContentFile(b"spooled resume"))
+
+        self.assertEqual(self.storage.pending(), [name])
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 14)
+        self.assertEqual(b''.join(self.storage.iter_chunks(name)), b"spooled resume")
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), b"spooled resume")
+        self.assertNotIn(name, self.s3.objects)
+
+        self.s3.gate.set()
+        self.assertTrue(self.storage.drain(5))
+        self.assertEqual(self.s3.objects[name], b"spooled resume")
+        self.assertEqual(self.storage.pending(), [])
+
+    def test_failed_upload_retried(self):
+        """Test that a failed upload stays spooled and is retried."""
+        self.s3.failures = 2
+        name = self.storage.save("resumes/b/resume.pdf", ContentFile(b"retried resume"))
+
+        deadline = time.monotonic() + 5
+        while name not in self.s3.objects and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.s3.objects[name], b"retried resume")
+
+    def test_pending_uploads_recovered(self):
+        """Test that files left in the spool by a stopped process are uploaded on recovery."""
+        self.s3.gate.clear()
+        name = self.storage.save("resumes/c/resume.pdf", ContentFile(b"left behind"))
+        with override_settings(S3_SPOOL_DIR=self.spool_dir):
+            restarted = WriteBehindS3Storage()
+
+        self.assertEqual(restarted.recover(), 1)
+        self.s3.gate.set()
+        self.assertTrue(restarted.drain(5))
+        self.assertEqual(self.s3.objects[name], b"left behind")
+        self.assertEqual(restarted.pending(), [])
+
+    def test_content_addressed_save_does_not_wait_for_s3(self):
+        """Test that saving a blob checks S3 only in the background, where existing objects are not uploaded again."""
+        name = f"{CONTENT_ADDRESSED_PREFIX}ab/{'ab' * 32}.pdf"
+        self.s3.objects[name] = b"already stored"
+        checked_by = []
+
+        def exists(storage, checked):
+            checked_by.append(threading.current_thread())
+            return checked in self.s3.objects
+
+        with mock.patch.object(S3Boto3Storage, 'exists', exists):
+            self.assertEqual(self.storage.save(name, ContentFile(b"stored resume")), name)
+            self.assertTrue(self.storage.drain(5))
+
+        self.assertEqual(len(checked_by), 1)
+        self.assertIsNot(checked_by[0], threading.current_thread())
+        self.assertEqual(self.s3.objects[name], b"already stored")
+        self.assertEqual(self.storage.pending(), [])
+
+    def test_abandoned_uploads_finished_once(self):
+        """Test that recovery uploads only abandoned files, and only in one process at a time."""
+        for name, age in (("resumes/old/resume.pdf", 3600), ("resumes/new/resume.pdf", 0)):
+            path = os.path.join(self.spool_dir, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as fh:
+                fh.write(name.encode())
+            os.utime(path, (time.time() - age, time.time() - age))
+        with override_settings(S3_SPOOL_DIR=self.spool_dir):
+            recovering = WriteBehindS3Storage()
+
+        with self.storage.recovery_lock() as acquired, recovering.recovery_lock() as concurrent:
+            self.assertTrue(acquired)
+            self.assertFalse(concurrent)
+            self.assertEqual(self.storage.upload_pending(min_age=60), (1, 0))
+        self.assertEqual(list(self.s3.objects), ["resumes/old/resume.pdf"])
+        self.assertEqual(self.storage.pending(), ["resumes/new/resume.pdf"])
+
+    def test_delete_during_upload(self):
+        """Test that a file deleted while it is uploaded does not stay in the bucket."""
+        self.s3.gate.clear()
+        name = self.storage.save("resumes/d/resume.pdf", ContentFile(b"deleted resume"))
+        deadline = time.monotonic() + 5
+        while name not in self.storage._uploading and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.storage.delete(name)
+        self.s3.gate.set()
+        self.assertTrue(self.storage.drain(5))
+        self.assertNotIn(name, self.s3.objects)
+        self.assertFalse(self.storage.exists(name))
+
+
+@override_settings(CIRCUIT_BREAKERS={'test': {'failure_threshold': 2, 'reset_seconds': 30}})
+class CircuitBreakerTest(TestCase):
+    """Test cases for the circuit breaker state machine."""
+
+    def setUp(self):
+        """Set up a breaker on a fake clock."""
+        self.now = 0.0
+        self.breaker = CircuitBreaker('test', clock=lambda: self.now)
+
+    def _fail(self):
+        with self.assertRaises(ConnectionError):
+            self.breaker.call(mock.Mock(side_effect=ConnectionError("down")))
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the breaker opens after the threshold and then fails fast."""
+        self._fail()
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self._fail()
+        self.assertEqual(self.breaker.state, 'closed')
+        self._fail()
+        self.assertEqual(self.breaker.state, 'open')
+
+        func = mock.Mock()
+        self.now = 10
+        with self.assertRaises(DependencyUnavailable) as raised:
+            self.breaker.call(func)
+        self.assertEqual(raised.exception.wait, 20)
+        func.assert_not_called()
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+    def test_half_open_probe(self):
+        """Test that one probe is let through after reset_seconds and decides the next state."""
+        self._fail()
+        self._fail()
+        self.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, 'half_open')
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertEqual(self.breaker.retry_after(), 30)
+
+        self.now = 60
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertEqual(self.breaker.stats()['opened'], 2)
+
+    def test_ignored_exceptions_not_counted(self):
+        """Test that errors of the caller, e.g. a missing file, do not open the breaker."""
+        for _ in range(3):
+            with self.assertRaises(FileNotFoundError):
+                self.breaker.call(mock.Mock(side_effect=FileNotFoundError()),
+                                  is_failure=lambda e: not isinstance(e, FileNotFoundError))
+        self.assertEqual(self.breaker.state, 'closed')
+
+
+@override_settings(S3_UPLOAD_WORKERS=1, S3_UPLOAD_RETRY_SECONDS=0.01, S3_READ_CACHE_MAX_BYTES=0,
+                   CIRCUIT_BREAKERS={'s3': {'failure_threshold': 2, 'reset_seconds': 30}})
+class S3CircuitBreakerTest(TestCase):
+    """Test cases for failing fast while S3 is unreachable."""
+
+    def setUp(self):
+        """Set up a fake bucket that cannot be reached."""
+        get_breaker('s3').reset()
+        self.addCleanup(get_breaker('s3').reset)
+        self.s3 = FakeS3()
+        self.unreachable = mock.patch.object(
+            S3Boto3Storage, '_save', side_effect=EndpointConnectionError(endpoint_url="https://s3.invalid"))
+        for patcher in self.s3.patches()[1:] + [self.unreachable]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_writes_fail_fast_once_open(self):
+        """Test that after the threshold writes are rejected without contacting S3."""
+        storage = CachedS3Storage()
+        for i in range(2):
+            with self.assertRaises(EndpointConnectionError):
+                storage.save(f"resumes/{i}/resume.pdf", ContentFile(b"resume"))
+        with self.assertRaises(DependencyUnavailable):
+            storage.save("resumes/2/resume.pdf", ContentFile(b"resume"))
+        self.assertEqual(S3Boto3Storage._save.call_count, 2)
+        self.assertEqual(get_breaker('s3').stats()['state'], 'open')
+
+    def test_write_behind_spools_while_open(self):
+        """Test that write-behind saves are spooled while the breaker is open and uploaded after it closes."""
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        with override_settings(S3_SPOOL_DIR=spool_dir):
+            storage = WriteBehindS3Storage()
+        for _ in range(2):
+            get_breaker('s3').record_failure()
+
+        name = storage.save(f"{CONTENT_ADDRESSED_PREFIX}ab/{'ab' * 32}.pdf", ContentFile(b"spooled resume"))
+        self.assertEqual(storage.pending(), [name])
+        self.assertEqual(b''.join(storage.iter_chunks(name)), b"spooled resume")
+
+        self.unreachable.stop()
+        with mock.patch.object(S3Boto3Storage, '_save', lambda storage, *args: self.s3.save(storage, *args)):
+            get_breaker('s3').reset()
+            self.assertTrue(storage.drain(5))
+        self.unreachable.start()
+        self.assertEqual(self.s3.objects[name], b"spooled resume")
+
+
+class LocalReadCacheTest(TestCase):
+    """Test cases for the local LRU read cache in front of S3."""
+
+    def setUp(self):
+        """Set up a cache directory and a counting fetch."""
+        self.directory = tempfile.mkdtemp()
+        self.fetches = []
+
+    def tearDown(self):
+        """Clean up after tests."""
+        shutil.rmtree(self.directory)
+        os.remove(f"{self.directory}.lock")
+
+    def _fetch(self, content):
+        def fetch(fh):
+            self.fetches.append(content)
+            fh.write(content)
+        return fetch
+
+    def _read(self, cache, name, content=b'x' * 10):
+        with cache.open(name, self._fetch(content)) as fh:
+            return fh.read()
+
+    def test_hits_and_misses(self):
+        """Test that a second read is served from disk and counted as a hit."""
+        cache = LocalReadCache(self.directory, 100)
+        self.assertEqual(self._read(cache, "resumes/a.pdf", b"resume a"), b"resume a")
+        self.assertEqual(self._read(cache, "resumes/a.pdf", b"changed"), b"resume a")
+
+        self.assertEqual(len(self.fetches), 1)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['bytes']), (1, 1, 8))
+
+    def test_least_recently_used_evicted(self):
+        """Test that the cache stays within its byte bound by evicting the least recently read file."""
+        cache = LocalReadCache(self.directory, 25)
+        for name in ("a", "b"):
+            self._read(cache, name)
+        self._read(cache, "a")
+        self._read(cache, "c")
+
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['bytes'], 25)
+        self._read(cache, "a")
+        self._read(cache, "b")
+        self.assertEqual(len(self.fetches), 4)
+
+    def test_file_larger_than_cache_not_cached(self):
+        """Test that an oversized file is returned without being cached."""
+        cache = LocalReadCache(self.directory, 5)
+        self.assertEqual(self._read(cache, "big"), b'x' * 10)
+        self.assertEqual(cache.stats()['entries'], 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_concurrent_misses_coalesced(self):
+        """Test that concurrent reads of an uncached file share a single fetch."""
+        cache = LocalReadCache(self.directory, 100)
+        release = threading.Event()
+
+        def slow_fetch(fh):
+            self.fetches.append(1)
+            release.wait(5)
+            fh.write(b"shared")
+
+        results = []
+
+        def read():
+            with cache.open("resumes/shared.pdf", slow_fetch) as fh:
+                results.append(fh.read())
+
+        threads = [threading.Thread(target=read) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while cache.stats()['coalesced'] < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, [b"shared"] * 5)
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(cache.stats()['coalesced'], 4)
+
+    def test_index_rebuilt_on_start(self):
+        """Test that cached files are found again by a new process."""
+        self._read(LocalReadCache(self.directory, 100), "resumes/a.pdf")
+        cache = LocalReadCache(self.directory, 100)
+
+        self.assertEqual(cache.stats()['entries'], 1)
+        self._read(cache, "resumes/a.pdf")
+        self.assertEqual(len(self.fetches), 1)
+
+    def test_bound_holds_for_directory_shared_by_processes(self):
+        """Test that caches of several processes on one directory evict each other's files to stay in bounds."""
+        first, second = LocalReadCache(self.directory, 25), LocalReadCache(self.directory, 25)
+        self._read(first, "a")
+        self._read(first, "b")
+        self._read(second, "a")
+        self._read(second, "c")
+
+        self.assertEqual(first.stats()['bytes'], 20)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["a", "c"])
+        self.assertEqual(second.stats()['evictions'], 1)
+
+    @override_settings(S3_READ_CACHE_MAX_BYTES=1000)
+    def test_storage_reads_cached_and_invalidated(self):
+        """Test that S3 reads go through the cache and deletes invalidate it."""
+        remote = {"resumes/a.pdf": b"remote resume"}
+        gets = []
+
+        def iter_chunks(storage, name, chunk_size=None):
+            gets.append(name)
+            yield remote[name]
+
+        with override_settings(S3_READ_CACHE_DIR=self.directory), \
+                mock.patch.object(S3Storage, 'iter_chunks', iter_chunks), \
+                mock.patch.object(S3Boto3Storage, 'delete', lambda storage, name: remote.pop(name)):
+            storage = CachedS3Storage()
+            with storage.open("resumes/a.pdf") as fh:
+                self.assertEqual(fh.read(), b"remote resume")
+            self.assertEqual(b''.join(storage.iter_chunks("resumes/a.pdf")), b"remote resume")
+            self.assertEqual(gets, ["resumes/a.pdf"])
+
+            storage.delete("resumes/a.pdf")
+            self.assertEqual(storage.read_cache.stats()['entries'], 0)
+
+
+class MemoryStorageTest(TestCase):
+    """Test cases for the in-memory storage backend."""
+
+    def setUp(self):
+        """Set up an empty memory storage."""
+        self.storage = MemoryStorage()
+
+    def test_save_read_and_delete(self):
+        """Test saving, streaming and deleting files without a filesystem path."""
+        name = self.storage.save("resumes/a/resume.pdf", ContentFile(b"x" * 100))
+
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 100)
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), b"x" * 100)
+        self.assertEqual([len(chunk) for chunk in self.storage.iter_chunks(name, chunk_size=40)], [40, 40, 20])
+        with self.assertRaises(NotImplementedError):
+            self.storage.path(name)
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open(name)
+
+    def test_listings(self):
+        """Test directory listings, recursive listings and moves."""
+        for name in ("resumes/a/1.pdf", "resumes/b/2.pdf", "resumes/3.pdf", "other/4.pdf"):
+            self.storage.save(name, ContentFile(name.encode()))
+
+        self.assertEqual(self.storage.listdir("resumes"), (["a", "b"], ["3.pdf"]))
+        self.assertEqual([name for name, _, _ in self.storage.iter_files("resumes/")],
+                         ["resumes/3.pdf", "resumes/a/1.pdf", "resumes/b/2.pdf"])
+        self.storage.move("resumes/3.pdf", "quarantine/3.pdf")
+        self.assertEqual(self.storage.listdir(""), (["other", "quarantine", "resumes"], []))
+
+    def test_latency_injected(self):
+        """Test that every operation is slowed down by the configured latency."""
+        storage = MemoryStorage(latency=0.05)
+        start = time.monotonic()
+        storage.save("resumes/slow.pdf", ContentFile(b"slow"))
+        storage.size("resumes/slow.pdf")
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+    @override_settings(USE_MEMORY_STORAGE=True, MEMORY_STORAGE_LATENCY_SECONDS=0.01)
+    def test_selected_by_settings(self):
+        """Test that USE_MEMORY_STORAGE selects the memory backend."""
+        storage = StorageManager.get_storage()
+        self.assertIsInstance(storage, MemoryStorage)
+        self.assertEqual(storage.latency, 0.01)
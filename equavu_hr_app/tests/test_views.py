@@ -1,10 +1,47 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
-from equavu_hr_app.models import Candidate, StatusChange, Department, ApplicationStatus
+from equavu_hr_app.analytics import rebuild_funnel, update_funnel
+from equavu_hr_app.circuit_breaker import get_breaker
+from equavu_hr_app.email_utils import send_due_status_notifications, send_queued_emails
+from equavu_hr_app.events import get_broker
+from equavu_hr_app.throttling import CandidateStatusRateThrottle, get_limiter
+from equavu_hr_app.views import CandidateStatusEventsView
+from equavu_hr_app.models import (
+    ApplicationStatus,
+    Candidate,
+    Department,
+    FunnelTransition,
+    IdempotencyKey,
+    PendingStatusNotification,
+    QueuedEmail,
+    StatusChange
+)
+from io import BytesIO, StringIO
+from unittest import mock
+import asyncio
+import brotli
+import gzip
+import hashlib
 import os
+import smtplib
+import threading
+import time
+import unittest
+import zipfile
 
 
 class CandidateAPITest(TestCase):
@@ -12,6 +49,7 @@ class CandidateAPITest(TestCase):
 
     def setUp(self):
         """Set up test data and client."""
+        cache.clear()
         self.client = APIClient()
 
         # Create a test PDF file
@@ -43,6 +81,7 @@ class CandidateAPITest(TestCase):
 
         # URLs
         self.register_url = reverse('equavo_hr_app:candidate-register')
+        self.check_email_url = reverse('equavo_hr_app:candidate-check-email')
         self.status_url = reverse('equavo_hr_app:candidate-status', args=[self.candidate.id])
         self.admin_list_url = reverse('equavo_hr_app:admin-candidate-list')
         self.admin_detail_url = reverse('equavo_hr_app:admin-candidate-detail', args=[self.candidate.id])
@@ -53,8 +92,7 @@ class CandidateAPITest(TestCase):
         """Clean up after tests."""
         # Delete test files
         if self.candidate.resume:
-            if os.path.isfile(self.candidate.resume.path):
-                os.remove(self.candidate.resume.path)
+            self.candidate.resume.storage.delete(self.candidate.resume.name)
 
     def test_candidate_registration(self):
         """Test candidate registration endpoint."""
@@ -83,6 +121,32 @@ class CandidateAPITest(TestCase):
         # Since the above request fails, we expect no new candidate to be created
         self.assertFalse(Candidate.objects.filter(email='new@example.com').exists())
 
+    def test_candidate_email_check(self):
+        """Test the pre-registration email availability endpoint."""
+        response = self.client.get(self.check_email_url, {'email': 'test@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.json()['available'])
+
+        response = self.client.get(self.check_email_url, {'email': 'new@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['available'])
+
+        response = self.client.get(self.check_email_url, {'email': 'not-an-email'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_candidate_registration_duplicate_email_rejected_early(self):
+        """Test that a duplicate announced in the header is rejected without reading the upload."""
+        response = self.client.post(
+            self.register_url,
+            {'resume': self.test_file},
+            format='multipart',
+            HTTP_X_CANDIDATE_EMAIL='test@example.com'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.json())
+        self.assertEqual(Candidate.objects.count(), 1)
+
     def test_candidate_status_check(self):
         """Test candidate status check endpoint."""
         # Make the request
@@ -181,3 +245,1150 @@ class CandidateAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response['Content-Type'], 'application/pdf')
         self.assertTrue('attachment; filename=' in response['Content-Disposition'])
+
+
+class StatusUpdateConcurrencyTest(TransactionTestCase):
+    """Test cases for optimistic concurrency control on status updates."""
+    # Reads outside a transaction may be routed to replicas, which mirror the default database in tests.
+    databases = '__all__'
+
+    def setUp(self):
+        """Set up test data."""
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+        StatusChange.objects.create(
+            candidate=self.candidate,
+            new_status=ApplicationStatus.SUBMITTED,
+            feedback="Application submitted successfully."
+        )
+        self.detail_url = reverse('equavo_hr_app:admin-candidate-detail', args=[self.candidate.id])
+        self.status_url = reverse('equavo_hr_app:admin-status-update', args=[self.candidate.id])
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    def _put_status(self, client, new_status, etag=None):
+        headers = {'HTTP_IF_MATCH': etag} if etag else {}
+        return client.put(self.status_url, {'status': new_status}, format='json', **headers)
+
+    def test_stale_if_match_conflicts(self):
+        """Test that an update based on an outdated version returns 409."""
+        client = APIClient()
+        client.credentials(HTTP_X_ADMIN='1')
+        etag = client.get(self.detail_url)['ETag']
+
+        response = self._put_status(client, ApplicationStatus.UNDER_REVIEW, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self._put_status(client, ApplicationStatus.REJECTED, etag)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.current_status, ApplicationStatus.UNDER_REVIEW)
+        self.assertEqual(self.candidate.status_changes.count(), 2)
+
+    def test_concurrent_updates_keep_consistent_history(self):
+        """Test that many admins updating one candidate never lose an update."""
+        workers, updates_per_worker = 8, 5
+        statuses = [ApplicationStatus.UNDER_REVIEW, ApplicationStatus.INTERVIEW_SCHEDULED]
+        barrier = threading.Barrier(workers)
+        errors = []
+
+        def hammer(worker):
+            client = APIClient()
+            client.credentials(HTTP_X_ADMIN='1')
+            try:
+                barrier.wait()
+                done = 0
+                while done < updates_per_worker:
+                    etag = client.get(self.detail_url)['ETag']
+                    response = self._put_status(client, statuses[(worker + done) % 2], etag)
+                    if response.status_code == status.HTTP_200_OK:
+                        done += 1
+                    elif response.status_code != status.HTTP_409_CONFLICT:
+                        errors.append(response.status_code)
+                        return
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=hammer, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total_updates = workers * updates_per_worker
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.version, 1 + total_updates)
+
+        # Every change must start from the status the previous one left behind.
+        history = list(self.candidate.status_changes.order_by('created_at'))
+        self.assertEqual(len(history), 1 + total_updates)
+        for previous, change in zip(history, history[1:]):
+            self.assertEqual(change.previous_status, previous.new_status)
+        self.assertEqual(history[-1].new_status, self.candidate.current_status)
+
+
+class PublicEndpointThrottlingTest(TestCase):
+    """Test cases for rate limiting and load shedding of the public endpoints."""
+
+    def setUp(self):
+        """Set up test data and client."""
+        cache.clear()
+        self.client = APIClient()
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+        self.status_url = reverse('equavo_hr_app:candidate-status', args=[self.candidate.id])
+
+    def tearDown(self):
+        """Clean up after tests."""
+        cache.clear()
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    def _rates(self, **rates):
+        return override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates}
+        })
+
+    def test_status_rate_limited_per_ip(self):
+        """Test that a client polling too fast gets 429 with Retry-After."""
+        with self._rates(candidate_status='2/min'):
+            for _ in range(2):
+                self.assertEqual(self.client.get(self.status_url).status_code, status.HTTP_200_OK)
+            response = self.client.get(self.status_url)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_status_rate_limited_per_candidate(self):
+        """Test that one candidate ID is limited even when polled from many addresses."""
+        with self._rates(candidate_status_id='2/min'):
+            codes = [self.client.get(self.status_url, REMOTE_ADDR=f"10.0.0.{i}").status_code for i in range(3)]
+
+        self.assertEqual(codes, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_forwarded_for_cannot_dodge_ip_limit(self):
+        """Test that addresses a client puts in X-Forwarded-For do not give it fresh buckets."""
+        for num_proxies, remote_addr in ((0, "10.0.0.1"), (1, "10.0.0.254")):
+            cache.clear()
+            rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': num_proxies,
+                              'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                                                         'candidate_status': '2/min'}}
+            with self.subTest(num_proxies=num_proxies), override_settings(REST_FRAMEWORK=rest_framework):
+                # Behind a proxy the last hop it appends is the real client, here 10.0.0.1
+                codes = [self.client.get(self.status_url, REMOTE_ADDR=remote_addr,
+                                         HTTP_X_FORWARDED_FOR=f"192.0.2.{i}, 10.0.0.1").status_code
+                         for i in range(3)]
+                self.assertEqual(codes[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def _concurrent_allowed(self, clients):
+        """Number of `clients` concurrent status checks from one address the throttle lets through."""
+        barrier = threading.Barrier(clients)
+        allowed = []
+        request = RequestFactory().get(self.status_url, REMOTE_ADDR="10.0.0.1")
+
+        def check():
+            barrier.wait()
+            allowed.append(CandidateStatusRateThrottle().allow_request(request, None))
+
+        threads = [threading.Thread(target=check) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return allowed.count(True)
+
+    def test_concurrent_requests_share_bucket(self):
+        """Test that a concurrent flood cannot spend the same tokens twice."""
+        original_get = LocMemCache.get
+
+        def slow_get(backend, *args, **kwargs):
+            # Widen the window between reading and writing the bucket
+            value = original_get(backend, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        with self._rates(candidate_status='5/min'), mock.patch.object(LocMemCache, 'get', slow_get):
+            self.assertEqual(self._concurrent_allowed(20), 5)
+
+    @unittest.skipUnless(os.environ.get('REDIS_URL'), "needs a Redis server (REDIS_URL)")
+    def test_concurrent_requests_share_redis_bucket(self):
+        """Test that the Redis bucket is updated atomically by concurrent requests."""
+        redis_cache = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                   'LOCATION': os.environ.get('REDIS_URL'), 'KEY_PREFIX': 'equavu-test'}}
+        with override_settings(CACHES=redis_cache), self._rates(candidate_status='5/min'):
+            cache.clear()
+            try:
+                self.assertEqual(self._concurrent_allowed(20), 5)
+            finally:
+                cache.clear()
+
+    def test_load_shedding_before_database(self):
+        """Test that requests beyond the concurrency limit get 503 without any query."""
+        with override_settings(LOAD_SHEDDING_LIMITS={'candidate_status': 0}), self.assertNumQueries(0):
+            response = self.client.get(self.status_url)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.client.get(self.status_url).status_code, status.HTTP_200_OK)
+
+    @unittest.skipUnless(os.environ.get('REDIS_URL'), "needs a Redis server (REDIS_URL)")
+    def test_load_shedding_limit_shared_through_redis(self):
+        """Test that the concurrency limit counts leases of all workers and frees released ones."""
+        redis_cache = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                   'LOCATION': os.environ.get('REDIS_URL'), 'KEY_PREFIX': 'equavu-test'}}
+        with override_settings(CACHES=redis_cache):
+            cache.clear()
+            try:
+                # Separate limiter objects stand for separate worker processes
+                first, second = get_limiter('candidate_status'), get_limiter('candidate_status')
+                lease = first.try_acquire(1)
+                self.assertIsNotNone(lease)
+                self.assertIsNone(second.try_acquire(1))
+                first.release(lease)
+                with override_settings(LOAD_SHEDDING_LEASE_SECONDS=0):
+                    self.assertIsNotNone(second.try_acquire(1))
+                # The expired lease of a worker that never released it does not hold the slot
+                self.assertIsNotNone(first.try_acquire(1))
+            finally:
+                cache.clear()
+
+
+class ResumeArchiveTest(TestCase):
+    """Test cases for the streaming multi-resume ZIP download."""
+
+    def setUp(self):
+        """Set up candidates with resumes and an admin client."""
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.archive_url = reverse('equavo_hr_app:admin-resume-archive')
+        self.candidates = [
+            Candidate.objects.create(
+                full_name=f"User {i}",
+                email=f"user{i}@example.com",
+                date_of_birth="1990-01-01",
+                years_of_experience=i,
+                department=Department.IT if i < 2 else Department.HR,
+                resume=SimpleUploadedFile(f"resume{i}.pdf", f"resume {i}".encode(), content_type="application/pdf")
+            )
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for candidate in self.candidates:
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _download(self, params):
+        response = self.client.get(self.archive_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def test_archive_of_selected_candidates(self):
+        """Test that the archive contains exactly the requested resumes."""
+        selected = self.candidates[:2]
+        archive = self._download({'ids': ','.join(str(candidate.id) for candidate in selected)})
+
+        self.assertEqual(len(archive.namelist()), 2)
+        contents = sorted(archive.read(name) for name in archive.namelist())
+        self.assertEqual(contents, [b"resume 0", b"resume 1"])
+
+    def test_archive_by_filter_reports_missing_files(self):
+        """Test filtering by department and listing resumes missing from storage."""
+        self.candidates[2].resume.storage.delete(self.candidates[2].resume.name)
+        archive = self._download({'department': Department.HR})
+
+        self.assertEqual(archive.namelist(), ['MISSING.txt'])
+        self.assertIn(str(self.candidates[2].id), archive.read('MISSING.txt').decode())
+
+    def test_invalid_ids_rejected(self):
+        """Test that malformed candidate IDs are rejected."""
+        response = self.client.get(self.archive_url, {'ids': 'not-a-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CandidateStatusEventsTest(TestCase):
+    """Test cases for the Server-Sent Events status stream."""
+
+    def setUp(self):
+        """Set up a candidate with an initial status change."""
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf")
+        )
+        self.submitted = StatusChange.objects.create(
+            candidate=self.candidate,
+            new_status=ApplicationStatus.SUBMITTED,
+            feedback="Application submitted successfully."
+        )
+        self.events_url = reverse('equavo_hr_app:candidate-status-events', kwargs={'pk': self.candidate.id})
+        cache.clear()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        cache.clear()
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    def _update_status(self):
+        client = APIClient()
+        client.credentials(HTTP_X_ADMIN='1')
+        url = reverse('equavo_hr_app:admin-status-update', kwargs={'pk': self.candidate.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put(url, {'status': ApplicationStatus.UNDER_REVIEW}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def _disconnect(self, stream):
+        """Cancel a pending read of the stream, as a client disconnect does."""
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+    async def test_status_update_pushed_to_stream(self):
+        """Test that an open stream receives the snapshot and then new status changes."""
+        response = await self.async_client.get(self.events_url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        snapshot = (await anext(stream)).decode()
+        self.assertIn('event: status', snapshot)
+        self.assertIn(f"id: {self.submitted.id}", snapshot)
+
+        await sync_to_async(self._update_status)()
+        message = (await asyncio.wait_for(anext(stream), 5)).decode()
+        change = await StatusChange.objects.filter(candidate=self.candidate).alatest('created_at')
+        self.assertIn('event: status_change', message)
+        self.assertIn(f"id: {change.id}", message)
+        self.assertIn('"new_status":"UNDER_REVIEW"', message)
+
+        # A client disconnect cancels the pending read, which must unsubscribe the stream
+        await self._disconnect(stream)
+        self.assertEqual(get_broker().subscriber_count(self.candidate.id), 0)
+
+    @override_settings(STATUS_EVENTS_HEARTBEAT_SECONDS=0.1)
+    async def test_change_while_opening_sent_once(self):
+        """Test that a change committed while the stream opens is in the snapshot and not pushed again."""
+        read_initial_events = CandidateStatusEventsView._initial_events
+
+        def update_then_read(view, *args):
+            # The stream has subscribed; the change is published before the status is read
+            self._update_status()
+            return read_initial_events(view, *args)
+
+        with mock.patch.object(CandidateStatusEventsView, '_initial_events', update_then_read):
+            response = await self.async_client.get(self.events_url)
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            snapshot = (await anext(stream)).decode()
+            following = (await asyncio.wait_for(anext(stream), 5)).decode()
+            await self._disconnect(stream)
+
+        self.assertIn('"current_status":"UNDER_REVIEW"', snapshot)
+        self.assertEqual(following, ": heartbeat\n\n")
+
+    @override_settings(STATUS_EVENTS_MAX_STREAMS_PER_CANDIDATE=1)
+    async def test_open_streams_capped_per_candidate(self):
+        """Test that streams beyond the per-candidate cap are refused with 429."""
+        response = await self.async_client.get(self.events_url)
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+
+        refused = await self.async_client.get(self.events_url)
+        await self._disconnect(stream)
+
+        self.assertEqual(refused.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', refused)
+        self.assertEqual(get_broker().subscriber_count(self.candidate.id), 0)
+
+    def test_streams_rate_limited_per_candidate(self):
+        """Test that opening streams of one candidate is limited even from many addresses."""
+        rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'status_events_id': '2/min'}}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            codes = [self.client.get(self.events_url, REMOTE_ADDR=f"10.0.0.{i}").status_code for i in range(3)]
+            response = self.client.get(self.events_url)
+
+        self.assertEqual(codes, [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS])
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_reconnect_replays_missed_changes(self):
+        """Test that Last-Event-ID replays only later changes, without the snapshot."""
+        StatusChange.objects.filter(id=self.submitted.id).update(created_at=timezone.now() - timedelta(minutes=1))
+        reviewed = StatusChange.objects.create(
+            candidate=self.candidate,
+            previous_status=ApplicationStatus.SUBMITTED,
+            new_status=ApplicationStatus.UNDER_REVIEW
+        )
+
+        response = self.client.get(self.events_url, HTTP_LAST_EVENT_ID=str(self.submitted.id))
+        content = b''.join(response.streaming_content).decode()
+
+        self.assertIn(f"id: {reviewed.id}", content)
+        self.assertNotIn(f"id: {self.submitted.id}", content)
+        self.assertNotIn('event: status\n', content)
+
+
+@override_settings(SYNC_PAGE_SIZE=2, SYNC_TOKEN_OVERLAP_SECONDS=0)
+class CandidateSyncFeedTest(TestCase):
+    """Test cases for the delta sync feed of the admin candidate list."""
+
+    def setUp(self):
+        """Set up candidates and an admin client."""
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.list_url = reverse('equavo_hr_app:admin-candidate-list')
+        self.candidates = [
+            Candidate.objects.create(
+                full_name=f"User {i}",
+                email=f"user{i}@example.com",
+                date_of_birth="1990-01-01",
+                years_of_experience=i,
+                department=Department.IT,
+                resume=SimpleUploadedFile(f"resume{i}.pdf", f"resume {i}".encode(), content_type="application/pdf")
+            )
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for candidate in self.candidates:
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _sync(self, token=''):
+        """Follow the feed until has_more is false; returns (candidate IDs, deleted IDs, token)."""
+        ids, deleted, requests = [], [], 0
+        while True:
+            response = self.client.get(self.list_url, {'sync_token': token})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            requests += 1
+            ids += [candidate['id'] for candidate in response.data['results']]
+            deleted += response.data['deleted']
+            token = response.data['sync_token']
+            if not response.data['has_more']:
+                return ids, deleted, token, requests
+
+    def test_full_sync_pages_through_all_candidates(self):
+        """Test that an empty token returns every candidate over keyset pages."""
+        ids, deleted, _, requests = self._sync()
+
+        self.assertEqual(sorted(ids), sorted(str(candidate.id) for candidate in self.candidates))
+        self.assertEqual(deleted, [])
+        self.assertEqual(requests, 2)
+
+    def test_incremental_sync_returns_changes_and_tombstones(self):
+        """Test that a token only returns later changes plus deleted candidate IDs."""
+        _, _, token, _ = self._sync()
+
+        changed, removed = self.candidates[0], self.candidates[1]
+        removed_id = str(removed.id)
+        update_url = reverse('equavo_hr_app:admin-status-update', kwargs={'pk': changed.id})
+        self.client.put(update_url, {'status': ApplicationStatus.UNDER_REVIEW}, format='json')
+        removed.delete()
+
+        ids, deleted, token, _ = self._sync(token)
+        self.assertEqual(ids, [str(changed.id)])
+        self.assertEqual(deleted, [removed_id])
+
+        self.assertEqual(self._sync(token)[:2], ([], []))
+
+    def test_invalid_and_expired_tokens(self):
+        """Test that malformed tokens are rejected and tokens past the tombstone retention expire."""
+        response = self.client.get(self.list_url, {'sync_token': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        old = (timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)).isoformat()
+        response = self.client.get(self.list_url, {'updated_since': old})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+
+class ConditionalGetTest(TestCase):
+    """Test cases for ETag revalidation and compression of admin responses."""
+
+    def setUp(self):
+        """Set up a candidate and an admin client."""
+        cache.clear()  # Cached list summaries of other tests' (rolled back) data
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf")
+        )
+        self.list_url = reverse('equavo_hr_app:admin-candidate-list')
+        self.detail_url = reverse('equavo_hr_app:admin-candidate-detail', kwargs={'pk': self.candidate.id})
+        self.update_url = reverse('equavo_hr_app:admin-status-update', kwargs={'pk': self.candidate.id})
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    # One test process has no other workers, so its local-memory cache stands in for Redis
+    @mock.patch('equavu_hr_app.list_summary.RedisCache', LocMemCache)
+    def test_list_not_modified_until_candidates_change(self):
+        """Test that a list page revalidates from the cached summary and changes after an update."""
+        etag = self.client.get(self.list_url, {'department': Department.IT})['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, {'department': Department.IT}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        self.assertNotEqual(self.client.get(self.list_url, {'department': Department.HR})['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(self.update_url, {'status': ApplicationStatus.UNDER_REVIEW}, format='json')
+        response = self.client.get(self.list_url, {'department': Department.IT}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_etag_revalidates_and_guards_updates(self):
+        """Test that the detail ETag revalidates and is accepted as If-Match."""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.assertTrue(etag.startswith(f'"{self.candidate.version}-'))
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.detail_url, {'include_archived': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.put(self.update_url, {'status': ApplicationStatus.UNDER_REVIEW},
+                                   format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(COMPRESSION_MIN_BYTES=0)
+    def test_compression_negotiation(self):
+        """Test Brotli/gzip negotiation and revalidation of compressed representations."""
+        plain = self.client.get(self.detail_url)
+
+        response = self.client.get(self.detail_url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], plain['ETag'][:-1] + '-gzip"')
+
+        response = self.client.get(self.detail_url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class SparseFieldsetTest(TestCase):
+    """Test cases for the fields / exclude query parameters."""
+
+    def setUp(self):
+        """Set up a candidate with status history and an admin client."""
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("test_resume.pdf", b"file content", content_type="application/pdf")
+        )
+        StatusChange.objects.create(candidate=self.candidate, new_status=ApplicationStatus.SUBMITTED)
+        self.list_url = reverse('equavo_hr_app:admin-candidate-list')
+        self.detail_url = reverse('equavo_hr_app:admin-candidate-detail', kwargs={'pk': self.candidate.id})
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+
+    def test_list_reads_only_requested_columns(self):
+        """Test that a narrow list request trims the output and the selected columns."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {'fields': 'full_name,current_status'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'full_name', 'current_status'})
+        select = [query['sql'] for query in queries if '"full_name"' in query['sql']][0]
+        self.assertNotIn('"email"', select)
+        self.assertNotIn('"date_of_birth"', select)
+
+    def test_detail_skips_history_when_excluded(self):
+        """Test that excluding status_changes drops the history query."""
+        with self.assertNumQueries(2):  # ETag summary + candidate row
+            response = self.client.get(self.detail_url, {'exclude': 'status_changes,email'})
+        self.assertNotIn('status_changes', response.data)
+        self.assertNotIn('email', response.data)
+        self.assertIn('current_status_display', response.data)
+
+        full = self.client.get(self.detail_url)
+        self.assertEqual(len(full.data['status_changes']), 1)
+        self.assertNotEqual(full['ETag'], response['ETag'])
+
+    def test_unknown_fields_rejected(self):
+        """Test that unknown field names are rejected."""
+        response = self.client.get(self.list_url, {'fields': 'full_name,resume'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CandidateListFilterTest(TestCase):
+    """Test cases for the multi-value and range filters of the admin list."""
+
+    def setUp(self):
+        """Set up candidates across departments, statuses and experience."""
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.list_url = reverse('equavo_hr_app:admin-candidate-list')
+        specs = [
+            (Department.IT, ApplicationStatus.SUBMITTED, 1, 40),
+            (Department.HR, ApplicationStatus.UNDER_REVIEW, 4, 20),
+            (Department.FINANCE, ApplicationStatus.REJECTED, 8, 10),
+            (Department.IT, ApplicationStatus.ACCEPTED, 12, 1),
+        ]
+        self.candidates = []
+        for i, (department, current_status, experience, age_days) in enumerate(specs):
+            candidate = Candidate.objects.create(
+                full_name=f"User {i}",
+                email=f"user{i}@example.com",
+                date_of_birth="1990-01-01",
+                years_of_experience=experience,
+                department=department,
+                current_status=current_status,
+                resume=SimpleUploadedFile(f"resume{i}.pdf", f"resume {i}".encode(), content_type="application/pdf")
+            )
+            Candidate.objects.filter(id=candidate.id).update(created_at=timezone.now() - timedelta(days=age_days))
+            self.candidates.append(candidate)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for candidate in self.candidates:
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _names(self, params):
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return sorted(candidate['full_name'] for candidate in response.data['results'])
+
+    def test_multi_value_filters(self):
+        """Test comma-separated and repeated values, combined across fields."""
+        self.assertEqual(self._names({'department': 'IT,HR'}), ['User 0', 'User 1', 'User 3'])
+        self.assertEqual(self._names({'current_status': ['SUBMITTED', 'ACCEPTED', 'REJECTED'],
+                                      'department': 'IT'}), ['User 0', 'User 3'])
+
+    def test_range_filters(self):
+        """Test experience and registration date ranges."""
+        self.assertEqual(self._names({'min_experience': 4, 'max_experience': 8}), ['User 1', 'User 2'])
+        self.assertEqual(self._names({'department': 'IT', 'min_experience': 5}), ['User 3'])
+        since = (timezone.now() - timedelta(days=15)).date().isoformat()
+        self.assertEqual(self._names({'created_after': since}), ['User 2', 'User 3'])
+
+    def test_invalid_filters_rejected(self):
+        """Test that unknown values, empty ranges and two range filters are rejected."""
+        for params in ({'department': 'IT,LEGAL'},
+                       {'min_experience': 5, 'max_experience': 2},
+                       {'min_experience': 2, 'created_after': '2025-01-01'}):
+            response = self.client.get(self.list_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    # One test process has no other workers, so its local-memory cache stands in for Redis
+    @mock.patch('equavu_hr_app.list_summary.RedisCache', LocMemCache)
+    def test_filtered_count_cached_until_candidates_change(self):
+        """Test that the filtered count is cached and refreshed after a write."""
+        params = {'department': 'IT,HR'}
+        self.assertEqual(self.client.get(self.list_url, params).data['count'], 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.list_url, params).data['count'], 3)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.candidates[1].delete()
+        self.assertEqual(self.client.get(self.list_url, params).data['count'], 2)
+
+    def test_summary_queried_without_shared_cache(self):
+        """Test that without Redis the count and ETag miss no other worker's writes."""
+        params = {'department': 'IT,HR'}
+        etag = self.client.get(self.list_url, params)['ETag']
+        response = self.client.get(self.list_url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Updated without the signals, as by a worker whose invalidation this process never sees
+        Candidate.objects.filter(id=self.candidates[1].id).update(department=Department.FINANCE)
+        response = self.client.get(self.list_url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class FunnelAnalyticsTest(TestCase):
+    """Test cases for the hiring funnel analytics engine and endpoint."""
+
+    def setUp(self):
+        """Set up candidates with a status history spread over the past weeks."""
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.url = reverse('equavo_hr_app:admin-funnel-analytics')
+        self.start = timezone.now() - timedelta(days=30)
+        histories = [
+            (Department.IT, [ApplicationStatus.SUBMITTED, ApplicationStatus.UNDER_REVIEW,
+                             ApplicationStatus.ACCEPTED]),
+            (Department.IT, [ApplicationStatus.SUBMITTED, ApplicationStatus.REJECTED]),
+            (Department.IT, [ApplicationStatus.SUBMITTED]),
+            (Department.HR, [ApplicationStatus.SUBMITTED, ApplicationStatus.UNDER_REVIEW]),
+        ]
+        self.candidates = []
+        for i, (department, statuses) in enumerate(histories):
+            candidate = Candidate.objects.create(
+                full_name=f"User {i}",
+                email=f"user{i}@example.com",
+                date_of_birth="1990-01-01",
+                years_of_experience=3,
+                department=department,
+                current_status=statuses[-1],
+                resume=SimpleUploadedFile(f"resume{i}.pdf", f"resume {i}".encode(), content_type="application/pdf")
+            )
+            for day, new_status in enumerate(statuses):
+                self._change(candidate, new_status, self.start + timedelta(days=2 * day))
+            self.candidates.append(candidate)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for candidate in self.candidates:
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _change(self, candidate, new_status, created_at):
+        return StatusChange.objects.create(candidate=candidate, new_status=new_status, created_at=created_at)
+
+    def _snapshot(self):
+        return sorted(FunnelTransition.objects.values_list(
+            'department', 'from_status', 'to_status', 'count', 'total_seconds'
+        ))
+
+    def test_report_conversions_and_time_in_stage(self):
+        """Test entered/exited counts, conversion rates and average days per stage."""
+        update_funnel()
+        response = self.client.get(self.url, {'department': 'IT'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['departments']), ['IT'])
+        self.assertIsNotNone(response.data['computed_through'])
+
+        it = response.data['departments']['IT']
+        submitted = it['stages'][ApplicationStatus.SUBMITTED]
+        self.assertEqual((submitted['entered'], submitted['exited'], submitted['current']), (3, 2, 1))
+        self.assertEqual(submitted['avg_days_in_stage'], 2.0)
+        conversions = {(c['from_status'], c['to_status']): c['rate'] for c in it['conversions']}
+        self.assertEqual(conversions[(ApplicationStatus.SUBMITTED, ApplicationStatus.UNDER_REVIEW)], 0.3333)
+        self.assertEqual(conversions[(ApplicationStatus.UNDER_REVIEW, ApplicationStatus.ACCEPTED)], 1.0)
+
+    def test_incremental_update_matches_rebuild(self):
+        """Test that updating in small batches after new changes gives the same funnel as a rebuild."""
+        self.assertEqual(update_funnel(batch_size=2), 8)
+        self._change(self.candidates[2], ApplicationStatus.UNDER_REVIEW, self.start + timedelta(days=10))
+        self._change(self.candidates[3], ApplicationStatus.REJECTED, self.start + timedelta(days=11))
+        self.assertEqual(update_funnel(batch_size=1), 2)
+        self.assertEqual(update_funnel(), 0)
+        incremental = self._snapshot()
+
+        self.assertEqual(rebuild_funnel(), 10)
+        self.assertEqual(self._snapshot(), incremental)
+        self.assertEqual(update_funnel(), 0)
+
+    def test_unsettled_changes_wait_for_next_run(self):
+        """Test that changes younger than FUNNEL_SETTLE_SECONDS are not counted yet."""
+        update_funnel()
+        self._change(self.candidates[2], ApplicationStatus.UNDER_REVIEW, timezone.now())
+        self.assertEqual(update_funnel(), 0)
+        with override_settings(FUNNEL_SETTLE_SECONDS=-60):
+            self.assertEqual(update_funnel(), 1)
+
+    def test_rebuild_includes_archived_history(self):
+        """Test that a rebuild counts status changes moved to the archive."""
+        update_funnel()
+        before = self._snapshot()
+        call_command('archive_status_history', '--older-than-days', '1', stdout=StringIO())
+        self.assertEqual(StatusChange.objects.filter(candidate=self.candidates[0]).count(), 0)
+
+        rebuild_funnel()
+        self.assertEqual(self._snapshot(), before)
+
+    def test_requires_admin_and_valid_department(self):
+        """Test that the endpoint is admin-only and validates departments."""
+        self.assertEqual(APIClient().get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(self.url, {'department': 'LEGAL'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class StatusNotificationTest(TestCase):
+    """Test cases for coalesced status update emails."""
+
+    def setUp(self):
+        """Set up a candidate and an admin client."""
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_ADMIN='1')
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("resume.pdf", b"file_content", content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+        self.url = reverse('equavo_hr_app:admin-status-update', args=[self.candidate.id])
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.candidate.resume.storage.delete(self.candidate.resume.name)
+        get_breaker('smtp').reset()
+
+    def _update(self, new_status, feedback=''):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.url, {'status': new_status, 'feedback': feedback}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @mock.patch('equavu_hr_app.email_utils._schedule_send')
+    def test_rapid_changes_sent_as_one_email(self, schedule_send):
+        """Test that changes within the window are merged into one email with the latest status."""
+        self._update(ApplicationStatus.UNDER_REVIEW, "Looks promising.")
+        self._update(ApplicationStatus.INTERVIEW_SCHEDULED, "Interview on Monday.")
+        self.assertEqual(schedule_send.call_count, 1)
+        self.assertEqual(send_due_status_notifications(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+        PendingStatusNotification.objects.update(send_after=timezone.now())
+        self.assertEqual(send_due_status_notifications(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.to, ["test@example.com"])
+        self.assertIn("Interview Scheduled", email.subject)
+        self.assertIn("updated 2 times", email.body)
+        self.assertIn("- Looks promising.\n- Interview on Monday.", email.body)
+        self.assertFalse(PendingStatusNotification.objects.exists())
+
+    @override_settings(STATUS_NOTIFICATION_WINDOW_SECONDS=0)
+    def test_zero_window_sends_on_commit(self):
+        """Test that without a window every change is emailed after its commit."""
+        self._update(ApplicationStatus.UNDER_REVIEW, "Looks promising.")
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("updated to: Under Review", mail.outbox[0].body)
+        self.assertIn("Feedback: Looks promising.", mail.outbox[0].body)
+
+    @override_settings(STATUS_NOTIFICATION_WINDOW_SECONDS=0)
+    @mock.patch('equavu_hr_app.email_utils.EmailMessage.send', side_effect=ConnectionError("SMTP unavailable"))
+    def test_failed_email_retried_later(self, send):
+        """Test that a notification that fails to send stays queued for a retry."""
+        self._update(ApplicationStatus.REJECTED)
+
+        pending = PendingStatusNotification.objects.get(candidate=self.candidate)
+        self.assertGreater(pending.send_after, timezone.now())
+        self.assertEqual(send.call_count, 1)
+
+    @mock.patch('equavu_hr_app.email_utils._schedule_send')
+    def test_sent_outside_transaction_keeping_later_changes(self, schedule_send):
+        """Test that emails are sent without holding a transaction and changes made meanwhile stay pending."""
+        self._update(ApplicationStatus.UNDER_REVIEW, "Looks promising.")
+        PendingStatusNotification.objects.update(send_after=timezone.now())
+        # The test case's own transactions are open around the whole test
+        enclosing_blocks = len(connection.atomic_blocks)
+
+        def send(email):
+            self.assertEqual(len(connection.atomic_blocks), enclosing_blocks)
+            # Claimed, so a concurrent sender skips it
+            self.assertEqual(send_due_status_notifications(), 0)
+            self._update(ApplicationStatus.INTERVIEW_SCHEDULED, "Interview on Monday.")
+            return 1
+
+        with mock.patch.object(EmailMessage, 'send', autospec=True, side_effect=send):
+            self.assertEqual(send_due_status_notifications(), 1)
+
+        pending = PendingStatusNotification.objects.get(candidate=self.candidate)
+        self.assertEqual(pending.status, ApplicationStatus.INTERVIEW_SCHEDULED)
+        self.assertEqual(pending.change_count, 1)
+        self.assertEqual(pending.feedback, ["Interview on Monday."])
+        self.assertGreater(pending.send_after, timezone.now())
+
+
+@override_settings(CIRCUIT_BREAKERS={'smtp': {'failure_threshold': 2, 'reset_seconds': 60}})
+class EmailCircuitBreakerTest(TestCase):
+    """Test cases for queueing candidate emails while the mail server fails."""
+
+    def setUp(self):
+        """Set up the client, URL and a closed breaker."""
+        cache.clear()
+        get_breaker('smtp').reset()
+        self.client = APIClient()
+        self.register_url = reverse('equavo_hr_app:candidate-register')
+        self.breakers_url = reverse('equavo_hr_app:admin-circuit-breakers')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        get_breaker('smtp').reset()
+        for candidate in Candidate.objects.all():
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _register(self, email):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.register_url, {
+                'full_name': "New User",
+                'email': email,
+                'date_of_birth': "1995-05-05",
+                'years_of_experience': 3,
+                'department': Department.HR,
+                'resume': SimpleUploadedFile("resume.pdf", b"%PDF-1.4 resume", content_type="application/pdf"),
+            }, format='multipart')
+
+    @mock.patch('equavu_hr_app.email_utils._schedule_send')
+    def test_registration_email_queued_while_smtp_down(self, schedule_send):
+        """Test that registrations succeed while the mail server fails and the breaker then skips it."""
+        with mock.patch('equavu_hr_app.email_utils.send_mail',
+                        side_effect=smtplib.SMTPServerDisconnected("Connection unexpectedly closed")) as send_mail:
+            for i in range(3):
+                self.assertEqual(self._register(f"new{i}@example.com").status_code, status.HTTP_201_CREATED)
+        # The third registration did not wait for the mail server
+        self.assertEqual(send_mail.call_count, 2)
+        self.assertEqual(QueuedEmail.objects.count(), 3)
+        self.assertEqual(schedule_send.call_count, 3)
+
+        self.client.credentials(HTTP_X_ADMIN='1')
+        response = self.client.get(self.breakers_url)
+        self.assertEqual(response.json()['breakers']['smtp']['state'], 'open')
+        self.assertEqual(response.json()['breakers']['smtp']['rejected'], 1)
+        self.assertEqual(response.json()['queued_emails'], 3)
+
+        # Once the mail server is back and the emails are due, they are sent and dequeued
+        get_breaker('smtp').reset()
+        QueuedEmail.objects.update(send_after=timezone.now())
+        self.assertEqual(send_queued_emails(), 3)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox),
+                         ["new0@example.com", "new1@example.com", "new2@example.com"])
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    @mock.patch('equavu_hr_app.email_utils.EmailMessage.send', side_effect=ConnectionRefusedError("Refused"))
+    def test_failed_retry_backs_off(self, send):
+        """Test that queued emails failing again are retried later, without trying the rest of the batch."""
+        now = timezone.now()
+        for i in range(3):
+            QueuedEmail.objects.create(subject="Subject", message="Message", recipient=f"queued{i}@example.com",
+                                       send_after=now)
+
+        self.assertEqual(send_queued_emails(), 0)
+        self.assertEqual(send.call_count, 2)
+        for queued in QueuedEmail.objects.all():
+            self.assertEqual(queued.attempts, 1)
+            self.assertGreaterEqual(queued.send_after, now + timedelta(seconds=settings.EMAIL_RETRY_SECONDS * 2))
+
+    def test_rejected_email_dead_lettered_without_opening_breaker(self):
+        """Test that permanently rejected emails are not retried and do not count as mail server failures."""
+        now = timezone.now()
+        for i in range(3):
+            QueuedEmail.objects.create(subject="Subject", message="Message", recipient=f"queued{i}@example.com",
+                                       send_after=now)
+        refused = smtplib.SMTPRecipientsRefused({"queued@example.com": (550, b"No such user")})
+
+        with mock.patch('equavu_hr_app.email_utils.EmailMessage.send', side_effect=refused) as send:
+            self.assertEqual(send_queued_emails(), 0)
+            self.assertEqual(send_queued_emails(), 0)
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(get_breaker('smtp').state, 'closed')
+        for queued in QueuedEmail.objects.all():
+            self.assertIsNotNone(queued.failed_at)
+            self.assertIn("No such user", queued.last_error)
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=2)
+    @mock.patch('equavu_hr_app.email_utils.EmailMessage.send',
+                side_effect=smtplib.SMTPDataError(451, b"Try again later"))
+    def test_email_given_up_after_max_attempts(self, send):
+        """Test that an email failing temporarily is dead-lettered after EMAIL_MAX_ATTEMPTS."""
+        queued = QueuedEmail.objects.create(subject="Subject", message="Message", recipient="queued@example.com",
+                                            send_after=timezone.now())
+
+        for attempt in range(1, 3):
+            get_breaker('smtp').reset()
+            QueuedEmail.objects.filter(pk=queued.pk).update(send_after=timezone.now())
+            send_queued_emails()
+            queued.refresh_from_db()
+            self.assertEqual(queued.attempts, attempt)
+        self.assertIsNotNone(queued.failed_at)
+
+        QueuedEmail.objects.filter(pk=queued.pk).update(send_after=timezone.now())
+        send_queued_emails()
+        self.assertEqual(send.call_count, 2)
+
+
+class IdempotencyKeyTest(TransactionTestCase):
+    """Test cases for Idempotency-Key support of registration and status updates."""
+    databases = '__all__'
+
+    def setUp(self):
+        """Set up a candidate and the URLs."""
+        cache.clear()
+        self.candidate = Candidate.objects.create(
+            full_name="Test User",
+            email="test@example.com",
+            date_of_birth="1990-01-01",
+            years_of_experience=5,
+            department=Department.IT,
+            resume=SimpleUploadedFile("resume.pdf", b"file_content", content_type="application/pdf"),
+            current_status=ApplicationStatus.SUBMITTED
+        )
+        self.register_url = reverse('equavo_hr_app:candidate-register')
+        self.status_url = reverse('equavo_hr_app:admin-status-update', args=[self.candidate.id])
+
+    def tearDown(self):
+        """Clean up after tests."""
+        for candidate in Candidate.objects.all():
+            candidate.resume.storage.delete(candidate.resume.name)
+
+    def _register(self, key, email="new@example.com"):
+        return APIClient().post(self.register_url, {
+            'full_name': "New User",
+            'email': email,
+            'date_of_birth': "1995-05-05",
+            'years_of_experience': 3,
+            'department': Department.HR,
+            'resume': SimpleUploadedFile("resume.pdf", b"%PDF-1.4 resume", content_type="application/pdf"),
+        }, format='multipart', HTTP_IDEMPOTENCY_KEY=key, HTTP_X_CANDIDATE_EMAIL=email)
+
+    def _put_status(self, key, new_status=ApplicationStatus.UNDER_REVIEW):
+        client = APIClient()
+        client.credentials(HTTP_X_ADMIN='1')
+        return client.put(self.status_url, {'status': new_status, 'feedback': "Retried"}, format='json',
+                          HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_registration_retry_replays_response(self):
+        """Test that a retried registration returns the first response without registering again."""
+        first = self._register("key-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self._register("key-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Candidate.objects.filter(email="new@example.com").count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Without the key the retry is an ordinary duplicate
+        self.assertEqual(self._register("key-2").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_key_reused_for_different_request(self):
+        """Test that reusing a key with a different body is rejected."""
+        self.assertEqual(self._register("key-1").status_code, status.HTTP_201_CREATED)
+        response = self._register("key-1", email="other@example.com")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertFalse(Candidate.objects.filter(email="other@example.com").exists())
+
+    def test_concurrent_status_update_retries_apply_once(self):
+        """Test that duplicates sent while the first update is in flight wait for its response."""
+        workers = 4
+        barrier = threading.Barrier(workers)
+        responses = []
+
+        def retry():
+            try:
+                barrier.wait()
+                responses.append(self._put_status("update-1"))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=retry) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_200_OK] * workers)
+        self.assertEqual(len({response['ETag'] for response in responses}), 1)
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.version, 2)
+        self.assertEqual(self.candidate.status_changes.count(), 1)
+
+    def test_expired_keys_pruned(self):
+        """Test that expired keys are deleted and no longer replayed."""
+        self.assertEqual(self._put_status("update-1").status_code, status.HTTP_200_OK)
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+
+        call_command('prune_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        response = self._put_status("update-1", ApplicationStatus.REJECTED)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.version, 3)
+
+
+class ResumeUploadHandlerTest(TestCase):
+    """Test cases for validating resumes while they are uploaded."""
+
+    def setUp(self):
+        """Set up the client and URL."""
+        cache.clear()
+        self.client = APIClient()
+        self.register_url = reverse('equavo_hr_app:candidate-register')
+
+    def _register(self, name, content):
+        return self.client.post(self.register_url, {
+            'full_name': "New User",
+            'email': "new@example.com",
+            'date_of_birth': "1995-05-05",
+            'years_of_experience': 3,
+            'department': Department.HR,
+            'resume': SimpleUploadedFile(name, content, content_type="application/octet-stream"),
+        }, format='multipart')
+
+    @mock.patch('equavu_hr_app.models.content_hash')
+    def test_resume_hashed_while_received(self, content_hash):
+        """Test that a valid resume is stored with the digest computed by the upload handler."""
+        content = b"%PDF-1.4 resume" * 1000
+        response = self._register("resume.pdf", content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        candidate = Candidate.objects.get(email="new@example.com")
+        self.assertEqual(candidate.resume_sha256, hashlib.sha256(content).hexdigest())
+        content_hash.assert_not_called()
+        candidate.resume.storage.delete(candidate.resume.name)
+
+    @override_settings(MAX_UPLOAD_SIZE=1024)
+    def test_oversized_resume_rejected_while_received(self):
+        """Test that a resume over the limit is rejected, whether or not the request size gives it away."""
+        with mock.patch('equavu_hr_app.serializers.CandidateCreateSerializer.validate_resume') as validate_resume:
+            for size in (8 * 1024, 1024 * 1024):
+                response = self._register("resume.pdf", b"%PDF-1.4 " + b"x" * size)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("exceeds the limit", response.json()['resume'][0])
+        validate_resume.assert_not_called()
+        self.assertFalse(Candidate.objects.exists())
+
+    def test_resume_content_must_match_extension(self):
+        """Test that files whose first bytes are not a PDF/DOCX signature are rejected."""
+        for name, content in (("resume.pdf", b"MZ\x90\x00 not a pdf"), ("resume.docx", b"%PDF-1.4 resume"),
+                              ("resume.exe", b"MZ\x90\x00")):
+            response = self._register(name, content)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, name)
+            self.assertIn('resume', response.json())
+        self.assertFalse(Candidate.objects.exists())
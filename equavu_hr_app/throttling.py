@@ -0,0 +1,263 @@
+"""
+Rate limiting and load shedding for the public candidate endpoints.
+Token buckets are kept in the Django cache, so limits are shared by all
+workers when Redis is configured and stay local in tests. Each bucket is
+updated atomically: by a Lua script on Redis, under a lock with the
+per-process local-memory cache. Load shedding caps the requests an endpoint
+handles at once and turns the excess away before any database work is done;
+the count is shared by all workers through Redis and per process otherwise.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+import math
+import threading
+import time
+import uuid
+
+# Refills and takes one token of the bucket in KEYS[1]; ARGV: capacity, tokens per
+# second, now, key TTL. Returns {1 if a token was taken, tokens left}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local tokens = tonumber(bucket[1]) or capacity
+local last = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * refill_rate)
+local taken = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {taken, tostring(tokens)}
+"""
+
+# Takes a slot of the concurrency limiter in KEYS[1], a sorted set of leases scored
+# by expiry time; ARGV: limit, now, lease ID, lease seconds. Leases of workers that
+# died without releasing them expire. Returns 1 if a slot was taken.
+CONCURRENCY_LEASE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local lease_seconds = tonumber(ARGV[4])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + lease_seconds, ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(lease_seconds))
+return 1
+"""
+
+_buckets_lock = threading.Lock()
+
+
+def redis_client(backend, key):
+    """The redis-py client of a cache key if the cache is Django's RedisCache, else None."""
+    if isinstance(backend, RedisCache):
+        return backend._cache.get_client(key, write=True)
+    return None
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle using the DRF rate format ('number/period').
+    Each client has a bucket of `number` tokens refilled continuously over
+    `period`, so short bursts are allowed while the average rate is capped.
+    Unlike SimpleRateThrottle only two numbers are stored per client instead
+    of a timestamp per request.
+    """
+    cache_format = 'throttle_tb_%(scope)s_%(ident)s'
+
+    def get_rate(self):
+        # Read the rates on every instantiation so settings overrides take effect.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill_rate = self.num_requests / self.duration
+        self.now = self.timer()
+        taken, tokens = self.take_token(self.num_requests, refill_rate)
+        if not taken:
+            self.wait_time = (1 - tokens) / refill_rate
+            return False
+        return True
+
+    def take_token(self, capacity, refill_rate):
+        """
+        Refill the bucket and take a token if one is left, atomically, so
+        concurrent requests cannot all spend the same token. Returns
+        (whether a token was taken, tokens left).
+        """
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        # A bucket that is left alone is full again after `duration`, so the key can expire then.
+        timeout = math.ceil(self.duration)
+        key = backend.make_and_validate_key(self.key)
+        client = redis_client(backend, key)
+        if client is not None:
+            taken, tokens = client.eval(TOKEN_BUCKET_SCRIPT, 1, key, capacity, refill_rate, self.now, timeout)
+            return bool(taken), float(tokens)
+
+        # The local-memory cache is per process, so a process-wide lock makes the update atomic.
+        with _buckets_lock:
+            tokens, last = backend.get(self.key, (capacity, self.now))
+            tokens = min(capacity, tokens + (self.now - last) * refill_rate)
+            if tokens < 1:
+                return False, tokens
+            backend.set(self.key, (tokens - 1, self.now), timeout)
+            return True, tokens - 1
+
+    def wait(self):
+        return getattr(self, 'wait_time', None)
+
+
+class RegistrationRateThrottle(TokenBucketThrottle):
+    """Limits registrations per client IP."""
+    scope = 'registration'
+
+
+class EmailCheckRateThrottle(TokenBucketThrottle):
+    """Limits email availability checks per client IP."""
+    scope = 'email_check'
+
+
+class CandidateStatusRateThrottle(TokenBucketThrottle):
+    """Limits status checks per client IP."""
+    scope = 'candidate_status'
+
+
+class CandidateStatusIdRateThrottle(TokenBucketThrottle):
+    """Limits status checks per candidate ID, whichever client polls it."""
+    scope = 'candidate_status_id'
+
+    def get_cache_key(self, request, view):
+        candidate_id = view.kwargs.get('pk')
+        if candidate_id is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': candidate_id}
+
+
+class StatusEventsRateThrottle(TokenBucketThrottle):
+    """Limits status event streams opened per client IP."""
+    scope = 'status_events'
+
+
+class StatusEventsIdRateThrottle(CandidateStatusIdRateThrottle):
+    """Limits status event streams opened per candidate ID, whichever client opens them."""
+    scope = 'status_events_id'
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The service is handling too many requests. Please retry later.'
+    default_code = 'service_overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header.
+        self.wait = wait
+
+
+class ConcurrencyLimiter:
+    """Non-blocking counter of requests in flight in this process, bounded by a limit."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def try_acquire(self, limit):
+        """Take a slot; returns a lease to pass to release(), or None when full."""
+        with self._lock:
+            if self.in_flight >= limit:
+                return None
+            self.in_flight += 1
+            return True
+
+    def release(self, lease):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class SharedConcurrencyLimiter:
+    """
+    Counter of requests in flight in all workers, kept in Redis as a sorted set
+    of leases. A lease expires after settings.LOAD_SHEDDING_LEASE_SECONDS, so
+    slots held by a killed worker are freed without a release.
+    """
+
+    def __init__(self, scope, backend):
+        self.backend = backend
+        self.key = backend.make_and_validate_key(f'load_shedding_{scope}')
+
+    def try_acquire(self, limit):
+        """Take a slot; returns a lease to pass to release(), or None when full."""
+        lease = uuid.uuid4().hex
+        lease_seconds = getattr(settings, 'LOAD_SHEDDING_LEASE_SECONDS', 60)
+        client = redis_client(self.backend, self.key)
+        if not client.eval(CONCURRENCY_LEASE_SCRIPT, 1, self.key, limit, time.time(), lease, lease_seconds):
+            return None
+        return lease
+
+    def release(self, lease):
+        redis_client(self.backend, self.key).zrem(self.key, lease)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(scope):
+    """
+    Return the concurrency limiter for a scope: shared by all workers when the
+    default cache is Redis, otherwise one per process.
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, RedisCache):
+        return SharedConcurrencyLimiter(scope, backend)
+    with _limiters_lock:
+        return _limiters.setdefault(scope, ConcurrencyLimiter())
+
+
+class LoadSheddingMixin:
+    """
+    View mixin that rejects requests with 503 and Retry-After once more than
+    settings.LOAD_SHEDDING_LIMITS[load_shedding_scope] of them are in progress.
+    Runs after authentication, permissions and throttling but before the handler,
+    so shed requests never reach the database, storage or mail server.
+    """
+    load_shedding_scope = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        limit = getattr(settings, 'LOAD_SHEDDING_LIMITS', {}).get(self.load_shedding_scope)
+        if limit is None:
+            return
+        limiter = get_limiter(self.load_shedding_scope)
+        lease = limiter.try_acquire(limit)
+        if lease is None:
+            raise ServiceOverloaded(wait=getattr(settings, 'LOAD_SHEDDING_RETRY_AFTER', 1))
+        self._load_shedding_lease = (limiter, lease)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        held = getattr(self, '_load_shedding_lease', None)
+        if held is not None:
+            self._load_shedding_lease = None
+            limiter, lease = held
+            limiter.release(lease)
+        return super().finalize_response(request, response, *args, **kwargs)
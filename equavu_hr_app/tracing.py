@@ -0,0 +1,251 @@
+"""
+Lightweight request tracing in the style of OpenTelemetry.
+TracingMiddleware opens a root span per request; database queries, resume
+storage operations and email sends made while handling it become child spans.
+Every request gets a trace ID, which TraceContextFilter adds to log records,
+but only a TRACING_SAMPLE_RATE fraction of requests is recorded: for the
+others no span objects are created. Recorded traces are appended to
+TRACING_EXPORT_PATH, one OTLP/JSON ExportTraceServiceRequest per line, which
+OpenTelemetry collectors (e.g. the otlpjsonfile receiver) can read.
+An incoming W3C traceparent header sets the trace ID and parent span, but the
+sampling decision stays local, so clients cannot force their requests to be traced.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+import functools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+MAX_STATEMENT_LENGTH = 1000
+# OTLP enum values
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+STATUS_CODE_UNSET, STATUS_CODE_ERROR = 0, 2
+# Storage operations recorded as spans. iter_chunks is left out: it is a generator, usually
+# consumed by a streaming response after its request's trace has ended.
+TRACED_STORAGE_METHODS = ('_save', '_open', 'exists', 'delete', 'delete_many', 'size', 'listdir', 'move')
+# String and numeric literals, replaced in exported statements
+SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_current_span = ContextVar('current_span', default=None)
+
+
+class Span:
+    """
+    One timed operation of a trace. Unsampled root spans only carry the IDs
+    for log records; spans of a sampled trace share the list they are
+    collected in, which the root exports when it ends.
+    """
+
+    def __init__(self, name, trace_id, parent_id=None, kind=SPAN_KIND_INTERNAL, sampled=True, trace=None,
+                 attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.trace = trace if trace is not None else []
+        self.attributes = dict(attributes or {})
+        self.status_code = STATUS_CODE_UNSET
+        self.status_message = ''
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.status_code = STATUS_CODE_ERROR
+        self.status_message = message
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            self.trace.append(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': self.status_code},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def current_span():
+    return _current_span.get()
+
+
+def parse_traceparent(header):
+    """Return (trace ID, parent span ID) of a W3C traceparent header, or None."""
+    match = TRACEPARENT_RE.match((header or '').strip().lower())
+    if match is None or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+@contextmanager
+def start_trace(name, traceparent=None, attributes=None, kind=SPAN_KIND_SERVER):
+    """
+    Root span of a unit of work (a request or background job), sampled at
+    TRACING_SAMPLE_RATE. Its spans are exported when it ends.
+    """
+    parent = parse_traceparent(traceparent)
+    trace_id, parent_id = parent if parent else (os.urandom(16).hex(), None)
+    sampled = random.random() < getattr(settings, 'TRACING_SAMPLE_RATE', 0)
+    span = Span(name, trace_id, parent_id, kind=kind, sampled=sampled, attributes=attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+        if sampled:
+            export_spans(span.trace)
+
+
+@contextmanager
+def start_span(name, kind=SPAN_KIND_INTERNAL, attributes=None):
+    """Child span of the current span; yields None (and records nothing) outside sampled traces."""
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    span = Span(name, parent.trace_id, parent.span_id, kind=kind, trace=parent.trace, attributes=attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_error(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def sanitize_statement(sql):
+    """
+    Strip literals from a SQL statement before it is exported. The ORM passes
+    values as parameters (which are never exported), but raw SQL may inline them.
+    """
+    return SQL_LITERAL_RE.sub('?', sql)[:MAX_STATEMENT_LENGTH]
+
+
+def query_span(execute, sql, params, many, context):
+    """Database execute wrapper recording each query as a span."""
+    connection = context['connection']
+    with start_span('db.query', kind=SPAN_KIND_CLIENT, attributes={
+        'db.system': connection.vendor,
+        'db.name': connection.alias,
+        'db.statement': sanitize_statement(sql),
+    }):
+        return execute(sql, params, many, context)
+
+
+def trace_storage(storage):
+    """
+    Record the operations of a storage instance as spans. The methods are
+    wrapped on the instance, so only the outermost call of an operation is
+    recorded and the storage still deconstructs to its own class.
+    """
+    backend = type(storage).__name__
+    for method_name in TRACED_STORAGE_METHODS:
+        method = getattr(storage, method_name, None)
+        if method is not None:
+            setattr(storage, method_name, _traced_storage_method(method, f"storage.{method_name.lstrip('_')}",
+                                                                 backend))
+    return storage
+
+
+def _traced_storage_method(method, span_name, backend):
+    @functools.wraps(method)
+    def traced(*args, **kwargs):
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            return method(*args, **kwargs)
+        attributes = {'storage.backend': backend}
+        if args and isinstance(args[0], str):
+            attributes['storage.name'] = args[0]
+        with start_span(span_name, kind=SPAN_KIND_CLIENT, attributes=attributes):
+            return method(*args, **kwargs)
+    return traced
+
+
+class FileSpanExporter:
+    """Appends traces to a file as OTLP/JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        payload = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': _otlp_value(getattr(settings, 'TRACING_SERVICE_NAME', 'equavu-hr'))},
+                {'key': 'process.pid', 'value': _otlp_value(os.getpid())},
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]}, separators=(',', ':'))
+        with self._lock, open(self.path, 'a') as fh:
+            fh.write(payload + '\n')
+
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def export_spans(spans):
+    """Export the spans of a finished trace; failures are logged, never raised."""
+    path = getattr(settings, 'TRACING_EXPORT_PATH', None)
+    if not path or not spans:
+        return
+    with _exporters_lock:
+        exporter = _exporters.setdefault(path, FileSpanExporter(path))
+    try:
+        exporter.export(spans)
+    except Exception as e:
+        logger.warning(f"Error exporting trace {spans[0].trace_id}: {str(e)}")
+
+
+class TraceContextFilter(logging.Filter):
+    """Adds `trace_id` and `span_id` of the current span ('-' outside traces) to log records."""
+
+    def filter(self, record):
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span else '-'
+        record.span_id = span.span_id if span else '-'
+        return True
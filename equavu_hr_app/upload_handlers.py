@@ -0,0 +1,89 @@
+"""
+Upload handler for resumes that validates them while they are being received.
+Django's default handlers receive a whole file (into memory or a temporary
+file) before the serializer can look at its size, and the extension validator
+only trusts the file name. ResumeUploadHandler instead rejects a request as
+soon as it is known to exceed MAX_UPLOAD_SIZE, or as soon as the first bytes
+of a file do not match the signature of its extension, and computes the
+SHA-256 of the content on the way so it is not read again when saving.
+"""
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import serializers
+import hashlib
+import os
+import tempfile
+
+# Leading bytes of every accepted resume type; DOCX files are ZIP archives.
+RESUME_SIGNATURES = {
+    'pdf': b'%PDF-',
+    'docx': b'PK\x03\x04',
+}
+SIGNATURE_LENGTH = max(len(signature) for signature in RESUME_SIGNATURES.values())
+# Room for the non-file fields and multipart framing of a registration
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ResumeUploadHandler(FileUploadHandler):
+    """
+    Receives uploaded files into a SpooledTemporaryFile (in memory up to
+    FILE_UPLOAD_MAX_MEMORY_SIZE, then on disk) while checking their size and
+    signature, and sets `sha256` on the resulting UploadedFile. A rejected
+    upload raises a ValidationError for its field, which stops reading the
+    request and is returned as a 400 response.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size if max_size is not None else settings.MAX_UPLOAD_SIZE
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            raise serializers.ValidationError({'resume': [self._too_large_message()]})
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.signature = RESUME_SIGNATURES.get(os.path.splitext(file_name)[1][1:].lower())
+        if self.signature is None:
+            self._reject(f"Only {', '.join(RESUME_SIGNATURES)} files are allowed.", close=False)
+        self.file = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+                                                  dir=settings.FILE_UPLOAD_TEMP_DIR)
+        self.digest = hashlib.sha256()
+        self.head = b''
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self._reject(self._too_large_message())
+        if len(self.head) < SIGNATURE_LENGTH:
+            self.head += raw_data[:SIGNATURE_LENGTH]
+            self._check_signature()
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self._check_signature(complete=True)
+        self.file.seek(0)
+        uploaded = UploadedFile(file=self.file, name=self.file_name, content_type=self.content_type,
+                                size=file_size, charset=self.charset, content_type_extra=self.content_type_extra)
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
+
+    def upload_interrupted(self):
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+
+    def _check_signature(self, complete=False):
+        # Decided once enough bytes have arrived (or the file ended shorter than a signature)
+        if (complete or len(self.head) >= len(self.signature)) and not self.head.startswith(self.signature):
+            self._reject("The file content does not match its extension.")
+
+    def _too_large_message(self):
+        return f"File size exceeds the limit of {self.max_size / (1024 * 1024)}MB."
+
+    def _reject(self, message, close=True):
+        if close:
+            self.file.close()
+        raise serializers.ValidationError({self.field_name: [message]})
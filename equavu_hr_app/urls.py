@@ -14,10 +14,19 @@ urlpatterns = [
 
     # Candidate endpoints
     path('candidates/register/', views.CandidateRegistrationView.as_view(), name='candidate-register'),
+    path('candidates/check-email/', views.CandidateEmailCheckView.as_view(), name='candidate-check-email'),
     path('candidates/<uuid:pk>/status/', views.CandidateStatusView.as_view(), name='candidate-status'),
+    path('candidates/<uuid:pk>/events/', views.CandidateStatusEventsView.as_view(), name='candidate-status-events'),
 
     # Admin endpoints
     path('admin/candidates/', views.CandidateListView.as_view(), name='admin-candidate-list'),
+    path('admin/candidates/resumes/', views.ResumeArchiveView.as_view(), name='admin-resume-archive'),
+    path('admin/candidates/import/', views.CandidateImportView.as_view(), name='admin-candidate-import'),
+    path('admin/candidates/import/<uuid:pk>/', views.CandidateImportJobView.as_view(),
+         name='admin-candidate-import-job'),
+    path('admin/analytics/funnel/', views.FunnelAnalyticsView.as_view(), name='admin-funnel-analytics'),
+    path('admin/storage/read-cache/', views.ResumeReadCacheView.as_view(), name='admin-resume-read-cache'),
+    path('admin/circuit-breakers/', views.CircuitBreakerView.as_view(), name='admin-circuit-breakers'),
     path('admin/candidates/<uuid:pk>/', views.CandidateDetailView.as_view(), name='admin-candidate-detail'),
     path('admin/candidates/<uuid:pk>/status/', views.StatusUpdateView.as_view(), name='admin-status-update'),
     path('admin/candidates/<uuid:pk>/resume/', views.ResumeDownloadView.as_view(), name='admin-resume-download'),
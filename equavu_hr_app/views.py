@@ -1,21 +1,61 @@
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, F, Max
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
+from django.urls import reverse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
 from rest_framework import status, permissions, generics, filters, serializers
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 
-from .email_utils import send_candidate_email
-from .models import Candidate, StatusChange, ApplicationStatus
+from .analytics import funnel_report
+from .bulk_import import detect_format, start_import
+from .circuit_breaker import breaker_stats
+from .conditional import ConditionalGetMixin, make_etag
+from .email_registry import email_registry
+from .email_utils import queue_status_notification, send_candidate_email
+from .events import get_broker, format_sse
+from .idempotency import IdempotencyKeyMixin
+from .list_summary import CandidateListPagination, candidate_list_summary, candidates_changed
+from .resume_archive import stream_resume_archive
+from .sync import InvalidSyncToken, candidate_changes, decode_sync_token, parse_updated_since
+from .upload_handlers import ResumeUploadHandler
+from .models import (
+    Candidate, StatusChange, CandidateImportJob, ApplicationStatus, FunnelWatermark, QueuedEmail, ImportStatus
+)
+from .throttling import (
+    LoadSheddingMixin,
+    RegistrationRateThrottle,
+    EmailCheckRateThrottle,
+    CandidateStatusRateThrottle,
+    CandidateStatusIdRateThrottle,
+    StatusEventsRateThrottle,
+    StatusEventsIdRateThrottle
+)
 from .serializers import (
+    CandidateFilterSerializer,
     CandidateListSerializer,
     CandidateDetailSerializer,
     CandidateCreateSerializer,
+    CandidateImportRequestSerializer,
+    CandidateImportJobSerializer,
+    StatusChangeSerializer,
     StatusUpdateSerializer
 )
 # from .storage import get_storage_backend
+import asyncio
 import logging
+import math
 import os
+import uuid
+import zipfile
 
 logger = logging.getLogger(__name__)
 
@@ -36,12 +76,50 @@ class APITestView(APIView):
             'message': 'API is working properly',
             'endpoints': {
                 'candidates_register': '/api/candidates/register/',
+                'candidates_check_email': '/api/candidates/check-email/?email={email}',
                 'candidate_status': '/api/candidates/{candidate_id}/status/',
+                'candidate_status_events': '/api/candidates/{candidate_id}/events/',
                 'admin_candidates': '/api/admin/candidates/',
             }
         })
 
 
+def filter_candidates(queryset, params):
+    """
+    Apply the admin list filters from the query parameters to a candidate queryset.
+    Raises ValidationError for invalid values or combinations without a matching index.
+    """
+    filters = CandidateFilterSerializer(data=params)
+    filters.is_valid(raise_exception=True)
+    return filters.filter_queryset(queryset)
+
+
+def is_sync_request(request):
+    """Whether a candidate list request asks for the delta sync feed."""
+    return 'sync_token' in request.query_params or 'updated_since' in request.query_params
+
+
+class SparseFieldsetViewMixin:
+    """Applies `?fields=` / `?exclude=` to the serializer and the queryset of a view."""
+
+    def get_selected_fields(self):
+        if not hasattr(self, '_selected_fields'):
+            params = self.request.query_params
+            serializer_class = self.get_serializer_class()
+            self._selected_fields = serializer_class.select_fields(params.get('fields'), params.get('exclude'))
+        return self._selected_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_selected_fields()
+        return context
+
+
+def include_archived_history(request):
+    """Whether the request asks for archived status changes (?include_archived=true)."""
+    return request.query_params.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
 # Custom permission class for admin authentication
 class IsAdmin(permissions.BasePermission):
     """
@@ -52,14 +130,61 @@ class IsAdmin(permissions.BasePermission):
         return request.headers.get('X-ADMIN') == '1'
 
 
+DUPLICATE_EMAIL_ERROR = 'candidate with this email already exists.'
+
+
+# Candidate Email Check View
+class CandidateEmailCheckView(APIView):
+    """
+    API endpoint to check whether an email is still available for registration.
+    Lets clients detect duplicates before uploading a resume.
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [EmailCheckRateThrottle]
+
+    def get(self, request, format=None):
+        field = serializers.EmailField()
+        try:
+            email = field.run_validation(request.query_params.get('email', ''))
+        except serializers.ValidationError as e:
+            return Response({'email': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'email': email, 'available': not email_registry.is_registered(email)})
+
+
 # Candidate Registration View
-class CandidateRegistrationView(generics.CreateAPIView):
+class CandidateRegistrationView(IdempotencyKeyMixin, LoadSheddingMixin, generics.CreateAPIView):
     """
     API endpoint for candidate registration.
     Allows candidates to register with their information and upload a resume.
+    Clients may announce the email in the X-Candidate-Email header so that
+    duplicates are rejected before the multipart body is read, and send an
+    Idempotency-Key header so that a retried registration is answered with
+    the response of the first one.
     """
     serializer_class = CandidateCreateSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [RegistrationRateThrottle]
+    load_shedding_scope = 'registration'
+    idempotency_scope = 'registration'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Oversized resumes and files that are not really PDF/DOCX are rejected while being received.
+        request._request.upload_handlers = [ResumeUploadHandler(request._request)]
+
+    def create(self, request, *args, **kwargs):
+        # A retry must get the stored response rather than the duplicate email error below.
+        return self.idempotent(request, self.register, *args, **kwargs)
+
+    def register(self, request, *args, **kwargs):
+        # Checked before request.data is accessed, i.e. before the resume is received
+        # (unless an Idempotency-Key made the body be read for its fingerprint).
+        email = request.headers.get('X-Candidate-Email')
+        if email and email_registry.is_registered(email):
+            logger.info("Rejected duplicate registration before upload")
+            return Response({'email': [DUPLICATE_EMAIL_ERROR]}, status=status.HTTP_400_BAD_REQUEST)
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         logger.info(f"New candidate registration: {serializer.validated_data.get('full_name')}")
@@ -91,66 +216,303 @@ class CandidateRegistrationView(generics.CreateAPIView):
 
 
 # Candidate Status View
-class CandidateStatusView(generics.RetrieveAPIView):
+class CandidateStatusView(LoadSheddingMixin, generics.RetrieveAPIView):
     """
     API endpoint for candidates to check their application status.
+    Rate limited per client IP and per candidate ID.
     """
     serializer_class = CandidateDetailSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [CandidateStatusRateThrottle, CandidateStatusIdRateThrottle]
+    load_shedding_scope = 'candidate_status'
 
     def get_object(self):
         candidate_id = self.kwargs.get('pk')
         return get_object_or_404(Candidate, id=candidate_id)
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_archived'] = include_archived_history(self.request)
+        return context
+
+
+def status_change_event(change):
+    """Payload of a status change pushed to candidate event streams."""
+    event = dict(StatusChangeSerializer(change).data)
+    event['current_status_display'] = ApplicationStatus(change.new_status).label
+    return event
+
+
+def publish_status_change(change):
+    """Push a committed status change to the candidate's open event streams."""
+    try:
+        get_broker().publish(change.candidate_id, status_change_event(change))
+    except Exception as e:
+        logger.error(f"Error publishing status event for candidate {change.candidate_id}: {str(e)}")
+
+
+# Status changes created this recently may reach a new stream both from the
+# database and through the broker.
+STATUS_EVENTS_OVERLAP_SECONDS = 60
+
+
+def initial_status_events(candidate, last_event_id=None):
+    """
+    Return (messages, event IDs) to send when an event stream opens.
+    A reconnecting client (Last-Event-ID) gets the changes it missed; a new one
+    gets the current status, tagged with the latest change so it can resume later.
+    The event IDs are those of changes already covered by the messages, which the
+    stream skips if they are also published to it.
+    """
+    if last_event_id:
+        try:
+            last_change = StatusChange.objects.filter(candidate=candidate, id=uuid.UUID(last_event_id)).first()
+        except ValueError:
+            last_change = None
+        if last_change is not None:
+            missed = list(StatusChange.objects.filter(
+                candidate=candidate, created_at__gt=last_change.created_at
+            ).order_by('created_at'))
+            return ([format_sse(status_change_event(change), 'status_change', change.id) for change in missed],
+                    {str(change.id) for change in missed})
+
+    latest = StatusChange.objects.filter(candidate=candidate).order_by('-created_at').first()
+    snapshot = {
+        'candidate_id': str(candidate.id),
+        'current_status': candidate.current_status,
+        'current_status_display': candidate.get_current_status_display(),
+        'updated_at': candidate.updated_at.isoformat(),
+    }
+    # Changes this recent may have been published after the stream subscribed; the snapshot covers them.
+    recent = StatusChange.objects.filter(
+        candidate=candidate, created_at__gte=timezone.now() - timedelta(seconds=STATUS_EVENTS_OVERLAP_SECONDS)
+    ).values_list('id', flat=True)
+    return [format_sse(snapshot, 'status', latest.id if latest else None)], {str(change_id) for change_id in recent}
+
+
+# Candidate Status Events View
+class CandidateStatusEventsView(View):
+    """
+    Server-Sent Events stream of a candidate's status changes.
+    Sends the current status once, then pushes each new status change as it is
+    recorded, with heartbeat comments in between. Reconnecting clients resume
+    from the Last-Event-ID header. Streams are only held open when served over
+    ASGI; under WSGI the initial events are sent and the client reconnects after
+    the retry interval, which degrades to polling.
+    Opening streams is rate limited per client IP and per candidate, and each
+    candidate has at most STATUS_EVENTS_MAX_STREAMS_PER_CANDIDATE open streams
+    per process.
+    """
+    throttle_classes = [StatusEventsRateThrottle, StatusEventsIdRateThrottle]
+
+    async def get(self, request, pk):
+        wait = await sync_to_async(self._throttle_wait)(request)
+        if wait is not None:
+            return self._too_many('Request was throttled.', wait)
+
+        streaming = isinstance(request, ASGIRequest)
+        max_streams = getattr(settings, 'STATUS_EVENTS_MAX_STREAMS_PER_CANDIDATE', 5)
+        if streaming and get_broker().subscriber_count(pk) >= max_streams:
+            return self._too_many('Too many open event streams for this candidate.',
+                                  getattr(settings, 'STATUS_EVENTS_RETRY_MS', 5000) / 1000)
+
+        if not await Candidate.objects.filter(id=pk).aexists():
+            return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        last_event_id = request.headers.get('Last-Event-ID')
+        if streaming:
+            stream = self._stream(pk, last_event_id)
+        else:
+            stream = iter([self._retry()] + (await sync_to_async(self._initial_events)(pk, last_event_id))[0])
+
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+        return response
+
+    def _throttle_wait(self, request):
+        """Seconds to wait if a throttle refuses the request, else None."""
+        waits = [throttle.wait() for throttle in (cls() for cls in self.throttle_classes)
+                 if not throttle.allow_request(request, self)]
+        if not waits:
+            return None
+        return max((wait for wait in waits if wait is not None), default=0)
+
+    def _too_many(self, detail, wait):
+        response = JsonResponse({'detail': detail}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
+
+    def _retry(self):
+        return f"retry: {getattr(settings, 'STATUS_EVENTS_RETRY_MS', 5000)}\n\n"
+
+    def _initial_events(self, pk, last_event_id):
+        """Initial messages and their change IDs; no messages if the candidate is gone."""
+        candidate = Candidate.objects.filter(id=pk).only('id', 'current_status', 'updated_at').first()
+        if candidate is None:
+            return [], set()
+        return initial_status_events(candidate, last_event_id)
+
+    async def _stream(self, candidate_id, last_event_id):
+        broker = get_broker()
+        subscription = broker.subscribe(candidate_id)
+        heartbeat = getattr(settings, 'STATUS_EVENTS_HEARTBEAT_SECONDS', 15)
+        try:
+            yield self._retry()
+            # Read the status only after subscribing, so a change committed in between reaches
+            # the stream; changes the initial messages already cover are skipped below.
+            initial_messages, sent_ids = await sync_to_async(self._initial_events)(candidate_id, last_event_id)
+            for message in initial_messages:
+                yield message
+            while True:
+                try:
+                    event = await subscription.get(timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                # Skip changes already sent from the database when the stream opened
+                if event['id'] in sent_ids:
+                    continue
+                yield format_sse(event, 'status_change', event['id'])
+        finally:
+            broker.unsubscribe(subscription)
+
 
 # Admin Candidate List View
-class CandidateListView(generics.ListAPIView):
+class CandidateListView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     API endpoint for admins to list all candidates.
-    Supports filtering by department and pagination.
+    Supports the candidate filters (see filter_candidates), pagination and sparse
+    fieldsets (`fields` / `exclude`).
+    With `sync_token` (empty to start) or `updated_since`, returns the delta sync
+    feed instead: candidates changed since the token, deleted candidate IDs
+    and the next token.
+    Pages carry an ETag derived from the latest update and row count of the
+    filtered candidates, so unchanged pages are revalidated with a 304. Both
+    come from the list summary, which also provides the page count and is
+    cached when the cache is shared (Redis).
     """
     serializer_class = CandidateListSerializer
     permission_classes = [IsAdmin]
+    pagination_class = CandidateListPagination
     filter_backends = [filters.OrderingFilter]
     ordering = ['-created_at']  # Default ordering by registration date (descending)
 
     def get_queryset(self):
-        queryset = Candidate.objects.all()
-
-        # Filter by department if provided
-        department = self.request.query_params.get('department', None)
-        if department:
-            queryset = queryset.filter(department=department)
-
-        return queryset
+        queryset = filter_candidates(Candidate.objects.all(), self.request.query_params)
+        # The sync feed pages on updated_at, so it is loaded whatever the fields
+        required = ('updated_at',) if is_sync_request(self.request) else ()
+        return self.get_serializer_class().optimize_queryset(queryset, self.get_selected_fields(), required)
+
+    def get_etag(self, request):
+        if is_sync_request(request):
+            return None
+        # Any insert or update moves the latest updated_at; deletions change the count.
+        summary = candidate_list_summary(self.get_queryset())
+        return make_etag(summary['last_updated'], summary['count'], request.get_full_path())
+
+    def list(self, request, *args, **kwargs):
+        if not is_sync_request(request):
+            return super().list(request, *args, **kwargs)
+
+        params = request.query_params
+        # Candidates leaving a status filter would never reach the client, so sync by status is refused.
+        if params.get('current_status'):
+            raise serializers.ValidationError({'current_status': ["Not supported with the sync feed; "
+                                                                  "filter the synced candidates locally."]})
+        try:
+            if 'sync_token' in params:
+                position = decode_sync_token(params['sync_token'])
+            else:
+                position = parse_updated_since(params['updated_since'])
+        except InvalidSyncToken as e:
+            raise serializers.ValidationError({'sync_token': [str(e)]})
+
+        # Deletions are reported unfiltered; IDs the client does not have are ignored.
+        candidates, deleted, next_token, has_more = candidate_changes(
+            self.get_queryset(), *position, limit=getattr(settings, 'SYNC_PAGE_SIZE', 500)
+        )
+        return Response({
+            'results': self.get_serializer(candidates, many=True).data,
+            'deleted': deleted,
+            'sync_token': next_token,
+            'has_more': has_more,
+        })
 
 
 # Admin Candidate Detail View
-class CandidateDetailView(generics.RetrieveAPIView):
+class CandidateDetailView(ConditionalGetMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     """
     API endpoint for admins to view candidate details.
+    Supports sparse fieldsets; the status history is only queried when included.
+    The ETag header starts with the candidate version, to send back in If-Match on
+    status updates, and also covers the status history so it can be revalidated.
     """
     serializer_class = CandidateDetailSerializer
     permission_classes = [IsAdmin]
 
     def get_object(self):
         candidate_id = self.kwargs.get('pk')
-        return get_object_or_404(Candidate, id=candidate_id)
+        queryset = self.get_serializer_class().optimize_queryset(Candidate.objects.all(), self.get_selected_fields())
+        return get_object_or_404(queryset, id=candidate_id)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_archived'] = include_archived_history(self.request)
+        return context
+
+    def get_etag(self, request):
+        summary = (Candidate.objects
+                   .filter(id=self.kwargs.get('pk'))
+                   .values('version', 'updated_at')
+                   .annotate(latest_change=Max('status_changes__created_at'), change_count=Count('status_changes'))
+                   .order_by('id')
+                   .first())
+        if summary is None:
+            return None
+        # The query string selects the representation (archived history, sparse fields)
+        return make_etag(summary['updated_at'], summary['latest_change'], summary['change_count'],
+                         request.get_full_path(), prefix=summary['version'])
 
 
 # Admin Status Update View
-class StatusUpdateView(generics.UpdateAPIView):
+class StatusUpdateView(IdempotencyKeyMixin, generics.UpdateAPIView):
     """
     API endpoint for admins to update a candidate's application status.
+    With an Idempotency-Key header, a retried update is answered with the
+    response of the first one instead of recording the change again.
     """
     serializer_class = StatusUpdateSerializer
     permission_classes = [IsAdmin]
+    idempotency_scope = 'status_update'
+    idempotency_fingerprint_headers = ('If-Match', 'X-ADMIN-USER')
 
     def get_object(self):
         candidate_id = self.kwargs.get('pk')
         return get_object_or_404(Candidate, id=candidate_id)
 
+    @staticmethod
+    def _expected_version(request, candidate):
+        """
+        Return the version the client expects to update, taken from If-Match.
+        Without the header (or with "*") the version that was just read is used.
+        Detail ETags ("<version>-<digest>") are accepted as well as plain versions.
+        """
+        if_match = request.headers.get('If-Match', '').strip()
+        if not if_match or if_match == '*':
+            return candidate.version
+        tag = if_match.split(',')[0].strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        try:
+            return int(tag.strip('"').split('-')[0])
+        except ValueError:
+            return None
+
     def update(self, request, *args, **kwargs):
+        return self.idempotent(request, self.update_status, *args, **kwargs)
+
+    def update_status(self, request, *args, **kwargs):
         candidate = self.get_object()
         serializer = self.get_serializer(data=request.data)
 
@@ -158,41 +520,203 @@ class StatusUpdateView(generics.UpdateAPIView):
             new_status = serializer.validated_data['status']
             feedback = serializer.validated_data.get('feedback', '')
             admin_user = request.headers.get('X-ADMIN-USER', 'Admin')
-
-            # Create status change record
-            StatusChange.objects.create(
-                candidate=candidate,
-                previous_status=candidate.current_status,
-                new_status=new_status,
-                feedback=feedback,
-                admin_user=admin_user
-            )
+            expected_version = self._expected_version(request, candidate)
+            now = timezone.now()
+
+            # Conditional update: only succeeds if nobody changed the candidate since the version we read,
+            # so concurrent admins can't overwrite each other or record a stale previous_status.
+            with transaction.atomic():
+                updated = expected_version == candidate.version and Candidate.objects.filter(
+                    id=candidate.id, version=expected_version
+                ).update(current_status=new_status, version=F('version') + 1, updated_at=now)
+
+                if updated:
+                    # Create status change record
+                    change = StatusChange.objects.create(
+                        candidate=candidate,
+                        previous_status=candidate.current_status,
+                        new_status=new_status,
+                        feedback=feedback,
+                        admin_user=admin_user
+                    )
+                    transaction.on_commit(lambda: publish_status_change(change))
+                    transaction.on_commit(candidates_changed)
+                    # The email goes out with any other changes made within the notification window
+                    queue_status_notification(candidate, new_status, feedback)
+
+            if not updated:
+                candidate.refresh_from_db()
+                logger.info(f"Status update conflict for candidate {candidate.id}")
+                response = Response({
+                    'error': 'The candidate was modified by another request. Reload it and try again.',
+                    'candidate': CandidateDetailSerializer(candidate).data
+                }, status=status.HTTP_409_CONFLICT)
+                response['ETag'] = candidate.etag
+                return response
 
             # Update candidate status
             candidate.current_status = new_status
-            candidate.save()
+            candidate.version = expected_version + 1
+            candidate.updated_at = now
 
             logger.info(f"Status updated for candidate {candidate.id}: {new_status}")
-            try:
-                # Send status change email
-                subject = f"Application Status Update: {candidate.get_current_status_display()}"
-                message = (f"Dear {candidate.full_name},\n\n"
-                           f"Your application #{candidate.id} status has been updated to: "
-                           f"{candidate.get_current_status_display()}.\n\n"
-                           f"Feedback: {feedback}\n\nBest regards,\nHR Team")
-                send_candidate_email(subject, message, candidate.email)
-            except Exception as e:
-                logger.error(f"Error sending status update email for candidate {candidate.id}: {str(e)}")
 
             # Return updated candidate details
-            return Response({
+            response = Response({
                 'message': 'Status updated successfully',
                 'candidate': CandidateDetailSerializer(candidate).data
             })
+            response['ETag'] = candidate.etag
+            return response
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# Admin Bulk Import View
+class CandidateImportView(generics.GenericAPIView):
+    """
+    API endpoint for admins to bulk import candidates.
+    Takes a CSV/NDJSON file of candidates and a ZIP archive of their resumes,
+    starts importing them in the background and returns 202 with the import
+    job, whose progress and per-row error report are polled at its Location.
+    Passing the ID of an interrupted job resumes it after its last checkpoint.
+    """
+    serializer_class = CandidateImportRequestSerializer
+    permission_classes = [IsAdmin]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, format=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if not zipfile.is_zipfile(data['resumes']):
+            return Response({'resumes': ['The resumes file is not a valid ZIP archive.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if data.get('job'):
+                job = get_object_or_404(CandidateImportJob, id=data['job'])
+                # Claimed unless another import of the job is still checkpointing
+                now = timezone.now()
+                stale = now - timedelta(seconds=getattr(settings, 'BULK_IMPORT_STALE_SECONDS', 900))
+                claimed = CandidateImportJob.objects.filter(id=job.id).exclude(
+                    status=ImportStatus.RUNNING, updated_at__gt=stale
+                ).update(status=ImportStatus.RUNNING, updated_at=now)
+                if not claimed:
+                    return Response({'job': ['The import job is still running.']}, status=status.HTTP_409_CONFLICT)
+                job.refresh_from_db()
+            else:
+                job = CandidateImportJob.objects.create(source_name=data['rows'].name)
+            start_import(job, data['rows'], data['resumes'], data.get('format') or detect_format(data['rows'].name))
+
+        logger.info(f"Bulk import {job.id} started from {data['rows'].name}")
+        response = Response(CandidateImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = reverse('equavo_hr_app:admin-candidate-import-job', args=[job.id])
+        return response
+
+
+# Admin Bulk Import Job View
+class CandidateImportJobView(generics.RetrieveAPIView):
+    """
+    API endpoint for admins to check the progress and error report of a bulk import.
+    """
+    serializer_class = CandidateImportJobSerializer
+    permission_classes = [IsAdmin]
+    queryset = CandidateImportJob.objects.all()
+
+
+# Admin Funnel Analytics View
+class FunnelAnalyticsView(APIView):
+    """
+    API endpoint for admins to read the hiring funnel per department: candidates
+    entering, leaving and currently in each status, average days in a status and
+    conversion rates between statuses. Served from the precomputed snapshot
+    (update_funnel_analytics), so it reflects the changes up to `computed_through`.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request, format=None):
+        filters = CandidateFilterSerializer(data={'department': request.query_params.getlist('department')})
+        filters.is_valid(raise_exception=True)
+        watermark = FunnelWatermark.objects.filter(pk=1).first()
+        return Response({
+            'computed_through': watermark.last_created_at if watermark else None,
+            'rebuilt_at': watermark.rebuilt_at if watermark else None,
+            'departments': funnel_report(filters.validated_data['department']),
+        })
+
+
+# Admin Resume Read Cache View
+class ResumeReadCacheView(APIView):
+    """
+    API endpoint for admins to read the hit/miss counters of the local resume
+    read cache (S3_READ_CACHE_MAX_BYTES). Counters are kept per process, so the
+    response names the process that answered.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request, format=None):
+        read_cache = getattr(Candidate._meta.get_field('resume').storage, 'read_cache', None)
+        if read_cache is None:
+            return Response({'enabled': False})
+        return Response({'enabled': True, 'process': os.getpid(), **read_cache.stats()})
+
+
+class CircuitBreakerView(APIView):
+    """
+    API endpoint for admins to read the state and counters of the S3 and SMTP
+    circuit breakers, and how many emails are queued for a retry. Breakers are
+    kept per process, so the response names the process that answered.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request, format=None):
+        return Response({
+            'process': os.getpid(),
+            'breakers': breaker_stats(),
+            'queued_emails': QueuedEmail.objects.filter(failed_at__isnull=True).count(),
+            'failed_emails': QueuedEmail.objects.filter(failed_at__isnull=False).count(),
+        })
+
+
+# Admin Resume Archive View
+class ResumeArchiveView(generics.GenericAPIView):
+    """
+    API endpoint for admins to download the resumes of several candidates as one ZIP archive.
+    Candidates are selected by `ids` (comma-separated candidate IDs) or by the
+    candidate list filters. The archive is streamed while it is built.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request, format=None):
+        queryset = Candidate.objects.only('id', 'full_name', 'resume').order_by('created_at')
+        ids = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        if ids:
+            try:
+                ids = [uuid.UUID(value.strip()) for value in ids]
+            except ValueError:
+                return Response({'ids': ['Must be a comma-separated list of candidate IDs.']},
+                                status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(id__in=ids)
+        queryset = filter_candidates(queryset, request.query_params)
+
+        limit = getattr(settings, 'RESUME_ARCHIVE_MAX_CANDIDATES', 1000)
+        candidates = list(queryset[:limit + 1])
+        if len(candidates) > limit:
+            return Response({'error': f'At most {limit} resumes can be downloaded at once.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"Resume archive of {len(candidates)} candidates downloaded")
+        storage = Candidate._meta.get_field('resume').storage
+        response = StreamingHttpResponse(
+            stream_resume_archive(candidates, storage, prefetch=getattr(settings, 'RESUME_ARCHIVE_PREFETCH', 4)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="resumes.zip"'
+        return response
+
+
 # Resume Download View
 class ResumeDownloadView(generics.GenericAPIView):
     """
@@ -210,10 +734,9 @@ class ResumeDownloadView(generics.GenericAPIView):
             )
 
         try:
-            # storage = get_storage_backend()
-            file_path = candidate.resume.path
-
-            if not os.path.exists(file_path):
+            # Read through the storage API, so backends without local paths (S3, memory) work too
+            storage = candidate.resume.storage
+            if not storage.exists(candidate.resume.name):
                 return Response(
                     {'error': 'Resume file not found on storage'},
                     status=status.HTTP_404_NOT_FOUND
@@ -229,7 +752,7 @@ class ResumeDownloadView(generics.GenericAPIView):
                 else 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 
             # Return file response
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+            response = FileResponse(storage.open(candidate.resume.name, 'rb'), content_type=content_type)
             response['Content-Disposition'] = f'attachment; filename="{file_name}"'
             return response
 
@@ -9,6 +9,7 @@ const AdminCandidateDetail = () => {
   
   // State
   const [candidate, setCandidate] = useState(null);
+  const [etag, setEtag] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   
@@ -58,6 +59,8 @@ const AdminCandidateDetail = () => {
       });
       
       setCandidate(response.data);
+      // Remember the version we are looking at, so a concurrent update is detected
+      setEtag(response.headers['etag'] || null);
       // Initialize status form with current status
       setStatusData({
         status: response.data.current_status,
@@ -131,7 +134,8 @@ const AdminCandidateDetail = () => {
         {
           headers: {
             'X-ADMIN': '1',
-            'X-ADMIN-USER': 'Admin User' // In a real app, this would be the logged-in admin's name
+            'X-ADMIN-USER': 'Admin User', // In a real app, this would be the logged-in admin's name
+            ...(etag ? { 'If-Match': etag } : {})
           }
         }
       );
@@ -149,6 +153,12 @@ const AdminCandidateDetail = () => {
       });
     } catch (error) {
       console.error('Error updating status:', error);
+      if (error.response?.status === 409) {
+        // Someone else changed the candidate meanwhile: show their update before retrying
+        await loadCandidate();
+        setUpdateError(error.response.data.error);
+        return;
+      }
       setUpdateError(
         error.response?.data?.detail || 
         'An error occurred while updating the status. Please try again.'
@@ -3,6 +3,39 @@ import { Table, Card, Badge, Button, Form, Pagination, Alert } from 'react-boots
 import { Link } from 'react-router-dom';
 import axios from 'axios';
 
+const PAGE_SIZE = 10;
+
+// Candidates cached across visits of the list, kept current with the delta sync feed
+const candidateCache = { byId: new Map(), syncToken: '' };
+
+// Fetch the candidates changed since the last sync (everything on the first one)
+const syncCandidates = async () => {
+  let hasMore = true;
+  while (hasMore) {
+    let response;
+    try {
+      response = await axios.get('/api/admin/candidates/', {
+        params: { sync_token: candidateCache.syncToken },
+        headers: {
+          'X-ADMIN': '1'
+        }
+      });
+    } catch (error) {
+      // The token outlived the server's deletion history: start over with a full sync
+      if (error.response?.status === 410 && candidateCache.syncToken) {
+        candidateCache.byId.clear();
+        candidateCache.syncToken = '';
+        continue;
+      }
+      throw error;
+    }
+    response.data.results.forEach((candidate) => candidateCache.byId.set(candidate.id, candidate));
+    response.data.deleted.forEach((id) => candidateCache.byId.delete(id));
+    candidateCache.syncToken = response.data.sync_token;
+    hasMore = response.data.has_more;
+  }
+};
+
 const AdminCandidateList = () => {
   // State
   const [candidates, setCandidates] = useState([]);
@@ -42,20 +75,15 @@ const AdminCandidateList = () => {
     setError(null);
     
     try {
-      // Build URL with query parameters
-      let url = `/api/admin/candidates/?page=${page}`;
-      if (departmentFilter) {
-        url += `&department=${departmentFilter}`;
-      }
+      await syncCandidates();
       
-      const response = await axios.get(url, {
-        headers: {
-          'X-ADMIN': '1'
-        }
-      });
+      // Filter and paginate the cached candidates, newest registrations first
+      const matching = Array.from(candidateCache.byId.values())
+        .filter((candidate) => !departmentFilter || candidate.department === departmentFilter)
+        .sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
       
-      setCandidates(response.data.results);
-      setTotalPages(Math.ceil(response.data.count / 10)); // Assuming 10 items per page
+      setCandidates(matching.slice((page - 1) * PAGE_SIZE, page * PAGE_SIZE));
+      setTotalPages(Math.max(1, Math.ceil(matching.length / PAGE_SIZE)));
     } catch (error) {
       console.error('Error loading candidates:', error);
       setError(
@@ -49,9 +49,19 @@ const CandidateRegistration = () => {
     });
     
     try {
+      // Check the email first so a duplicate registration doesn't upload the resume
+      const check = await axios.get('/api/candidates/check-email/', {
+        params: { email: formData.email }
+      });
+      if (!check.data.available) {
+        setSubmitError('A candidate with this email address has already registered.');
+        return;
+      }
+
       const response = await axios.post('/api/candidates/register/', submitData, {
         headers: {
-          'Content-Type': 'multipart/form-data'
+          'Content-Type': 'multipart/form-data',
+          'X-Candidate-Email': formData.email
         }
       });
       
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { Form, Button, Alert, Card, ListGroup, Badge } from 'react-bootstrap';
 import axios from 'axios';
 
@@ -11,6 +11,32 @@ const CandidateStatus = () => {
   const [error, setError] = useState(null);
   const [candidateData, setCandidateData] = useState(null);
   
+  const candidateKey = candidateData?.id;
+
+  // Follow status changes pushed by the server while the status is shown
+  useEffect(() => {
+    if (!candidateKey) {
+      return undefined;
+    }
+    const source = new EventSource(`/api/candidates/${candidateKey}/events/`);
+    source.addEventListener('status_change', (event) => {
+      const statusChange = JSON.parse(event.data);
+      setCandidateData((current) => {
+        if (!current || current.status_changes.some((change) => change.id === statusChange.id)) {
+          return current;
+        }
+        return {
+          ...current,
+          current_status: statusChange.new_status,
+          current_status_display: statusChange.current_status_display,
+          updated_at: statusChange.created_at,
+          status_changes: [statusChange, ...current.status_changes],
+        };
+      });
+    });
+    return () => source.close();
+  }, [candidateKey]);
+  
   // Handle input change
   const handleChange = (e) => {
     setCandidateId(e.target.value);